@@ -0,0 +1,213 @@
+"""
+Clustering benchmark on synthetic alerts (see synthetic.py).
+
+For every size and backend it measures, in a fresh process each:
+
+- wall time of cluster() (preprocess reported separately);
+- peak RSS of the process;
+- item-leader comparisons per item;
+- speedup: the reference backend's cluster time over this backend's (the
+  CPU count is recorded too: "parallel" only gains with several cores);
+- agreement: Adjusted Rand Index against the reference backend (the exact
+  "index" backend by default) and against the generator's ground truth.
+
+Each run is appended to benchmarks/results.jsonl with the git commit, so
+later versions can be compared; the table shows the change against the
+last recorded run with the same size, backend and seed.
+
+The 1M run with the exact backend takes hours on a laptop; pass --sizes to
+keep quick checks quick.
+
+Usage:
+    python benchmark.py                              # 1k, 10k, 100k, 1M
+    python benchmark.py --sizes 1000 10000 --backends index sparse minhash compact
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RESULTS = os.path.join(SCRIPT_DIR, "benchmarks", "results.jsonl")
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+# "compact" is the index backend on the columnar state of compact.py,
+# "tfidf" the index backend with IDF-weighted cosine (idf.py),
+# "parallel" the experimental time-sharded clustering of parallel.py
+BACKENDS = ["index", "sparse", "minhash", "compact", "parallel", "tfidf"]
+
+
+def _pairs(n):
+    return n * (n - 1) / 2
+
+
+def adjusted_rand_index(labels_a, labels_b):
+    """ARI from the contingency table, O(n)."""
+    n = len(labels_a)
+    if n < 2:
+        return 1.0
+    contingency = Counter(zip(labels_a, labels_b))
+    sum_cells = sum(_pairs(c) for c in contingency.values())
+    sum_a = sum(_pairs(c) for c in Counter(labels_a).values())
+    sum_b = sum(_pairs(c) for c in Counter(labels_b).values())
+    expected = sum_a * sum_b / _pairs(n)
+    maximum = (sum_a + sum_b) / 2
+    if maximum == expected:
+        return 1.0
+    return (sum_cells - expected) / (maximum - expected)
+
+
+def _run(size, seed, backend):
+    """Runs in a child process so peak RSS belongs to this run only."""
+    sys.path.insert(0, SCRIPT_DIR)
+    import simulate_logic
+    from synthetic import generate
+
+    alerts = generate(size, seed)
+    truth = {a["id"]: a["story_id"] for a in alerts}
+
+    compact = backend == "compact"
+    if compact:
+        import compact as columnar
+
+    start = time.perf_counter()
+    processed = columnar.preprocess(alerts) if compact else simulate_logic.preprocess(alerts)
+    preprocess_seconds = time.perf_counter() - start
+
+    stats = {}
+    start = time.perf_counter()
+    if compact:
+        groups = columnar.cluster(processed, stats=stats)
+    elif backend == "tfidf":
+        from idf import IdfStore, TFIDF_THRESHOLD
+        store = IdfStore()
+        for item in processed:
+            store.add(item["token_set"])
+        groups = simulate_logic.cluster(processed, threshold=TFIDF_THRESHOLD, debug=False, stats=stats, idf=store)
+    elif backend == "parallel":
+        from parallel import cluster_parallel
+        groups = cluster_parallel(processed, stats=stats)
+    else:
+        groups = simulate_logic.cluster(processed, debug=False, backend=backend, stats=stats)
+    cluster_seconds = time.perf_counter() - start
+
+    if compact:
+        labels = dict(zip(processed.ids, processed.groups))
+    else:
+        labels = {item["id"]: item["assigned_group"] for item in processed}
+    return {
+        "preprocess_seconds": round(preprocess_seconds, 3),
+        "cluster_seconds": round(cluster_seconds, 3),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "comparisons_per_item": round(stats.get("comparisons", 0) / max(size, 1), 2),
+        "groups": len(groups),
+        "labels": labels,
+        "truth": truth,
+    }
+
+
+def run_isolated(size, seed, backend):
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(_run, size, seed, backend).result()
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def previous_run(history, size, backend, seed):
+    for record in reversed(history):
+        if record["size"] == size and record["backend"] == backend and record["seed"] == seed:
+            return record
+    return None
+
+
+def _delta(current, previous, key):
+    if not previous or not previous.get(key):
+        return ""
+    return f" ({(current[key] - previous[key]) / previous[key] * 100:+.0f}%)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark simulate_logic clustering on synthetic alerts.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--backends", nargs="+", default=["index"], choices=BACKENDS)
+    parser.add_argument("--reference", default="index", choices=BACKENDS,
+                        help="backend the agreement is measured against")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--results", default=DEFAULT_RESULTS)
+    args = parser.parse_args()
+
+    history = load_results(args.results)
+    os.makedirs(os.path.dirname(args.results), exist_ok=True)
+    commit = git_commit()
+
+    print(f"{'size':>9} {'backend':>8} {'cluster s':>16} {'speedup':>7} {'peak MB':>14} {'cmp/item':>9} "
+          f"{'ARI ref':>8} {'ARI truth':>9}")
+    for size in args.sizes:
+        backends = list(args.backends)
+        if args.reference not in backends:
+            backends.insert(0, args.reference)
+        runs = {backend: run_isolated(size, args.seed, backend) for backend in backends}
+        reference = runs[args.reference]
+        ids = sorted(reference["labels"])
+        reference_labels = [reference["labels"][i] for i in ids]
+        truth_labels = [reference["truth"][i] for i in ids]
+
+        for backend in args.backends:
+            run = runs[backend]
+            labels = [run["labels"][i] for i in ids]
+            record = {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "commit": commit,
+                "python": platform.python_version(),
+                "cpus": os.cpu_count(),
+                "size": size,
+                "seed": args.seed,
+                "backend": backend,
+                "reference": args.reference,
+                "preprocess_seconds": run["preprocess_seconds"],
+                "cluster_seconds": run["cluster_seconds"],
+                "speedup_reference": round(reference["cluster_seconds"] / max(run["cluster_seconds"], 1e-3), 2),
+                "peak_rss_mb": run["peak_rss_mb"],
+                "comparisons_per_item": run["comparisons_per_item"],
+                "groups": run["groups"],
+                "ari_reference": round(adjusted_rand_index(reference_labels, labels), 4),
+                "ari_truth": round(adjusted_rand_index(truth_labels, labels), 4),
+            }
+            previous = previous_run(history, size, backend, args.seed)
+            print(f"{size:>9} {backend:>8} "
+                  f"{record['cluster_seconds']:>8.2f}{_delta(record, previous, 'cluster_seconds'):>8} "
+                  f"{record['speedup_reference']:>6.2f}x "
+                  f"{record['peak_rss_mb']:>7.0f}{_delta(record, previous, 'peak_rss_mb'):>7} "
+                  f"{record['comparisons_per_item']:>9.1f} "
+                  f"{record['ari_reference']:>8.4f} {record['ari_truth']:>9.4f}")
+            with open(args.results, "a") as f:
+                f.write(json.dumps(record) + "\n")
+            history.append(record)
+
+    print(f"\nResults appended to {args.results}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Columnar clustering state for millions of alerts.
+
+simulate_logic.preprocess keeps a dict per alert (token strings, a frozenset
+of them, a parsed time tuple) and cluster() adds a dict per group member; at
+millions of alerts that per-object overhead is most of the memory. Here the
+state is a handful of flat columns:
+
+- tokens are interned in a Vocabulary (word -> int id); an alert's token set
+  is a sorted run of ids in one shared array('i') (CSR layout, row i is
+  tokens[offsets[i]:offsets[i + 1]]);
+- times are a kind column (array('b')) and an epoch column in integer
+  microseconds (array('q')), the encoding of timestamps.py, so hour gaps
+  are bit-identical to hours_between;
+- group and score per alert are array('q') / array('d') columns, leaders
+  are an array of row numbers, and members are read back from the group
+  column instead of being kept as lists of dicts.
+
+Ids, titles and created_at stay as the original strings. cluster() forms
+the same groups, in the same order, as simulate_logic.cluster(backend="index").
+"""
+
+import os
+import sys
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from curator import tokenizer
+from simulate_logic import DEBUG_MIN_SCORE, THRESHOLD, LeaderIndex, apply_time_decay
+from timestamps import hours_between, max_reachable_hours, parse_time
+
+
+class Vocabulary:
+    """Token string <-> int id."""
+
+    def __init__(self):
+        self.ids = {}
+        self.words = []
+
+    def __len__(self):
+        return len(self.words)
+
+    def intern(self, tokens):
+        """Sorted, distinct ids for `tokens`, adding unseen words."""
+        ids = self.ids
+        result = set()
+        for token in tokens:
+            token_id = ids.get(token)
+            if token_id is None:
+                token_id = ids[token] = len(self.words)
+                self.words.append(token)
+            result.add(token_id)
+        return sorted(result)
+
+    def lookup(self, token_ids):
+        return [self.words[i] for i in token_ids]
+
+
+class AlertTable:
+    """One row per alert; group 0 means not clustered yet (group ids start at 1)."""
+
+    def __init__(self, vocab=None):
+        self.vocab = vocab if vocab is not None else Vocabulary()
+        self.ids = []
+        self.titles = []
+        self.created_at = []
+        self.tokens = array('i')
+        self.offsets = array('q', [0])
+        self.kinds = array('b')
+        self.epochs = array('q')
+        self.groups = array('q')
+        self.scores = array('d')
+        self.order = array('q')  # rows in clustering order, filled by cluster()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, alert_id, title, created_at, tokens):
+        kind, epoch_us = parse_time(created_at)
+        self.ids.append(alert_id)
+        self.titles.append(title)
+        self.created_at.append(created_at)
+        self.tokens.extend(self.vocab.intern(tokens))
+        self.offsets.append(len(self.tokens))
+        self.kinds.append(kind)
+        self.epochs.append(epoch_us)
+        self.groups.append(0)
+        self.scores.append(0.0)
+
+    def token_ids(self, row):
+        return self.tokens[self.offsets[row]:self.offsets[row + 1]]
+
+    def time(self, row):
+        return self.kinds[row], self.epochs[row]
+
+
+def preprocess(alerts, vocab=None):
+    """AlertTable with the tokens of simulate_logic.preprocess."""
+    table = AlertTable(vocab)
+    for a in alerts:
+        text = a["title"] + " " + (a["description"] or "")
+        table.append(a["id"], a["title"], a["created_at"], tokenizer.tokenize(text, strip_source_suffix=True))
+    return table
+
+
+def cluster(table, threshold=THRESHOLD, debug=False, stats=None):
+    """
+    Leader clustering over an AlertTable, newest first, with the inverted
+    index and time pruning of simulate_logic.cluster. Fills table.groups,
+    table.scores and table.order; returns the leader rows (group g is
+    leaders[g - 1]).
+    """
+    n = len(table)
+    # Same order as sorting the dicts by created_at (stable, newest first)
+    table.order = order = array('q', sorted(range(n), key=table.created_at.__getitem__, reverse=True))
+    leaders = array('q')
+    index = LeaderIndex(max_reachable_hours(threshold))
+    groups, scores = table.groups, table.scores
+    comparisons = 0
+
+    for row in order:
+        item_ids = table.token_ids(row)
+        item_set = frozenset(item_ids)
+        item_time = table.time(row)
+        best_group = 0
+        best_score = -1.0
+
+        candidates = index.candidates(item_ids, item_time)
+        comparisons += len(candidates)
+        for idx in candidates:
+            leader = leaders[idx]
+            leader_ids = table.token_ids(leader)
+            # Leader ids are distinct, so this counts the intersection without building a second set
+            intersection = len(item_set.intersection(leader_ids))
+            sem_score = intersection / (len(item_ids) + len(leader_ids) - intersection)
+            hours = hours_between(item_time, table.time(leader))
+            final_score = apply_time_decay(sem_score, hours)
+
+            if debug and sem_score > DEBUG_MIN_SCORE:
+                print(f"   COMPARE: '{table.titles[row][:20]}...' vs '{table.titles[leader][:20]}...'")
+                print(f"      - Sem Score: {sem_score:.3f} | Hours: {hours:.1f} | Final: {final_score:.3f}")
+
+            if final_score > threshold and final_score > best_score:
+                best_score = final_score
+                best_group = idx + 1
+
+        if best_group:
+            groups[row] = best_group
+            scores[row] = best_score
+        else:
+            leaders.append(row)
+            groups[row] = len(leaders)
+            scores[row] = 1.0  # Self match
+            index.add(len(leaders) - 1, item_ids, item_time)
+
+    if stats is not None:
+        stats["comparisons"] = stats.get("comparisons", 0) + comparisons
+    return leaders
+
+
+def as_groups(table, leaders):
+    """Group dicts in the shape of simulate_logic.cluster, for print_results."""
+    members = [[] for _ in leaders]
+    for row in table.order:
+        members[table.groups[row] - 1].append({"title": table.titles[row], "score": table.scores[row]})
+    return [
+        {"id": g + 1, "leader": {"created_at": table.created_at[leader]}, "members": members[g]}
+        for g, leader in enumerate(leaders)
+    ]
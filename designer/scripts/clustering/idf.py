@@ -0,0 +1,113 @@
+"""
+Document frequencies for TF-IDF scoring, updated one alert at a time.
+
+The migrations call calculate_semantic_score "TF-IDF", but it (like
+simulate_logic.compute_tf_similarity) is plain Jaccard: "inteligencia"
+weighs as much as a person's name, so very common words glue unrelated
+stories together and make candidate lists long. IdfStore keeps the number
+of alerts seen and the document frequency of every token:
+
+- `vector` weights a token set by smoothed IDF, ln((1 + N) / (1 + df)) + 1
+  (binary TF: titles rarely repeat a word), and returns it with its norm so
+  callers can cache both per alert;
+- `cosine` is the weighted cosine of two such vectors;
+- `searchable` drops the tokens found in more than `max_df` of the alerts,
+  so candidate lookups and the postings built from them skip near-stopwords.
+
+Vectors are snapshots: a leader keeps the weights it had when it was
+vectorized while the statistics keep moving, which is fine for cosine and
+avoids re-weighting the whole index on every alert.
+
+The store persists to SQLite (two small tables, created by `load`); `save`
+writes only the tokens whose frequency changed since the last save.
+"""
+
+import math
+from collections import Counter
+
+DEFAULT_MAX_DF = 0.05
+# Cosine runs higher than Jaccard on the same pairs; tuned on synthetic.py
+# data (20k alerts over 60 days: ARI vs ground truth 0.999, against 0.958
+# for Jaccard at 0.14, with a quarter of the comparisons)
+TFIDF_THRESHOLD = 0.25
+# Below this many alerts the frequencies are noise: nothing counts as common yet
+MIN_DOCUMENTS = 1_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS idf_terms (
+    token TEXT PRIMARY KEY,
+    df INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS idf_state (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class IdfStore:
+    def __init__(self, max_df=DEFAULT_MAX_DF):
+        self.max_df = max_df
+        self.documents = 0
+        self.df = Counter()
+        self._dirty = set()
+
+    def add(self, token_set):
+        """Counts one alert."""
+        self.documents += 1
+        df = self.df
+        for token in token_set:
+            df[token] += 1
+        self._dirty.update(token_set)
+
+    def idf(self, token):
+        return math.log((1 + self.documents) / (1 + self.df.get(token, 0))) + 1.0
+
+    def vector(self, token_set):
+        """(token -> weight, norm) with the current statistics."""
+        weights = {token: self.idf(token) for token in token_set}
+        return weights, math.sqrt(sum(w * w for w in weights.values()))
+
+    @staticmethod
+    def cosine(a, b):
+        weights_a, norm_a = a
+        weights_b, norm_b = b
+        if not norm_a or not norm_b:
+            return 0.0
+        if len(weights_a) > len(weights_b):
+            weights_a, weights_b = weights_b, weights_a
+        dot = sum(w * weights_b[token] for token, w in weights_a.items() if token in weights_b)
+        return dot / (norm_a * norm_b)
+
+    def searchable(self, token_set):
+        """`token_set` without the near-stopwords (all of it while the store is young)."""
+        if self.documents < MIN_DOCUMENTS:
+            return token_set
+        limit = self.max_df * self.documents
+        df = self.df
+        return frozenset(token for token in token_set if df.get(token, 0) <= limit)
+
+    def most_common(self, n=20):
+        return [(token, count / max(self.documents, 1)) for token, count in self.df.most_common(n)]
+
+    # --- Persistence ---
+
+    def save(self, conn):
+        """Writes the changed frequencies (tables created by `load`); the caller commits."""
+        if self._dirty:
+            df = self.df
+            conn.executemany(
+                "INSERT OR REPLACE INTO idf_terms (token, df) VALUES (?, ?)",
+                ((token, df[token]) for token in self._dirty),
+            )
+            self._dirty.clear()
+        conn.execute("INSERT OR REPLACE INTO idf_state (key, value) VALUES ('documents', ?)", (self.documents,))
+
+    @classmethod
+    def load(cls, conn, max_df=DEFAULT_MAX_DF):
+        conn.executescript(SCHEMA)
+        store = cls(max_df)
+        row = conn.execute("SELECT value FROM idf_state WHERE key = 'documents'").fetchone()
+        store.documents = row[0] if row else 0
+        store.df.update(dict(conn.execute("SELECT token, df FROM idf_terms")))
+        return store
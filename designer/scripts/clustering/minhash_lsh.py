@@ -0,0 +1,150 @@
+"""
+MinHash + LSH banding as a candidate generator for leader clustering.
+
+Each leader is reduced to a MinHash signature of `bands * rows` values and
+filed under one bucket per band. An item is only compared (with exact
+Jaccard + time decay, in simulate_logic.py) against leaders that share at
+least one band bucket with it, so insert and query cost depend on the
+number of bands, not on the number of leaders.
+
+Two sets with Jaccard s share a bucket with probability 1 - (1 - s^r)^b.
+`optimal_params` picks (b, r) for a target threshold by minimizing the
+weighted false positive / false negative areas under that curve; the
+defaults lean towards recall because a missed candidate means a split
+cluster, while an extra candidate only costs one exact comparison.
+
+Stdlib only; numpy, when installed, just speeds up the signatures (the
+values are the same either way).
+"""
+
+import zlib
+from collections import defaultdict
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+MERSENNE_PRIME = (1 << 31) - 1
+SEED = 1
+
+
+def _integrate(f, a, b, steps=200):
+    h = (b - a) / steps
+    return sum(f(a + (i + 0.5) * h) for i in range(steps)) * h
+
+
+def collision_probability(s, bands, rows):
+    return 1.0 - (1.0 - s ** rows) ** bands
+
+
+def optimal_params(threshold, num_perm=128, fp_weight=0.2, fn_weight=0.8):
+    """(bands, rows) with bands * rows <= num_perm minimizing weighted FP + FN."""
+    best, best_cost = (num_perm, 1), float("inf")
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            fp = _integrate(lambda s: collision_probability(s, bands, rows), 0.0, threshold)
+            fn = _integrate(lambda s: 1.0 - collision_probability(s, bands, rows), threshold, 1.0)
+            cost = fp_weight * fp + fn_weight * fn
+            if cost < best_cost:
+                best, best_cost = (bands, rows), cost
+    return best
+
+
+def _permutations(num_perm, seed=SEED):
+    # Small LCG so the permutations don't depend on the `random` module version
+    state = seed
+    params = []
+    for _ in range(2 * num_perm):
+        state = (state * 48271) % MERSENNE_PRIME
+        params.append(state)
+    return params[:num_perm], params[num_perm:]
+
+
+class MinHasher:
+    """MinHash signatures with h_i(x) = (a_i * x + b_i) mod (2^31 - 1)."""
+
+    def __init__(self, num_perm, seed=SEED):
+        self.num_perm = num_perm
+        self.a, self.b = _permutations(num_perm, seed)
+        self._token_hashes = {}
+        if NUMPY_AVAILABLE:
+            self._a = np.array(self.a, dtype=np.int64)
+            self._b = np.array(self.b, dtype=np.int64)
+
+    def _token_hash(self, token):
+        value = self._token_hashes.get(token)
+        if value is None:
+            value = self._token_hashes[token] = zlib.crc32(token.encode("utf-8")) % MERSENNE_PRIME
+        return value
+
+    def signature(self, token_set):
+        if not token_set:
+            return None
+        hashes = [self._token_hash(t) for t in token_set]
+        if NUMPY_AVAILABLE:
+            x = np.array(hashes, dtype=np.int64)[:, None]
+            return ((x * self._a + self._b) % MERSENNE_PRIME).min(axis=0)
+        return [min((a * x + b) % MERSENNE_PRIME for x in hashes) for a, b in zip(self.a, self.b)]
+
+
+def band_keys(signature, bands, rows):
+    """
+    One integer per band: the band's rows folded base 2^31 plus a band
+    offset, so all bands can share one dict.
+    """
+    if NUMPY_AVAILABLE and not isinstance(signature, list):
+        if rows <= 2:
+            folded = signature.reshape(bands, rows)
+            keys = folded[:, 0].copy()
+            if rows == 2:
+                keys = keys * MERSENNE_PRIME + folded[:, 1]
+            return [(band << (31 * rows)) | int(k) for band, k in enumerate(keys.tolist())]
+        signature = signature.tolist()
+    keys = []
+    for band in range(bands):
+        key = 0
+        for value in signature[band * rows:(band + 1) * rows]:
+            key = key * MERSENNE_PRIME + value
+        keys.append((band << (31 * rows)) | key)
+    return keys
+
+
+class MinHashLSH:
+    """
+    LSH band index over leader token sets. Same interface as
+    simulate_logic.LeaderIndex: add(group_idx, token_set, time) and
+    candidates(token_set, time) -> sorted group indices (time is ignored).
+    """
+
+    def __init__(self, threshold, num_perm=128, bands=None, rows=None):
+        if bands is None or rows is None:
+            bands, rows = optimal_params(threshold, num_perm)
+        self.bands = bands
+        self.rows = rows
+        self.hasher = MinHasher(bands * rows)
+        self.buckets = defaultdict(list)  # band key -> [group idx, ...]
+        self._last = (None, None)  # a new leader is always the item just queried
+
+    def _band_keys(self, token_set):
+        if self._last[0] is token_set:
+            return self._last[1]
+        signature = self.hasher.signature(token_set)
+        keys = [] if signature is None else band_keys(signature, self.bands, self.rows)
+        self._last = (token_set, keys)
+        return keys
+
+    def add(self, group_idx, token_set, time=None):
+        buckets = self.buckets
+        for key in self._band_keys(token_set):
+            buckets[key].append(group_idx)
+
+    def candidates(self, token_set, time=None):
+        found = set()
+        get = self.buckets.get
+        for key in self._band_keys(token_set):
+            members = get(key)
+            if members:
+                found.update(members)
+        return sorted(found)
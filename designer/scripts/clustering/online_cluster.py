@@ -0,0 +1,273 @@
+"""
+Online leader clustering with state on disk.
+
+Alerts are assigned one at a time, in arrival order: each new alert is
+scored (Jaccard + time decay, same as simulate_logic.py) against the
+leaders created in the last `window_hours` (120h = the 5-day candidate
+window of assign_or_create_group_v2) and joins the best group above the
+threshold, or becomes the leader of a new one.
+
+The leaders inside the window live in memory (tokens, epoch, group id and
+a token -> leaders index) and are written through to SQLite, so a restart
+reloads only the window. Leaders that fall out of the window are evicted
+from both, which keeps each assign call proportional to the window, not to
+the whole history.
+
+Every assignment is logged in `assignments`, so an alert fed twice gets
+the same group back. The log is pruned with the window: assignments older
+than `retention_hours` (default: the window) behind the watermark are
+deleted; retention_hours=None keeps it as an append-only log.
+
+Alerts whose created_at is missing or doesn't parse are placed at the
+watermark (the newest time seen), like the 0h gap simulate_logic gives them.
+
+With scoring="tfidf" the score is the IDF-weighted cosine of idf.py; the
+document frequencies are updated with every alert and saved in the same
+SQLite file, and near-stopword tokens are left out of the postings.
+
+Usage:
+    python online_cluster.py data/sample.json --db .cache/clusters.sqlite3
+"""
+
+import argparse
+import heapq
+import json
+import os
+import sqlite3
+from collections import defaultdict
+
+from idf import IdfStore, TFIDF_THRESHOLD
+from simulate_logic import THRESHOLD, apply_time_decay, clean_text
+from timestamps import INVALID, parse_time
+
+DEFAULT_WINDOW_HOURS = 5 * 24
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leaders (
+    group_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    alert_id TEXT NOT NULL,
+    created_epoch REAL NOT NULL,
+    tokens TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_leaders_created_epoch ON leaders(created_epoch);
+CREATE TABLE IF NOT EXISTS assignments (
+    alert_id TEXT PRIMARY KEY,
+    group_id INTEGER NOT NULL,
+    score REAL NOT NULL,
+    created_epoch REAL
+);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+
+def to_epoch(date_str):
+    """ISO string -> epoch seconds (naive dates are taken as UTC), None if it doesn't parse."""
+    kind, epoch_us = parse_time(date_str)
+    if kind == INVALID:
+        return None
+    return epoch_us / 10**6
+
+
+class OnlineClusterer:
+    def __init__(self, path, window_hours=DEFAULT_WINDOW_HOURS, threshold=None, scoring="jaccard",
+                 retention_hours=DEFAULT_WINDOW_HOURS):
+        if scoring not in ("jaccard", "tfidf"):
+            raise ValueError(f"unknown scoring: {scoring}")
+        self.window_seconds = window_hours * 3600.0
+        self.retention_seconds = None if retention_hours is None else retention_hours * 3600.0
+        if threshold is None:
+            threshold = TFIDF_THRESHOLD if scoring == "tfidf" else THRESHOLD
+        self.threshold = threshold
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(assignments)")}
+        if "created_epoch" not in columns:
+            # Files from before the retention: their old rows stay until deleted by hand
+            self.conn.execute("ALTER TABLE assignments ADD COLUMN created_epoch REAL")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_assignments_created_epoch ON assignments(created_epoch)")
+        self.idf = IdfStore.load(self.conn) if scoring == "tfidf" else None
+
+        row = self.conn.execute("SELECT value FROM state WHERE key = 'watermark'").fetchone()
+        # Newest timestamp seen so far; the window is relative to it, not to the wall clock
+        self.watermark = row[0] if row else float("-inf")
+        self._pruned_until = float("-inf")
+
+        self.leaders = {}                  # group_id -> (created_epoch, token_set)
+        self.vectors = {}                  # group_id -> IDF vector (tfidf scoring)
+        self.postings = defaultdict(set)   # token -> {group_id, ...}
+        self.expiry = []                   # heap of (created_epoch, group_id)
+        for group_id, epoch, tokens in self.conn.execute(
+            "SELECT group_id, created_epoch, tokens FROM leaders WHERE created_epoch >= ?",
+            (self.watermark - self.window_seconds,),
+        ):
+            self._index(group_id, epoch, frozenset(tokens.split()))
+
+    def _index(self, group_id, epoch, token_set):
+        self.leaders[group_id] = (epoch, token_set)
+        heapq.heappush(self.expiry, (epoch, group_id))
+        if self.idf is not None:
+            self.vectors[group_id] = self.idf.vector(token_set)
+            token_set = self.idf.searchable(token_set)
+        for token in token_set:
+            self.postings[token].add(group_id)
+
+    def _unindex(self, group_id):
+        _, token_set = self.leaders.pop(group_id)
+        self.vectors.pop(group_id, None)
+        for token in token_set:
+            members = self.postings.get(token)
+            if members is None:
+                continue  # common token, never indexed
+            members.discard(group_id)
+            if not members:
+                del self.postings[token]
+
+    def evict(self):
+        """Drops leaders older than the window (memory and disk)."""
+        cutoff = self.watermark - self.window_seconds
+        expired = 0
+        while self.expiry and self.expiry[0][0] < cutoff:
+            _, group_id = heapq.heappop(self.expiry)
+            self._unindex(group_id)
+            expired += 1
+        if expired:
+            self.conn.execute("DELETE FROM leaders WHERE created_epoch < ?", (cutoff,))
+        self.prune_assignments()
+        return expired
+
+    def prune_assignments(self):
+        """Deletes assignments older than the retention (at most once per hour of watermark)."""
+        if self.retention_seconds is None:
+            return 0
+        cutoff = self.watermark - self.retention_seconds
+        if cutoff < self._pruned_until + 3600.0:
+            return 0
+        self._pruned_until = cutoff
+        return self.conn.execute("DELETE FROM assignments WHERE created_epoch < ?", (cutoff,)).rowcount
+
+    def assign(self, alert, commit=True):
+        """
+        Assigns one alert ({id, title, description, created_at}).
+        Returns (group_id, score, is_new_group); an alert seen before gets
+        its stored assignment back.
+        """
+        row = self.conn.execute(
+            "SELECT group_id, score FROM assignments WHERE alert_id = ?", (alert["id"],)
+        ).fetchone()
+        if row:
+            return row[0], row[1], False
+
+        epoch = to_epoch(alert.get("created_at"))
+        dated = epoch is not None
+        if not dated:
+            epoch = self.watermark if self.watermark != float("-inf") else 0.0
+        token_set = frozenset(clean_text(alert["title"] + " " + (alert.get("description") or "")))
+        cutoff = epoch - self.window_seconds
+        lookup_set = token_set
+        if self.idf is not None:
+            self.idf.add(token_set)
+            vector = self.idf.vector(token_set)
+            lookup_set = self.idf.searchable(token_set)
+
+        candidates = set()
+        for token in lookup_set:
+            candidates.update(self.postings.get(token, ()))
+
+        best_group, best_score = None, -1.0
+        for group_id in sorted(candidates):
+            leader_epoch, leader_set = self.leaders[group_id]
+            if leader_epoch < cutoff or leader_epoch > epoch + self.window_seconds:
+                continue
+            if self.idf is not None:
+                sem_score = self.idf.cosine(vector, self.vectors[group_id])
+            else:
+                intersection = len(token_set & leader_set)
+                sem_score = intersection / (len(token_set) + len(leader_set) - intersection)
+            final_score = apply_time_decay(sem_score, abs(epoch - leader_epoch) / 3600.0)
+            if final_score > self.threshold and final_score > best_score:
+                best_group, best_score = group_id, final_score
+
+        is_new = best_group is None
+        if is_new:
+            cursor = self.conn.execute(
+                "INSERT INTO leaders (alert_id, created_epoch, tokens) VALUES (?, ?, ?)",
+                (alert["id"], epoch, " ".join(sorted(token_set))),
+            )
+            best_group, best_score = cursor.lastrowid, 1.0
+            self._index(best_group, epoch, token_set)
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO assignments (alert_id, group_id, score, created_epoch) VALUES (?, ?, ?, ?)",
+            (alert["id"], best_group, best_score, epoch),
+        )
+
+        if dated and epoch > self.watermark:
+            self.watermark = epoch
+            self.conn.execute(
+                "INSERT OR REPLACE INTO state (key, value) VALUES ('watermark', ?)", (epoch,)
+            )
+            self.evict()
+
+        if commit:
+            self._commit()
+        return best_group, best_score, is_new
+
+    def assign_many(self, alerts):
+        """Assigns a batch in created_at order (undated alerts last) with a single commit."""
+
+        def order(alert):
+            epoch = to_epoch(alert.get("created_at"))
+            return (epoch is None, epoch or 0.0)
+
+        results = {}
+        for alert in sorted(alerts, key=order):
+            results[alert["id"]] = self.assign(alert, commit=False)
+        self._commit()
+        return results
+
+    def _commit(self):
+        if self.idf is not None:
+            self.idf.save(self.conn)
+        self.conn.commit()
+
+    def close(self):
+        self._commit()
+        self.conn.close()
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Feed alerts to the persistent online clusterer.")
+    parser.add_argument("file", nargs="?", default=os.path.join(script_dir, "data", "sample.json"))
+    parser.add_argument("--db", default=os.path.join(script_dir, "..", ".cache", "clusters.sqlite3"))
+    parser.add_argument("--window-hours", type=float, default=DEFAULT_WINDOW_HOURS)
+    parser.add_argument("--retention-hours", type=float, default=DEFAULT_WINDOW_HOURS,
+                        help="how long assignments are kept behind the watermark (0 keeps them all)")
+    parser.add_argument("--tfidf", action="store_true", help="IDF-weighted cosine instead of Jaccard")
+    args = parser.parse_args()
+
+    with open(args.file, 'r') as f:
+        alerts = json.load(f)
+
+    clusterer = OnlineClusterer(args.db, window_hours=args.window_hours,
+                                scoring="tfidf" if args.tfidf else "jaccard",
+                                retention_hours=args.retention_hours or None)
+    results = clusterer.assign_many(alerts)
+    titles = {a["id"]: a["title"] for a in alerts}
+    for alert_id, (group_id, score, is_new) in results.items():
+        marker = "NEW " if is_new else "    "
+        print(f"{marker}#{group_id} [{score:.2f}] {titles[alert_id][:90]}")
+    print(f"\n{len(results)} alerts assigned, {len(clusterer.leaders)} leaders in the window.")
+    clusterer.close()
+
+if __name__ == "__main__":
+    main()
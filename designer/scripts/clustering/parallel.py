@@ -0,0 +1,158 @@
+"""
+Experimental multi-core leader clustering: time shards with an overlapping
+halo. Approximate, so it is not one of the simulate_logic.cluster
+backends; benchmark.py runs it as "parallel" and reports its agreement.
+
+The alerts, newest first as in simulate_logic.cluster, are cut into
+contiguous time shards of equal size. A leader can only attract items
+within max_reachable_hours(threshold) of it, so an item only depends on
+the alerts of that window. Each shard is clustered in a process pool
+together with its halo: the alerts of the newer shards that fall within
+`halo_hours` of it. The halo is clustered again but only used to seed the
+leaders the shard's items would have seen sequentially.
+
+The boundary merge is then a linear pass, newest shard first: a shard group
+led by one of the shard's own items becomes a new global group, and a shard
+group led by a halo alert joins the global group that alert ended up in.
+
+The result is deterministic (the cuts depend only on the input, results are
+consumed in shard order). It is not exact: the halo's oldest alerts are
+clustered without their own predecessors, so its leaders can differ from
+the sequential ones, and that difference keeps propagating through the
+shard (re-deciding the shard against the true halo leaders until the
+results agree again turned out to redo most of the shard, no faster than
+the sequential run). The agreement is the ARI against the sequential
+"index" backend; MIN_ARI is the lowest this module accepts, checked by
+test_backends.py.
+
+The halo adds about halo / shard span of extra work per shard, so the
+split only pays off when every shard spans several halos. The number of
+shards is capped so that each one spans at least MIN_SPANS_PER_HALO halos
+(and holds MIN_SHARD_SIZE alerts); when the history is too short for two
+such shards it runs sequentially.
+
+Measured on synthetic.py data (~2000 alerts/day, threshold 0.14, halo
+221h), forcing the shard count, on one core (time against the sequential
+backend; with a core per shard the expected speedup is
+shards x sequential / one-core time):
+
+    alerts   span   shards  shard span   ARI      1-core time   expected speedup
+    4k       72h    4       18h          1.0000   2.30x         1.7x  (halo covers everything)
+    20k      240h   2       120h         1.0000   1.82x         1.1x
+    60k      720h   2       360h         0.9757   1.23x         1.6x
+    60k      720h   8       90h          0.9604   2.97x         2.7x
+    120k     1440h  2       720h         0.9953   1.10x         1.8x
+    120k     1440h  4       360h         0.9862   1.65x         2.4x
+    120k     1440h  8       180h         0.9751   2.05x         3.9x
+
+With the cap, the 4k, 20k and 60k runs above stay sequential and 120k is
+cut into at most 3 shards.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from simulate_logic import THRESHOLD, cluster
+from timestamps import comparable, hours_between, max_reachable_hours
+
+# Lowest ARI against the sequential backend: the worst measured run above is 0.96
+MIN_ARI = 0.95
+# Below this many alerts per shard the process overhead outweighs the split
+MIN_SHARD_SIZE = 1_000
+# A shard must span at least this many halos: with less, each shard
+# reclusters more of its newer neighbour than half of itself
+MIN_SPANS_PER_HALO = 2.0
+
+
+def _cluster_shard(items, threshold):
+    """Run over halo + shard: (leader offset, score) per item, in order."""
+    stats = {}
+    groups = cluster(items, threshold=threshold, debug=False, stats=stats)
+    offset = {id(item): i for i, item in enumerate(items)}
+    seen = [0] * len(groups)
+    result = []
+    for item in items:
+        g = item["assigned_group"] - 1
+        result.append((offset[id(groups[g]["leader"])], groups[g]["members"][seen[g]]["score"]))
+        seen[g] += 1
+    return result, stats["comparisons"]
+
+
+def _halo_start(alerts, start, window_us):
+    """First position of the newer alerts within window_us of alerts[start]."""
+    newest = alerts[start]["time"]
+    p = start
+    while p > 0:
+        previous = alerts[p - 1]["time"]
+        if comparable(previous, newest) and previous[1] - newest[1] > window_us:
+            break
+        p -= 1
+    return p
+
+
+def max_shards(alerts, halo_hours):
+    """
+    Most shards the history can be cut into with each one spanning
+    MIN_SPANS_PER_HALO halos and holding MIN_SHARD_SIZE alerts.
+    `alerts` newest first.
+    """
+    n = len(alerts)
+    if n < 2 * MIN_SHARD_SIZE:
+        return 1
+    newest, oldest = alerts[0]["time"], alerts[-1]["time"]
+    if not comparable(newest, oldest) or halo_hours <= 0:
+        return 1
+    span_hours = hours_between(newest, oldest)
+    by_span = int(span_hours // (MIN_SPANS_PER_HALO * halo_hours))
+    return max(1, min(n // MIN_SHARD_SIZE, by_span))
+
+
+def cluster_parallel(processed_alerts, threshold=THRESHOLD, workers=None, shards=None, halo_hours=None,
+                     stats=None):
+    """
+    Same contract as simulate_logic.cluster (sets item["assigned_group"],
+    returns the group list) with `workers` processes and `shards` time
+    shards (default: one per worker, capped by max_shards). `halo_hours`
+    defaults to the widest gap a match can span.
+    """
+    workers = workers or os.cpu_count() or 1
+    processed_alerts.sort(key=lambda x: x["created_at"], reverse=True)
+    n = len(processed_alerts)
+    if halo_hours is None:
+        halo_hours = max_reachable_hours(threshold)
+    shards = min(shards or workers, max_shards(processed_alerts, halo_hours))
+    if shards <= 1:
+        return cluster(processed_alerts, threshold=threshold, debug=False, stats=stats)
+
+    window_us = halo_hours * 3600 * 10**6
+    bounds = [n * s // shards for s in range(shards + 1)]
+    starts = [0] + [_halo_start(processed_alerts, bounds[s], window_us) for s in range(1, shards)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        runs = list(pool.map(
+            _cluster_shard,
+            [processed_alerts[starts[s]:bounds[s + 1]] for s in range(shards)],
+            [threshold] * shards,
+        ))
+
+    # Boundary merge, newest shard first
+    final = [0] * n  # global group number per position
+    groups = []
+    for s, (result, _) in enumerate(runs):
+        for position in range(bounds[s], bounds[s + 1]):
+            leader_offset, score = result[position - starts[s]]
+            leader_position = starts[s] + leader_offset
+            item = processed_alerts[position]
+            if leader_position == position:
+                groups.append({"id": len(groups) + 1, "leader": item, "members": []})
+                group = len(groups)
+            else:
+                # Leader is earlier in this shard or in the halo: already placed
+                group = final[leader_position]
+            final[position] = group
+            item["assigned_group"] = group
+            groups[group - 1]["members"].append({"title": item["original_title"], "score": score})
+
+    if stats is not None:
+        stats["comparisons"] = stats.get("comparisons", 0) + sum(c for _, c in runs)
+    return groups
@@ -0,0 +1,400 @@
+"""
+Offline bulk re-clustering with the rules of assign_or_create_group_v2.
+
+Replays the whole alerts table in created_at order, in memory, instead of
+re-firing the trigger row by row:
+
+1. canonical URL match (public.clean_url): join the group of an earlier
+   alert with the same URL;
+2. candidates: earlier alerts from the last 5 days whose title passes the
+   pg_trgm `%` prefilter (similarity >= 0.1), newest first, LIMIT 20;
+3. score: calculate_semantic_score = (title Jaccard * 0.8 + description
+   Jaccard * 0.2) * 1 / (1 + h / 36), on ts_parse tokens minus
+   custom_stopwords, length > 2, titles passed through clean_title;
+4. best candidate above 0.15 wins: join its group, or seed a new group
+   with both alerts; otherwise the alert stays ungrouped.
+
+The SQL window is `now() - 5 days`; at insert time now() is the alert's
+created_at, so the replay uses created_at - 5 days. Where SQL picks an
+arbitrary row (URL match LIMIT 1, created_at ties) the replay picks the
+earliest / the last processed one, so runs are deterministic. ts_parse and
+pg_trgm are reimplemented in Python (words, numbers, hyphenated compounds
+and their parts; pg_trgm word padding), which covers news titles but not
+every ts_parse token type.
+
+Group ids already in the table are reused (the id most members had), so
+only rows whose group actually changed are written, in batches, through
+public.set_alert_duplicate_groups (migration 20260202060000).
+
+Usage:
+    python recluster.py                         # dry run against Supabase
+    python recluster.py --apply                 # write the changes back
+    python recluster.py --input export.json     # offline, from a JSON export
+    DATABASE_URL=postgres://... python recluster.py --apply   # stream via psycopg
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+from simulate_logic import apply_time_decay
+
+THRESHOLD = 0.15
+WINDOW_HOURS = 5 * 24
+TRGM_THRESHOLD = 0.1
+CANDIDATE_LIMIT = 20
+TITLE_WEIGHT = 0.8
+DESCRIPTION_WEIGHT = 0.2
+
+# Copy of public.custom_stopwords (migration 20260201010000); replaced by the
+# table contents when reading from the database
+SQL_STOPWORDS = frozenset("""
+a o as os um uma uns umas de do da dos das em no na nos nas por pelo pela pelos pelas para
+com sem e ou se como mas que foi foram é são ser estar ter haver sobre entre até após durante
+the of and in to for on with at by from up about into over after is are was were be been being
+have has had do does did but if or because as until while against between through during before
+above below down out off under again further then once here there when where why how all any
+both each few more most other some such no nor not only own same so than too very s t can will
+just don should now times union journal post news daily gazette herald tribune
+""".split())
+
+_CLEAN_TITLE_RE = re.compile(r' [\-\|] [^\-\|]+$')
+# ts_parse('default'): hyphenated compounds (plus their parts), decimals/versions, plain words
+_TS_TOKEN_RE = re.compile(r'\w+(?:-\w+)+|\d+(?:\.\d+)+|\w+')
+_TRGM_WORD_RE = re.compile(r'[^\W_]+')
+
+
+# --- SQL ports ---
+
+def sql_clean_url(url):
+    """public.clean_url (migration 20260201010500)."""
+    if url is None:
+        return None
+    if re.search(r'google\.com/url\?', url, re.IGNORECASE):
+        match = re.search(r'q=([^&]+)', url) or re.search(r'url=([^&]+)', url)
+        if match:
+            url = match.group(1)
+    url = url.strip().lower()
+    url = re.sub(r'\?.*$', '', url)
+    url = re.sub(r'/+$', '', url)
+    return url.replace('%3a', ':').replace('%2f', '/')
+
+
+def sql_clean_title(title):
+    if not title:
+        return ''
+    return _CLEAN_TITLE_RE.sub('', title).strip()
+
+
+def ts_tokens(text, stopwords):
+    if not text:
+        return frozenset()
+    tokens = set()
+    for match in _TS_TOKEN_RE.findall(text.lower()):
+        parts = [match]
+        if '-' in match:
+            parts += match.split('-')
+        for token in parts:
+            if len(token) > 2 and token not in stopwords:
+                tokens.add(token)
+    return frozenset(tokens)
+
+
+def trigrams(text):
+    """pg_trgm: lowercase words padded with two spaces before and one after."""
+    result = set()
+    for word in _TRGM_WORD_RE.findall((text or '').lower()):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            result.add(padded[i:i + 3])
+    return frozenset(result)
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 0.0
+    intersection = len(a & b)
+    return intersection / (len(a) + len(b) - intersection)
+
+
+# --- Replay ---
+
+class Alert:
+    __slots__ = ("id", "epoch", "clean_url", "trigrams", "title_tokens", "desc_tokens",
+                 "group", "is_duplicate", "old_group", "old_is_duplicate")
+
+    def __init__(self, row, stopwords):
+        self.id = row["id"]
+        self.epoch = to_epoch(row["created_at"])
+        self.clean_url = sql_clean_url(row.get("url"))
+        self.trigrams = trigrams(row["title"])
+        self.title_tokens = ts_tokens(sql_clean_title(row["title"]), stopwords)
+        self.desc_tokens = ts_tokens(row.get("description"), stopwords)
+        self.group = None
+        self.is_duplicate = False
+        self.old_group = row.get("duplicate_group_id")
+        self.old_is_duplicate = bool(row.get("is_duplicate"))
+
+    def forget_features(self):
+        # Out of the window: only ids and groups are needed from here on
+        self.trigrams = self.title_tokens = self.desc_tokens = None
+
+
+def to_epoch(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def semantic_score(a, b):
+    raw = jaccard(a.title_tokens, b.title_tokens) * TITLE_WEIGHT + jaccard(a.desc_tokens, b.desc_tokens) * DESCRIPTION_WEIGHT
+    return apply_time_decay(raw, abs(a.epoch - b.epoch) / 3600.0)
+
+
+def recluster(rows, stopwords=SQL_STOPWORDS, threshold=THRESHOLD, window_hours=WINDOW_HOURS,
+              trgm_threshold=TRGM_THRESHOLD, candidate_limit=CANDIDATE_LIMIT, stats=None):
+    """
+    Replays `rows` (dicts with id, title, description, url, created_at and
+    optionally duplicate_group_id / is_duplicate) in the order given, which
+    must be created_at ascending. Returns the list of Alert with `group` set
+    to an integer cluster key (or None).
+    """
+    window_seconds = window_hours * 3600.0
+    alerts = []
+    window = deque()
+    first_by_url = {}
+    next_group = 0
+    comparisons = 0
+
+    for row in rows:
+        alert = Alert(row, stopwords)
+        alerts.append(alert)
+
+        while window and window[0].epoch <= alert.epoch - window_seconds:
+            window.popleft().forget_features()
+
+        # 1. Exact match on the canonical URL
+        # (LIMIT 1 -> the earliest alert with that URL, with its group as of now)
+        first = first_by_url.get(alert.clean_url) if alert.clean_url else None
+        group = first.group if first is not None else None
+        if group is not None:
+            alert.group, alert.is_duplicate = group, True
+        else:
+            # 2. Trigram prefilter, newest first, LIMIT 20
+            best, best_score = None, 0.0
+            found = 0
+            for candidate in reversed(window):
+                if candidate.epoch >= alert.epoch:
+                    continue
+                if jaccard(alert.trigrams, candidate.trigrams) < trgm_threshold:
+                    continue
+                # 3. Semantic score + decay
+                comparisons += 1
+                score = semantic_score(alert, candidate)
+                if score > threshold and score > best_score:
+                    best, best_score = candidate, score
+                found += 1
+                if found >= candidate_limit:
+                    break
+
+            # 4. Join or seed a group
+            if best is not None:
+                if best.group is None:
+                    best.group = next_group
+                    next_group += 1
+                alert.group, alert.is_duplicate = best.group, True
+
+        if alert.clean_url:
+            first_by_url.setdefault(alert.clean_url, alert)
+        window.append(alert)
+
+    if stats is not None:
+        stats["comparisons"] = comparisons
+        stats["groups"] = next_group
+    return alerts
+
+
+def assign_group_ids(alerts):
+    """
+    Integer cluster keys -> UUIDs, reusing the id most members already had
+    (each existing id at most once) so unchanged clusters produce no writes.
+    """
+    votes = {}
+    for alert in alerts:
+        if alert.group is not None and alert.old_group:
+            votes.setdefault(alert.group, Counter())[alert.old_group] += 1
+
+    ids, taken = {}, set()
+    # Biggest agreements first, so a split cluster keeps its id on the larger side
+    ranked = sorted(
+        ((count, key, old) for key, counter in votes.items() for old, count in counter.items()),
+        key=lambda t: (-t[0], t[1], t[2]),
+    )
+    for _, key, old in ranked:
+        if key not in ids and old not in taken:
+            ids[key] = old
+            taken.add(old)
+
+    for alert in alerts:
+        if alert.group is not None:
+            if alert.group not in ids:
+                ids[alert.group] = str(uuid.uuid4())
+            alert.group = ids[alert.group]
+    return alerts
+
+
+def changes(alerts):
+    for alert in alerts:
+        if alert.group != alert.old_group or alert.is_duplicate != alert.old_is_duplicate:
+            yield {"alert_id": alert.id, "group_id": alert.group, "is_duplicate": alert.is_duplicate}
+
+
+# --- Export / write-back ---
+
+EXPORT_COLUMNS = "id, title, description, url, created_at, duplicate_group_id, is_duplicate"
+
+
+def stream_from_file(path):
+    with open(path) as f:
+        rows = json.load(f)
+    rows.sort(key=lambda r: (to_epoch(r["created_at"]), r["id"]))
+    return rows
+
+
+def stream_from_postgres(conn, page_size=5000):
+    """Server-side cursor: one ordered scan, page_size rows in memory at a time."""
+    with conn.cursor(name="recluster_export") as cur:
+        cur.itersize = page_size
+        cur.execute(f"SELECT {EXPORT_COLUMNS} FROM public.alerts ORDER BY created_at, id")
+        names = [d[0] for d in cur.description]
+        for values in cur:
+            row = dict(zip(names, values))
+            row["id"] = str(row["id"])
+            if row["duplicate_group_id"] is not None:
+                row["duplicate_group_id"] = str(row["duplicate_group_id"])
+            yield row
+
+
+def stream_from_supabase(client, page_size=1000):
+    """Keyset pagination on (created_at, id) through PostgREST."""
+    last = None
+    while True:
+        query = client.table("alerts").select(EXPORT_COLUMNS).order("created_at").order("id").limit(page_size)
+        if last:
+            ts, alert_id = last
+            query = query.or_(f'created_at.gt."{ts}",and(created_at.eq."{ts}",id.gt.{alert_id})')
+        page = query.execute().data or []
+        yield from page
+        if len(page) < page_size:
+            return
+        last = (page[-1]["created_at"], page[-1]["id"])
+
+
+def load_stopwords(client=None, conn=None):
+    try:
+        if conn is not None:
+            with conn.cursor() as cur:
+                cur.execute("SELECT word FROM public.custom_stopwords")
+                words = [r[0] for r in cur.fetchall()]
+        elif client is not None:
+            words = [r["word"] for r in client.table("custom_stopwords").select("word").execute().data]
+        else:
+            return SQL_STOPWORDS
+    except Exception as e:
+        print(f"⚠️ custom_stopwords indisponível ({e}); usando a cópia local.")
+        return SQL_STOPWORDS
+    return frozenset(w.lower() for w in words) or SQL_STOPWORDS
+
+
+def write_back(items, client=None, conn=None, batch_size=1000):
+    written = 0
+    batch = []
+
+    def flush():
+        nonlocal written
+        if not batch:
+            return
+        if conn is not None:
+            with conn.cursor() as cur:
+                cur.execute("SELECT public.set_alert_duplicate_groups(%s::jsonb)", (json.dumps(batch),))
+            conn.commit()
+        else:
+            client.rpc("set_alert_duplicate_groups", {"p_items": batch}).execute()
+        written += len(batch)
+        print(f"💾 {written} alertas atualizados")
+        batch.clear()
+
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return written
+
+
+def _connect():
+    """(supabase client, psycopg connection); either may be None."""
+    dsn = os.getenv("DATABASE_URL")
+    if dsn:
+        try:
+            import psycopg
+            return None, psycopg.connect(dsn)
+        except ImportError:
+            print("⚠️ psycopg não instalado; usando o PostgREST.")
+    from dotenv import load_dotenv
+    from supabase import create_client
+    load_dotenv()
+    url, key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        print("Error: SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY (or DATABASE_URL) not set.")
+        sys.exit(1)
+    return create_client(url, key), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-cluster all alerts with the assign_or_create_group_v2 rules.")
+    parser.add_argument("--input", help="JSON export instead of the database (implies a dry run)")
+    parser.add_argument("--apply", action="store_true", help="write duplicate_group_id / is_duplicate back")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--window-hours", type=float, default=WINDOW_HOURS)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    client = conn = None
+    if args.input:
+        rows = stream_from_file(args.input)
+        stopwords = SQL_STOPWORDS
+    else:
+        client, conn = _connect()
+        stopwords = load_stopwords(client, conn)
+        rows = stream_from_postgres(conn) if conn is not None else stream_from_supabase(client)
+
+    stats = {}
+    start = time.perf_counter()
+    alerts = assign_group_ids(recluster(rows, stopwords, args.threshold, args.window_hours, stats=stats))
+    elapsed = time.perf_counter() - start
+
+    pending = list(changes(alerts))
+    grouped = sum(1 for a in alerts if a.group is not None)
+    print(f"🧮 {len(alerts)} alertas em {elapsed:.1f}s: {stats['groups']} grupos, "
+          f"{grouped} alertas agrupados, {stats['comparisons']} comparações.")
+    print(f"✏️ {len(pending)} alertas mudariam de grupo.")
+
+    if args.apply and not args.input:
+        write_back(pending, client, conn, args.batch_size)
+    elif args.apply:
+        print("--apply ignorado com --input.")
+
+    if conn is not None:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
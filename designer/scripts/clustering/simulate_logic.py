@@ -1,38 +1,21 @@
+import argparse
+import bisect
 import json
-import re
-import math
-from collections import Counter
-from datetime import datetime
+from collections import defaultdict
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from curator import tokenizer
+from timestamps import INVALID, NAIVE, AWARE, hours_between, max_reachable_hours, parse_time
 
 # --- 1. Configuration & Constants ---
-STOPWORDS = set([
-    "a", "o", "as", "os", "um", "uma", "uns", "umas", "de", "do", "da", "dos", "das", 
-    "em", "no", "na", "nos", "nas", "por", "pelo", "pela", "pelos", "pelas", "para", 
-    "com", "sem", "e", "ou", "se", "como", "mas", "que", "foi", "foram", "é", "são", 
-    "ser", "estar", "ter", "haver", "sobre", "entre", "até", "após", "durante", 
-    "-", "|", "&", "times", "union", "journal", "blooberg", "reuters", "cnn", 
-    "the", "of", "and", "in", "to", "for", "on", "with", "at", "by", "from", "up", "about", 
-    "into", "over", "after"
-])
+# Shared tokenizer (designer/scripts/curator/tokenizer.py): same tokens as the analysis scripts
+STOPWORDS = tokenizer.STOPWORDS
 
 def clean_text(text):
-    if not text: return ""
-    # Remove source suffixes often found in Google News titles (e.g. " - Name of Source")
-    text = re.sub(r' - [^-]+$', '', text) 
-    text = re.sub(r' \| [^|]+$', '', text)
-    
-    # Lowercase and remove punctuation
-    text = text.lower()
-    text = re.sub(r'[^\w\s]', ' ', text)
-    
-    # Tokenize
-    tokens = text.split()
-    
-    # Remove stopwords
-    clean_tokens = [t for t in tokens if t not in STOPWORDS and len(t) > 2]
-    
-    return clean_tokens
+    # Drops the " - Source" / " | Source" suffix, punctuation, accents, stopwords and tokens of <= 2 chars
+    return list(tokenizer.tokenize(text, strip_source_suffix=True))
 
 def compute_tf_similarity(tokens1, tokens2):
     if not tokens1 or not tokens2: 
@@ -49,116 +32,287 @@ def compute_tf_similarity(tokens1, tokens2):
     # Jaccard Similarity on "Bag of Words" model
     return intersection / union
 
-def get_hours_diff(date_str1, date_str2):
-    try:
-        # Parse ISO strings. 
-        # Note: Python < 3.7 might struggle with 'Z', assuming robust ISO parsing or removing Z
-        d1 = datetime.fromisoformat(date_str1.replace('Z', '+00:00'))
-        d2 = datetime.fromisoformat(date_str2.replace('Z', '+00:00'))
-        diff = abs((d1 - d2).total_seconds()) / 3600.0
-        return diff
-    except Exception as e:
-        return 0.0 # Fallback: assume same time if parse fails
-
 def apply_time_decay(score, hours_diff):
         # Decay formula: 1 / (1 + hours/36)
         # Using 36h half-life to be less aggressive with slightly older but relevant news
         decay = 1.0 / (1.0 + (hours_diff / 36.0))
         return score * decay
 
+THRESHOLD = 0.14 # Lowered based on debug results
+
+class LeaderIndex:
+    """
+    Inverted index token -> leaders. Only leaders sharing at least one token
+    can score above zero, so those are the only ones worth comparing.
+
+    With `max_hours`, each posting list is kept sorted by time and only the
+    leaders within max_hours of the item are returned (bisect on the list).
+    Leaders whose gap hours_between can't compute (unparseable date, or
+    naive vs aware) count as 0h away and are always returned.
+    """
+
+    def __init__(self, max_hours=None):
+        # Margin so float rounding at the boundary can never prune a match
+        self.window_us = None if max_hours is None else int(max_hours * 3600 * 10**6 * (1 + 1e-9)) + 1
+        self.timed = {NAIVE: {}, AWARE: {}}  # kind -> token -> ([-epoch_us, ...], [group idx, ...])
+        self.untimed = defaultdict(list)     # token -> [group idx, ...]
+
+    def add(self, group_idx, token_set, time=(INVALID, 0)):
+        kind, epoch_us = time
+        if kind == INVALID:
+            for token in token_set:
+                self.untimed[token].append(group_idx)
+            return
+        postings = self.timed[kind]
+        # Negated so the newest-first scan appends at the end
+        key = -epoch_us
+        for token in token_set:
+            entry = postings.get(token)
+            if entry is None:
+                postings[token] = ([key], [group_idx])
+                continue
+            keys, groups = entry
+            pos = bisect.bisect_right(keys, key)
+            keys.insert(pos, key)
+            groups.insert(pos, group_idx)
+
+    def candidates(self, token_set, time=(INVALID, 0)):
+        kind, epoch_us = time
+        window = self.window_us
+        found = set()
+        for token in token_set:
+            for leader_kind, postings in self.timed.items():
+                entry = postings.get(token)
+                if entry is None:
+                    continue
+                keys, groups = entry
+                if window is None or leader_kind != kind:
+                    found.update(groups)
+                else:
+                    lo = bisect.bisect_left(keys, -(epoch_us + window))
+                    hi = bisect.bisect_right(keys, -(epoch_us - window))
+                    found.update(groups[lo:hi])
+            found.update(self.untimed.get(token, ()))
+        # Sorted so ties resolve to the oldest group, as in the full scan
+        return sorted(found)
+
 # --- 2. Load Data ---
-# Use relative path from the script location
-script_dir = os.path.dirname(os.path.abspath(__file__))
-file_path = os.path.join(script_dir, "data", "sample.json")
-
-if not os.path.exists(file_path):
-    print(f"Error: {file_path} not found.")
-    exit(1)
-
-with open(file_path, 'r') as f:
-    alerts = json.load(f)
-
-# Preprocess
-processed_alerts = []
-for a in alerts:
-    processed_alerts.append({
-        "id": a["id"],
-        "original_title": a["title"],
-        "clean_tokens": clean_text(a["title"] + " " + (a["description"] or "")),
-        "created_at": a["created_at"],
-        "assigned_group": None
-    })
-
-print(f"Loaded {len(processed_alerts)} alerts for simulation.\n")
+def load_alerts(file_path):
+    if not os.path.exists(file_path):
+        print(f"Error: {file_path} not found.")
+        exit(1)
+
+    with open(file_path, 'r') as f:
+        return json.load(f)
+
+def preprocess(alerts):
+    processed_alerts = []
+    texts = [a["title"] + " " + (a["description"] or "") for a in alerts]
+    for a, tokens in zip(alerts, tokenizer.tokenize_many(texts, strip_source_suffix=True)):
+        processed_alerts.append({
+            "id": a["id"],
+            "original_title": a["title"],
+            "clean_tokens": tokens,
+            "token_set": frozenset(tokens),
+            "created_at": a["created_at"],
+            "time": parse_time(a["created_at"]),
+            "assigned_group": None
+        })
+    return processed_alerts
 
 # --- 3. Run Clustering ---
-THRESHOLD = 0.14 # Lowered based on debug results
+DEBUG_MIN_SCORE = 0.1 # COMPARE lines are printed above this semantic score
 
-groups = []
-group_counter = 0
+def cluster(processed_alerts, threshold=THRESHOLD, debug=True, backend="index", block_size=1024,
+            lsh_bands=None, lsh_rows=None, stats=None, idf=None):
+    """
+    Leader clustering, newest first. The "index" backend scores each item
+    against leaders found through the inverted index; the "sparse" backend
+    scores a whole block against the leaders known at the start of the block
+    with one sparse product, and only leaders created inside the block go
+    through the index. The "minhash" backend swaps the inverted index for a
+    MinHash-LSH band index (approximate: candidates are still verified with
+    exact Jaccard + decay, but a pair LSH misses is never compared).
 
-# Sort by newest first to establish "leaders" of clusters
-processed_alerts.sort(key=lambda x: x["created_at"], reverse=True)
+    Leaders more than max_reachable_hours(threshold) away can't pass the
+    threshold even with Jaccard 1, so the index skips them.
 
-for item in processed_alerts:
-    # Try to find an existing group
-    best_group_idx = -1
-    best_score = -1.0
-    
-    # DEBUG: Print current item tokens
-    # print(f"Processing: {item['original_title'][:30]}... Tokens: {item['clean_tokens']}")
-
-    for idx, group in enumerate(groups):
-        leader = group["leader"]
-        
-        # Calculate Semantic Score
-        sem_score = compute_tf_similarity(item["clean_tokens"], leader["clean_tokens"])
-        
-        # Calculate Time Decay
-        hours = get_hours_diff(item["created_at"], leader["created_at"])
-        final_score = apply_time_decay(sem_score, hours)
-        
-        # DEBUG: Print comparison details
-        if sem_score > 0.1: # Only print relevant matches
-            print(f"   COMPARE: '{item['original_title'][:20]}...' vs '{leader['original_title'][:20]}...'")
-            print(f"      - Sem Score: {sem_score:.3f} | Hours: {hours:.1f} | Final: {final_score:.3f}")
-
-        if final_score > THRESHOLD and final_score > best_score:
-            best_score = final_score
-            best_group_idx = idx
-            
-    if best_group_idx != -1:
-        # Add to group
-        groups[best_group_idx]["members"].append({
-            "title": item["original_title"],
-            "score": best_score
-        })
+    With an `idf` store (idf.IdfStore, index backend only) the semantic
+    score is the IDF-weighted cosine instead of Jaccard, and tokens the
+    store considers common are neither indexed nor looked up.
+
+    Sets item["assigned_group"] on every item. If `stats` is a dict, the
+    number of item-leader pairs actually scored is added to stats["comparisons"].
+    """
+    if idf is not None and backend != "index":
+        raise ValueError("IDF scoring is only implemented for the index backend")
+
+    groups = []
+    group_counter = 0
+    scorer = None
+
+    if backend == "sparse":
+        from sparse_similarity import SPARSE_AVAILABLE, SparseScorer
+        if SPARSE_AVAILABLE:
+            scorer = SparseScorer()
+        else:
+            print("numpy/scipy not installed, falling back to the index backend.")
+
+    # Sort by newest first to establish "leaders" of clusters
+    processed_alerts.sort(key=lambda x: x["created_at"], reverse=True)
+
+    if backend == "minhash":
+        from minhash_lsh import MinHashLSH
+        lsh = MinHashLSH(threshold, bands=lsh_bands, rows=lsh_rows)
+        print(f"MinHash-LSH: {lsh.bands} bands x {lsh.rows} rows")
+
+    if scorer is None:
+        blocks = [processed_alerts]
     else:
-        # Create new group
-        group_counter += 1
-        groups.append({
-            "id": group_counter,
-            "leader": item,
-            "members": [{
-                "title": item["original_title"],
-                "score": 1.0 # Self match
-            }]
-        })
+        blocks = [processed_alerts[i:i + block_size] for i in range(0, len(processed_alerts), block_size)]
+
+    keep_above = (DEBUG_MIN_SCORE if debug else float("inf"), threshold)
+    comparisons = 0
+
+    for block in blocks:
+        # Leaders before the block come pre-scored; the index only holds the block's own leaders
+        base = len(groups)
+        prescored = scorer.score_block(block, keep_above) if scorer else None
+        index = lsh if backend == "minhash" else LeaderIndex(max_reachable_hours(threshold))
+
+        for pos, item in enumerate(block):
+            # Try to find an existing group
+            best_group_idx = -1
+            best_score = -1.0
+            item_set = item["token_set"]
+            if idf is not None:
+                lookup_set = idf.searchable(item_set)
+                item_vector = item["vector"] = idf.vector(item_set)
+            else:
+                lookup_set = item_set
+
+            scored = list(prescored[pos]) if prescored else []
+            candidates = index.candidates(lookup_set, item["time"])
+            comparisons += len(candidates)
+            for local_idx in candidates:
+                idx = base + local_idx
+                leader = groups[idx]["leader"]
+                leader_set = leader["token_set"]
+
+                if idf is not None:
+                    sem_score = idf.cosine(item_vector, leader["vector"])
+                else:
+                    # Calculate Semantic Score (same Jaccard as compute_tf_similarity)
+                    intersection = len(item_set & leader_set)
+                    sem_score = intersection / (len(item_set) + len(leader_set) - intersection)
+
+                # Calculate Time Decay
+                hours = hours_between(item["time"], leader["time"])
+                scored.append((idx, sem_score, hours, apply_time_decay(sem_score, hours)))
+
+            for idx, sem_score, hours, final_score in scored:
+                # DEBUG: Print comparison details
+                if debug and sem_score > DEBUG_MIN_SCORE: # Only print relevant matches
+                    leader = groups[idx]["leader"]
+                    print(f"   COMPARE: '{item['original_title'][:20]}...' vs '{leader['original_title'][:20]}...'")
+                    print(f"      - Sem Score: {sem_score:.3f} | Hours: {hours:.1f} | Final: {final_score:.3f}")
+
+                if final_score > threshold and final_score > best_score:
+                    best_score = final_score
+                    best_group_idx = idx
+
+            if best_group_idx != -1:
+                # Add to group
+                groups[best_group_idx]["members"].append({
+                    "title": item["original_title"],
+                    "score": best_score
+                })
+                item["assigned_group"] = groups[best_group_idx]["id"]
+            else:
+                # Create new group
+                group_counter += 1
+                groups.append({
+                    "id": group_counter,
+                    "leader": item,
+                    "members": [{
+                        "title": item["original_title"],
+                        "score": 1.0 # Self match
+                    }]
+                })
+                item["assigned_group"] = group_counter
+                index.add(len(groups) - 1 - base, lookup_set, item["time"])
+                if scorer:
+                    scorer.add_leader(item)
+
+    if stats is not None:
+        stats["comparisons"] = stats.get("comparisons", 0) + comparisons + (scorer.pairs_scored if scorer else 0)
+
+    return groups
 
 # --- 4. Output Results ---
-print(f"Total Clusters Formed: {len(groups)}")
-print("="*60)
-
-# Filter to show only interesting clusters (size > 1) to "wow" the user
-interesting_groups = [g for g in groups if len(g["members"]) > 1]
-single_groups = [g for g in groups if len(g["members"]) == 1]
-
-print(f"Clusters with Multiples: {len(interesting_groups)}")
-print(f"Unique Stories: {len(single_groups)}")
-print("="*60 + "\n")
-
-for g in interesting_groups:
-    print(f"📂 CLUSTER #{g['id']} (Leader Date: {g['leader']['created_at']})")
-    for m in g["members"]:
-        print(f"   - [{m['score']:.2f}] {m['title'][:100]}...")
-    print("-" * 40)
+def print_results(groups):
+    print(f"Total Clusters Formed: {len(groups)}")
+    print("="*60)
+
+    # Filter to show only interesting clusters (size > 1) to "wow" the user
+    interesting_groups = [g for g in groups if len(g["members"]) > 1]
+    single_groups = [g for g in groups if len(g["members"]) == 1]
+
+    print(f"Clusters with Multiples: {len(interesting_groups)}")
+    print(f"Unique Stories: {len(single_groups)}")
+    print("="*60 + "\n")
+
+    for g in interesting_groups:
+        print(f"📂 CLUSTER #{g['id']} (Leader Date: {g['leader']['created_at']})")
+        for m in g["members"]:
+            print(f"   - [{m['score']:.2f}] {m['title'][:100]}...")
+        print("-" * 40)
+
+def main():
+    # Use relative path from the script location
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Simulate alert clustering on a JSON export.")
+    parser.add_argument("file", nargs="?", default=os.path.join(script_dir, "data", "sample.json"))
+    parser.add_argument("--quiet", action="store_true", help="skip the COMPARE debug lines")
+    parser.add_argument("--backend", choices=["index", "sparse", "minhash"], default="index",
+                        help="candidate scoring: inverted index (stdlib), sparse matrices (numpy/scipy) "
+                             "or MinHash-LSH (approximate)")
+    parser.add_argument("--lsh-bands", type=int, help="MinHash-LSH bands (default: tuned to THRESHOLD)")
+    parser.add_argument("--lsh-rows", type=int, help="MinHash-LSH rows per band (default: tuned to THRESHOLD)")
+    parser.add_argument("--tfidf", action="store_true",
+                        help="IDF-weighted cosine over the file's document frequencies (idf.py); index backend only")
+    parser.add_argument("--compact", action="store_true",
+                        help="columnar state with interned token ids (compact.py); index backend only")
+    args = parser.parse_args()
+    if args.compact and args.backend != "index":
+        parser.error("--compact only supports the index backend")
+    if args.tfidf and (args.compact or args.backend != "index"):
+        parser.error("--tfidf only supports the index backend")
+
+    if args.compact:
+        import compact
+        table = compact.preprocess(load_alerts(args.file))
+        print(f"Loaded {len(table)} alerts for simulation ({len(table.vocab)} distinct tokens).\n")
+        leaders = compact.cluster(table, debug=not args.quiet)
+        print_results(compact.as_groups(table, leaders))
+        return
+
+    processed_alerts = preprocess(load_alerts(args.file))
+    print(f"Loaded {len(processed_alerts)} alerts for simulation.\n")
+    unparsed = sum(1 for a in processed_alerts if a["time"][0] == INVALID)
+    if unparsed:
+        print(f"Warning: {unparsed} alerts with unparseable created_at (treated as 0h from every other alert).\n")
+
+    threshold, store = THRESHOLD, None
+    if args.tfidf:
+        from idf import IdfStore, TFIDF_THRESHOLD
+        threshold, store = TFIDF_THRESHOLD, IdfStore()
+        for item in processed_alerts:
+            store.add(item["token_set"])
+
+    groups = cluster(processed_alerts, threshold=threshold, debug=not args.quiet, backend=args.backend,
+                     lsh_bands=args.lsh_bands, lsh_rows=args.lsh_rows, idf=store)
+    print_results(groups)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+One-pass sweep of the clustering threshold and decay half-life.
+
+THRESHOLD and the 36h decay were tuned by hand, one full debug run per
+trial. Leader clustering only ever looks at item-leader scores, and a
+score is jaccard * 1 / (1 + hours / decay), so the expensive part (tokens,
+Jaccard, hour gaps) doesn't depend on either parameter:
+
+1. every pair that could pass the lowest threshold with the longest decay
+   of the grid and the current setting (shared token, close enough in time) is scored once and cached as
+   (older position, Jaccard, hours) per alert; the cache is kept on disk,
+   keyed by the input file, the grid bounds and the tokenizer source;
+2. each (threshold, decay) setting replays the newest-first leader loop
+   over the cache: no tokenizing, no index, no dicts.
+
+The replay uses the same arithmetic and tie-breaking as
+simulate_logic.cluster, so the (THRESHOLD, 36h) row matches it exactly.
+Each row reports cluster counts, the size distribution and the Adjusted
+Rand Index against the current setting and, when the alerts carry a
+`story_id` (synthetic.py), against the ground truth.
+
+Usage:
+    python sweep.py data/sample.json
+    python sweep.py --synthetic 20000 --thresholds 0.1 0.14 0.2 --decays 24 36 72
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+import time
+from array import array
+
+from benchmark import adjusted_rand_index
+from simulate_logic import THRESHOLD, LeaderIndex, load_alerts, preprocess, tokenizer
+from timestamps import hours_between, max_reachable_hours
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(SCRIPT_DIR, "..", ".cache", "sweep")
+DEFAULT_THRESHOLDS = [0.10, 0.12, 0.14, 0.16, 0.18, 0.20, 0.25, 0.30]
+DEFAULT_DECAYS = [12.0, 24.0, 36.0, 48.0, 72.0]
+CURRENT_DECAY = 36.0
+
+
+def decay_factor(hours, decay_hours):
+    # Same operations as simulate_logic.apply_time_decay
+    return 1.0 / (1.0 + (hours / decay_hours))
+
+
+class PairCache:
+    """
+    For the alert at each position (newest first): the older positions it
+    can match, ascending, with their Jaccard and hour gap.
+    """
+
+    def __init__(self, size):
+        self.offsets = array('q', [0])
+        self.positions = array('q')
+        self.jaccard = array('d')
+        self.hours = array('d')
+        self.size = size
+
+    def __len__(self):
+        return len(self.positions)
+
+    def pairs(self, p):
+        lo, hi = self.offsets[p], self.offsets[p + 1]
+        return zip(self.positions[lo:hi], self.jaccard[lo:hi], self.hours[lo:hi])
+
+
+def build_cache(items, min_threshold, max_decay):
+    """
+    Scores every pair that some setting in the grid could accept: Jaccard
+    above zero and jaccard * decay_factor(hours, max_decay) > min_threshold.
+    `items` must already be in newest-first order.
+    """
+    cache = PairCache(len(items))
+    index = LeaderIndex(max_reachable_hours(min_threshold, max_decay))
+    for p, item in enumerate(items):
+        item_set = item["token_set"]
+        for q in index.candidates(item_set, item["time"]):
+            other = items[q]
+            other_set = other["token_set"]
+            intersection = len(item_set & other_set)
+            jaccard = intersection / (len(item_set) + len(other_set) - intersection)
+            hours = hours_between(item["time"], other["time"])
+            if jaccard * decay_factor(hours, max_decay) > min_threshold:
+                cache.positions.append(q)
+                cache.jaccard.append(jaccard)
+                cache.hours.append(hours)
+        cache.offsets.append(len(cache.positions))
+        # Every alert may be a leader in some setting
+        index.add(p, item_set, item["time"])
+    return cache
+
+
+def replay(cache, threshold, decay_hours):
+    """Group number (1-based, in creation order) per position."""
+    labels = array('q', bytes(8 * cache.size))
+    leader_group = {}  # position -> group number
+    for p in range(cache.size):
+        best_group, best_score = 0, -1.0
+        for q, jaccard, hours in cache.pairs(p):
+            group = leader_group.get(q)
+            if group is None:
+                continue
+            score = jaccard * decay_factor(hours, decay_hours)
+            if score > threshold and score > best_score:
+                best_group, best_score = group, score
+        if best_group:
+            labels[p] = best_group
+        else:
+            labels[p] = leader_group[p] = len(leader_group) + 1
+    return labels
+
+
+def size_summary(labels):
+    counts = {}
+    for label in labels:
+        counts[label] = counts.get(label, 0) + 1
+    sizes = sorted(counts.values())
+
+    def quantile(q):
+        return sizes[min(len(sizes) - 1, int(q * len(sizes)))]
+
+    return {
+        "clusters": len(sizes),
+        "multi": sum(1 for s in sizes if s > 1),
+        "grouped_share": sum(s for s in sizes if s > 1) / max(len(labels), 1),
+        "p90": quantile(0.90),
+        "p99": quantile(0.99),
+        "max": sizes[-1] if sizes else 0,
+    }
+
+
+def _cache_path(cache_dir, source, min_threshold, max_decay):
+    # A tokenizer change changes every Jaccard, so it invalidates the cache too
+    with open(tokenizer.__file__, "rb") as f:
+        tokenizer_digest = hashlib.sha1(f.read()).hexdigest()
+    digest = hashlib.sha1(f"{source}|{min_threshold}|{max_decay}|{tokenizer_digest}".encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"pairs_{digest}.pickle")
+
+
+def _source_key(args):
+    if args.synthetic:
+        return f"synthetic:{args.synthetic}:{args.seed}"
+    stat = os.stat(args.file)
+    return f"{os.path.abspath(args.file)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep threshold and decay half-life over cached pair scores.")
+    parser.add_argument("file", nargs="?", default=os.path.join(SCRIPT_DIR, "data", "sample.json"))
+    parser.add_argument("--synthetic", type=int, help="use N synthetic alerts instead of a file")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--decays", type=float, nargs="+", default=DEFAULT_DECAYS, help="decay constants in hours")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true", help="don't read or write the pair cache")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from synthetic import generate
+        alerts = generate(args.synthetic, args.seed)
+    else:
+        alerts = load_alerts(args.file)
+
+    items = preprocess(alerts)
+    # Newest first, as simulate_logic.cluster
+    items.sort(key=lambda x: x["created_at"], reverse=True)
+    truth = None
+    if alerts and "story_id" in alerts[0]:
+        story = {a["id"]: a["story_id"] for a in alerts}
+        truth = [story[item["id"]] for item in items]
+
+    # The cache must also cover the current setting, the baseline of the ARI column
+    min_threshold = min(args.thresholds + [THRESHOLD])
+    max_decay = max(args.decays + [CURRENT_DECAY])
+    path = _cache_path(args.cache_dir, _source_key(args), min_threshold, max_decay)
+    start = time.perf_counter()
+    if not args.no_cache and os.path.exists(path):
+        with open(path, "rb") as f:
+            cache = pickle.load(f)
+        print(f"Pair cache loaded from {path}")
+    else:
+        cache = build_cache(items, min_threshold, max_decay)
+        if not args.no_cache:
+            os.makedirs(args.cache_dir, exist_ok=True)
+            with open(path, "wb") as f:
+                pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+    print(f"{len(items)} alerts, {len(cache)} cached pairs ({time.perf_counter() - start:.1f}s)\n")
+
+    current = replay(cache, THRESHOLD, CURRENT_DECAY)
+    header = (f"{'threshold':>9} {'decay h':>7} {'clusters':>8} {'multi':>6} {'grouped':>7} "
+              f"{'p90':>4} {'p99':>4} {'max':>5} {'ARI cur':>7}")
+    print(header + (f" {'ARI truth':>9}" if truth else ""))
+
+    start = time.perf_counter()
+    for threshold in sorted(args.thresholds):
+        for decay_hours in sorted(args.decays):
+            labels = replay(cache, threshold, decay_hours)
+            summary = size_summary(labels)
+            line = (f"{threshold:>9.3f} {decay_hours:>7.1f} {summary['clusters']:>8} {summary['multi']:>6} "
+                    f"{summary['grouped_share']:>7.1%} {summary['p90']:>4} {summary['p99']:>4} {summary['max']:>5} "
+                    f"{adjusted_rand_index(current, labels):>7.4f}")
+            if truth:
+                line += f" {adjusted_rand_index(truth, labels):>9.4f}"
+            print(line)
+    settings = len(args.thresholds) * len(args.decays)
+    print(f"\n{settings} settings in {time.perf_counter() - start:.1f}s "
+          f"(current: threshold {THRESHOLD}, decay {CURRENT_DECAY:g}h)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Synthetic Google Alerts / News items for clustering benchmarks.
+
+Each alert belongs to a "story" (kept in `story_id` as ground truth). A
+story has a headline built from a language-specific news vocabulary, a few
+topic words from a Zipf-distributed lexicon and story-specific entity
+names. Every alert of the story is a rewrite of that headline (words
+dropped, swapped or added) with a " - Publisher" or " | Publisher" suffix,
+an optional description and a timestamp spread around the story's start.
+Story sizes follow a heavy tail, so most stories are singletons and a few
+are covered by dozens of outlets, as in the real feed.
+
+Usage:
+    python synthetic.py 10000 > data/synthetic_10k.json
+"""
+
+import argparse
+import json
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+VOCABULARY = {
+    "pt": """governo presidente ministro eleições congresso senado câmara reforma economia
+        inflação juros banco central mercado empresas tecnologia inteligência artificial
+        dados privacidade saúde educação segurança polícia justiça tribunal supremo
+        acordo comercial exportações agronegócio petróleo energia clima chuvas seca
+        estado cidade prefeitura investimento startup lançamento anuncia aprova critica
+        denuncia investiga cresce cai recorde crise greve protesto votação projeto lei""",
+    "en": """government president minister election congress senate reform economy
+        inflation rates central bank market companies technology artificial intelligence
+        data privacy health education security police court supreme deal trade exports
+        oil energy climate storm drought state city investment startup launch announces
+        approves criticizes investigates grows falls record crisis strike protest vote bill""",
+    "es": """gobierno presidente ministro elecciones congreso senado reforma economía
+        inflación tasas banco central mercado empresas tecnología inteligencia artificial
+        datos privacidad salud educación seguridad policía justicia tribunal acuerdo
+        comercio exportaciones petróleo energía clima tormenta sequía estado ciudad
+        inversión lanza anuncia aprueba critica investiga crece cae récord crisis huelga""",
+}
+LANGUAGE_WEIGHTS = {"pt": 0.6, "en": 0.3, "es": 0.1}
+
+PUBLISHERS = [
+    "Folha", "G1", "O Globo", "Estadão", "UOL", "CNN Brasil", "Valor Econômico",
+    "Exame", "InfoMoney", "Metrópoles", "Reuters", "Bloomberg", "The New York Times",
+    "The Guardian", "BBC", "El País", "Clarín", "Infobae", "TechCrunch", "O TEMPO",
+]
+SYLLABLES = ["ka", "lo", "ri", "ta", "ma", "ne", "vo", "su", "pe", "dri", "bra", "zil", "on", "ar", "mi"]
+# Topic words (places, products, organizations...) drawn with a Zipf law, so
+# some are everywhere and most are rare, as in real headlines
+LEXICON_SIZE = 20_000
+
+
+def _entity(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def _story_size(rng, max_size=60):
+    # Pareto tail: ~60% singletons, a few stories with dozens of alerts
+    return min(max_size, int(rng.paretovariate(1.3)))
+
+
+def _rewrite(rng, words, vocab):
+    words = list(words)
+    for _ in range(rng.randint(0, 2)):
+        if len(words) > 4 and rng.random() < 0.5:
+            words.pop(rng.randrange(len(words)))
+        else:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(vocab))
+    if len(words) > 3 and rng.random() < 0.3:
+        i, j = rng.randrange(len(words)), rng.randrange(len(words))
+        words[i], words[j] = words[j], words[i]
+    return words
+
+
+def _lexicon(rng):
+    words = sorted({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(LEXICON_SIZE)})
+    rng.shuffle(words)
+    cumulative, total = [], 0.0
+    for rank in range(len(words)):
+        total += 1.0 / (rank + 1)
+        cumulative.append(total)
+    return words, cumulative
+
+
+def generate(n, seed=42, span_days=None, start=None):
+    """List of n alert dicts ({id, title, description, created_at, story_id})."""
+    rng = random.Random(seed)
+    lexicon, cumulative = _lexicon(rng)
+    vocabularies = {lang: words.split() for lang, words in VOCABULARY.items()}
+    languages = list(LANGUAGE_WEIGHTS)
+    weights = [LANGUAGE_WEIGHTS[lang] for lang in languages]
+    # Roughly the production rate: more alerts, longer history
+    span_days = span_days or max(3, min(365, n // 2000))
+    start = start or datetime(2026, 1, 1, tzinfo=timezone.utc)
+    span_seconds = span_days * 86400
+
+    alerts = []
+    story_id = 0
+    while len(alerts) < n:
+        story_id += 1
+        lang = rng.choices(languages, weights)[0]
+        vocab = vocabularies[lang]
+        headline = (rng.sample(vocab, rng.randint(3, 5))
+                    + rng.choices(lexicon, cum_weights=cumulative, k=rng.randint(2, 4))
+                    + [_entity(rng) for _ in range(rng.randint(1, 2))])
+        rng.shuffle(headline)
+        story_start = rng.uniform(0, span_seconds)
+        publishers = rng.sample(PUBLISHERS, len(PUBLISHERS))
+
+        for k in range(min(_story_size(rng), n - len(alerts))):
+            title = " ".join(_rewrite(rng, headline, vocab))
+            title = title[0].upper() + title[1:]
+            separator = " - " if rng.random() < 0.8 else " | "
+            title += separator + publishers[k % len(publishers)]
+            description = None
+            if rng.random() < 0.6:
+                description = " ".join(_rewrite(rng, rng.sample(headline, min(4, len(headline))) + rng.sample(vocab, 4), vocab))
+            offset = min(span_seconds, story_start + rng.expovariate(1 / (6 * 3600)))
+            created_at = start + timedelta(seconds=int(offset))
+            alerts.append({
+                "id": f"syn-{seed}-{len(alerts)}",
+                "title": title,
+                "description": description,
+                "created_at": created_at.isoformat(),
+                "story_id": story_id,
+            })
+
+    rng.shuffle(alerts)
+    return alerts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic alerts as JSON.")
+    parser.add_argument("count", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--span-days", type=int)
+    args = parser.parse_args()
+    json.dump(generate(args.count, args.seed, args.span_days), sys.stdout, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
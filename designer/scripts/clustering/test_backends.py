@@ -0,0 +1,119 @@
+"""
+The clustering backends must produce the same partition as the original
+O(n²) leader loop; the experimental parallel.py must stay above its
+stated agreement bound.
+
+    python -m pytest designer/scripts/clustering
+"""
+
+from datetime import datetime
+
+import pytest
+
+import compact
+import parallel
+import synthetic
+from benchmark import adjusted_rand_index
+from simulate_logic import THRESHOLD, apply_time_decay, cluster, compute_tf_similarity, preprocess
+
+
+def _hours_diff(date_str1, date_str2):
+    # The per-pair parse of the original loop: 0h when the subtraction fails
+    try:
+        d1 = datetime.fromisoformat(date_str1.replace('Z', '+00:00'))
+        d2 = datetime.fromisoformat(date_str2.replace('Z', '+00:00'))
+        return abs((d1 - d2).total_seconds()) / 3600.0
+    except Exception:
+        return 0.0
+
+
+def brute_force(items, threshold=THRESHOLD):
+    """Every item against every leader, newest first; id -> group number."""
+    items = sorted(items, key=lambda x: x["created_at"], reverse=True)
+    leaders = []
+    assigned = {}
+    for item in items:
+        best_idx, best_score = -1, -1.0
+        for idx, leader in enumerate(leaders):
+            score = apply_time_decay(
+                compute_tf_similarity(item["clean_tokens"], leader["clean_tokens"]),
+                _hours_diff(item["created_at"], leader["created_at"]),
+            )
+            if score > threshold and score > best_score:
+                best_idx, best_score = idx, score
+        if best_idx == -1:
+            leaders.append(item)
+            best_idx = len(leaders) - 1
+        assigned[item["id"]] = best_idx + 1
+    return assigned
+
+
+def alerts(seed, span_days=None, broken_dates=False):
+    data = synthetic.generate(2000, seed, span_days=span_days)
+    if broken_dates:
+        # Unparseable and naive timestamps are 0h from everything
+        for alert in data[::97]:
+            alert["created_at"] = "not a date"
+        for alert in data[5::89]:
+            alert["created_at"] = alert["created_at"].replace("+00:00", "")
+    return data
+
+
+CASES = [
+    pytest.param(dict(seed=1), id="3-days"),
+    pytest.param(dict(seed=2, span_days=60), id="60-days"),
+    pytest.param(dict(seed=3, span_days=30, broken_dates=True), id="broken-dates"),
+]
+
+
+@pytest.fixture(scope="module", params=CASES)
+def case(request):
+    data = alerts(**request.param)
+    return data, brute_force(preprocess(data))
+
+
+def assignments(items):
+    return {item["id"]: item["assigned_group"] for item in items}
+
+
+def test_index_backend_matches_brute_force(case):
+    data, expected = case
+    items = preprocess(data)
+    cluster(items, debug=False, backend="index")
+    assert assignments(items) == expected
+
+
+@pytest.mark.parametrize("block_size", [256, 1024])
+def test_sparse_backend_matches_index(case, block_size):
+    pytest.importorskip("scipy")
+    data, _ = case
+    reference = preprocess(data)
+    cluster(reference, debug=False, backend="index")
+    items = preprocess(data)
+    cluster(items, debug=False, backend="sparse", block_size=block_size)
+    assert assignments(items) == assignments(reference)
+
+
+def test_compact_cluster_matches_index(case):
+    data, _ = case
+    reference = preprocess(data)
+    cluster(reference, debug=False, backend="index")
+    table = compact.preprocess(data)
+    compact.cluster(table)
+    assert {table.ids[row]: table.groups[row] for row in range(len(table))} == assignments(reference)
+
+
+@pytest.mark.parametrize("halo_hours", [None, 12.0])
+def test_parallel_agreement_above_bound(case, halo_hours, monkeypatch):
+    # 2000 alerts are too few to shard by default; force 5 shards on 2 processes
+    monkeypatch.setattr(parallel, "MIN_SHARD_SIZE", 100)
+    monkeypatch.setattr(parallel, "MIN_SPANS_PER_HALO", 0.01)
+    data, _ = case
+    reference = preprocess(data)
+    cluster(reference, debug=False, backend="index")
+    items = preprocess(data)
+    # A 12h halo (the default is the 221h reach) makes the approximation visible at this size
+    parallel.cluster_parallel(items, workers=2, shards=5, halo_hours=halo_hours)
+    expected, got = assignments(reference), assignments(items)
+    ids = list(expected)
+    assert adjusted_rand_index([expected[i] for i in ids], [got[i] for i in ids]) >= parallel.MIN_ARI
@@ -0,0 +1,49 @@
+"""
+Timestamps parsed once per alert, with the semantics of the per-pair
+datetime subtraction the clustering used to do.
+
+A parsed time is (kind, epoch in integer microseconds). A pair is 0h apart
+when either date doesn't parse or when a naive date meets an aware one (the
+subtraction raises), so those pairs are always "close"; `hours_between`
+reproduces that. Integer microseconds keep the hour gaps bit-identical to
+timedelta.total_seconds() / 3600.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+EPOCH_AWARE = datetime(1970, 1, 1, tzinfo=timezone.utc)
+EPOCH_NAIVE = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+INVALID, NAIVE, AWARE = 0, 1, 2
+
+
+def parse_time(date_str):
+    """(kind, epoch in integer microseconds) for an ISO date string."""
+    try:
+        dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+    except Exception:
+        return INVALID, 0
+    if dt.tzinfo is None:
+        return NAIVE, (dt - EPOCH_NAIVE) // ONE_MICROSECOND
+    return AWARE, (dt - EPOCH_AWARE) // ONE_MICROSECOND
+
+
+def comparable(t1, t2):
+    return t1[0] == t2[0] and t1[0] != INVALID
+
+
+def hours_between(t1, t2):
+    if not comparable(t1, t2):
+        return 0.0
+    return (abs(t1[1] - t2[1]) / 10**6) / 3600.0
+
+
+def max_reachable_hours(threshold, decay_hours=36.0):
+    """
+    Jaccard is at most 1, so a pair can only score above `threshold` while
+    1 / (1 + h / decay_hours) > threshold, i.e. h < decay_hours * (1 / threshold - 1).
+    """
+    if threshold <= 0:
+        return float("inf")
+    return decay_hours * (1.0 / threshold - 1.0)
@@ -0,0 +1 @@
+"""Componentes de apoio ao news_curator_worker."""
@@ -0,0 +1,131 @@
+"""
+Extração única por URL canônica.
+
+O Google Alerts entrega o mesmo artigo várias vezes (alertas diferentes,
+wrappers de redirect diferentes). Depois da resolução, todas essas cópias
+apontam para a mesma URL canônica; aqui garantimos que o download e o parsing
+aconteçam uma vez só e que o resultado seja reaproveitado por todos os
+alertas que compartilham a URL:
+
+- dentro do processo, um memo LRU com TTL guarda os resultados de sucesso;
+- extrações simultâneas da mesma URL (modo concorrente) esperam a primeira
+  em vez de repetir o trabalho (single-flight);
+- entre processos e lotes, o chamador pode consultar o banco antes de baixar
+  (ver `find_existing_extractions`): uma consulta por lote, pela coluna
+  `alerts.canonical_url` que o worker grava junto com a extração.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# Parâmetros de rastreamento que não mudam o conteúdo
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ocid", "cmpid",
+    "ref", "ref_src", "smid", "sref", "igshid", "oc",
+}
+
+
+def canonical_url(url):
+    """Chave canônica: host minúsculo sem www, sem fragmento, sem utm_*/tracking, sem barra final."""
+    try:
+        parsed = urlparse((url or "").strip())
+    except ValueError:
+        return url
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parsed.port:
+        host = f"{host}:{parsed.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = parsed.path.rstrip("/") or "/"
+    scheme = "https" if parsed.scheme in ("http", "https") else parsed.scheme
+    return urlunparse((scheme, host, path, "", urlencode(query), ""))
+
+
+class SingleFlightMemo:
+    """Memo LRU com TTL em que cada chave é computada no máximo uma vez por vez."""
+
+    def __init__(self, max_entries=5_000, ttl_seconds=6 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._done = OrderedDict()     # key -> (expires_at, result)
+        self._inflight = {}            # key -> Future
+
+    def get_or_compute(self, key, compute, keep=lambda result: True):
+        """
+        Retorna (resultado, reaproveitado). `keep(result)` decide se o
+        resultado fica no memo e pode ser reaproveitado (ex.: só sucessos);
+        quando a extração em andamento falha, quem esperava por ela computa
+        por conta própria.
+        """
+        while True:
+            with self._lock:
+                entry = self._done.get(key)
+                if entry and entry[0] > time.monotonic():
+                    self._done.move_to_end(key)
+                    return entry[1], True
+                future = self._inflight.get(key)
+                owner = future is None
+                if owner:
+                    future = self._inflight[key] = Future()
+            if owner:
+                break
+            try:
+                result = future.result()
+            except Exception:
+                continue
+            if keep(result):
+                return result, True
+
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._inflight[key]
+            if keep(result):
+                self._done[key] = (time.monotonic() + self.ttl_seconds, result)
+                self._done.move_to_end(key)
+                while len(self._done) > self.max_entries:
+                    self._done.popitem(last=False)
+        future.set_result(result)
+        return result, False
+
+
+def find_existing_extractions(client, canonical_urls):
+    """
+    Conteúdo já extraído (por qualquer worker, em qualquer lote) de alertas
+    com as mesmas URLs canônicas, em uma única consulta: {canonical_url: extração}.
+    """
+    keys = sorted(set(canonical_urls))
+    if not keys:
+        return {}
+    response = client.table('alerts') \
+        .select('canonical_url, extracted_content!inner(markdown_content, word_count, extraction_status)') \
+        .in_('canonical_url', keys) \
+        .eq('extracted_content.extraction_status', 'completed') \
+        .execute()
+    found = {}
+    for row in response.data or []:
+        content = row['extracted_content']
+        if isinstance(content, list):
+            content = content[0] if content else None
+        if row['canonical_url'] in found or not content or not content.get('markdown_content'):
+            continue
+        found[row['canonical_url']] = {
+            "markdown": content['markdown_content'],
+            "word_count": content['word_count'] or 0,
+            "success": True,
+        }
+    return found
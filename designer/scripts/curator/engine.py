@@ -0,0 +1,115 @@
+"""
+Motor de extração concorrente para o news_curator_worker.
+
+As etapas do worker (resolver URL, extrair conteúdo, gravar no Supabase) são
+chamadas bloqueantes de `requests`. Aqui elas rodam em um pool de threads
+orquestrado por asyncio, com um limite global de alertas em andamento e um
+limite de requisições simultâneas por host, para não martelar o mesmo
+publisher.
+
+A vaga do host é pega pelas próprias etapas (`host_slot`), só em volta da
+requisição de rede: um link do Google News decodificado localmente não
+ocupa a vaga de news.google.com, e o parsing roda fora da vaga do publisher.
+"""
+
+import asyncio
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from curator import metrics
+
+
+def host_of(url):
+    """Retorna o host (sem 'www.') de uma URL, ou '' se não der para extrair."""
+    try:
+        host = (urlparse(url or "").hostname or "").lower()
+    except ValueError:
+        return ""
+    return host[4:] if host.startswith("www.") else host
+
+
+class HostLimiter:
+    """Semáforos criados sob demanda, um por host; usados de dentro das threads do pool."""
+
+    def __init__(self, per_host):
+        self.per_host = max(1, per_host)
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def slot(self, url):
+        host = host_of(url)
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+        return semaphore
+
+
+_hosts = None
+
+
+def host_slot(url):
+    """
+    Vaga do host de `url` para uma requisição de rede (`with host_slot(url):`).
+    Fora do motor concorrente não há limite.
+    """
+    hosts = _hosts
+    return hosts.slot(url) if hosts is not None else contextlib.nullcontext()
+
+
+async def _run_alert(alert, steps, global_sem, loop, executor):
+    resolve, extract, save = steps
+
+    async with global_sem:
+        # Cada alerta acumula as próprias linhas de log e imprime tudo de uma
+        # vez no final, para a saída ficar igual à do loop sequencial.
+        lines = []
+        log = lines.append
+        log(f"👉 Processando: {alert.get('title', 'Sem título')}")
+        start = time.perf_counter()
+
+        try:
+            original_url = alert.get('url')
+            clean_url = await loop.run_in_executor(executor, resolve, original_url, log)
+            extraction = await loop.run_in_executor(executor, extract, clean_url, log)
+
+            await loop.run_in_executor(executor, save, alert, clean_url, extraction, log)
+            metrics.observe_alert(host_of(clean_url), extraction, time.perf_counter() - start)
+            return extraction['success']
+        except Exception as e:
+            log(f"❌ Erro inesperado: {e}")
+            return False
+        finally:
+            print("\n".join(lines), flush=True)
+
+
+async def _run_all(alerts, steps, concurrency):
+    loop = asyncio.get_running_loop()
+    global_sem = asyncio.Semaphore(concurrency)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return await asyncio.gather(*(
+            _run_alert(alert, steps, global_sem, loop, executor)
+            for alert in alerts
+        ))
+
+
+def run_concurrent(alerts, resolve, extract, save, concurrency=10, per_host=2):
+    """
+    Processa `alerts` concorrentemente e retorna a lista de sucessos (bool),
+    na mesma ordem de entrada.
+
+    `resolve(url, log)`, `extract(url, log)` e `save(alert, clean_url,
+    extraction, log)` são as etapas bloqueantes do worker; as que fazem
+    requisições envolvem cada uma em `host_slot(url)`.
+    """
+    global _hosts
+    if not alerts:
+        return []
+    concurrency = max(1, concurrency)
+    if _hosts is None or _hosts.per_host != max(1, per_host):
+        _hosts = HostLimiter(per_host)
+    return asyncio.run(_run_all(alerts, (resolve, extract, save), concurrency))
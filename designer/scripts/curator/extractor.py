@@ -0,0 +1,220 @@
+"""
+Extrator de artigos em passada única.
+
+Em vez de montar a árvore inteira (BeautifulSoup), alimentamos um
+`html.parser.HTMLParser` orientado a eventos e produzimos markdown, texto puro
+e contagem de palavras na mesma varredura, acumulando em listas (sem `+=` em
+string). O conteúdo chega já limitado em bytes pela camada HTTP, então memória
+e CPU por artigo ficam limitadas mesmo em páginas de vários MB.
+
+Regras (equivalentes às do extrator antigo, sem as duplicações):
+- `script`, `style`, `nav`, `footer`, `iframe` e `noscript` são ignorados;
+- o escopo é o primeiro `<article>`, senão o primeiro `<main>`, senão o `<body>`
+  (ou o documento todo, se não houver `<body>`);
+- `h1`/`h2` viram títulos, `p` vira parágrafo e cada `li` vira um item, uma
+  única vez mesmo em listas aninhadas.
+"""
+
+import re
+from html.parser import HTMLParser
+
+JUNK_TAGS = frozenset(['script', 'style', 'nav', 'footer', 'iframe', 'noscript'])
+BLOCK_PREFIX = {'h1': "# ", 'h2': "## ", 'p': "", 'li': "- "}
+LIST_TAGS = frozenset(['ul', 'ol'])
+# Tags que fecham implicitamente um <p> aberto
+CLOSES_P = frozenset(['p', 'h1', 'h2', 'ul', 'ol', 'li', 'article', 'main', 'div',
+                      'section', 'table', 'blockquote', 'pre', 'header'])
+
+CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9_.:-]+)""", re.I)
+SNIFF_BYTES = 4096
+
+
+def detect_charset(content_type, content):
+    """Charset do cabeçalho Content-Type; senão o do <meta>; senão utf-8."""
+    if content_type:
+        for param in content_type.split(';')[1:]:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'charset' and value.strip():
+                return value.strip().strip('"\'')
+    match = CHARSET_RE.search(content[:SNIFF_BYTES])
+    if match:
+        return match.group(1).decode('ascii')
+    return 'utf-8'
+
+
+def decode(content, content_type=None):
+    """Decodifica o corpo usando o charset declarado (sem adivinhação estatística)."""
+    charset = detect_charset(content_type, content)
+    try:
+        return content.decode(charset, errors='replace')
+    except LookupError:
+        return content.decode('utf-8', errors='replace')
+
+
+class _Scope:
+    """Acumula markdown/texto de um candidato a corpo do artigo."""
+
+    __slots__ = ('parts', 'text', 'words', 'blocks', 'list_depth')
+
+    def __init__(self):
+        self.parts = []       # markdown, em ordem de documento
+        self.text = []        # fragmentos de texto puro
+        self.words = 0
+        self.blocks = []      # pilha de blocos abertos: (tag, buffer, list_depth)
+        self.list_depth = 0
+
+    def _top(self):
+        return self.blocks[-1][0] if self.blocks else None
+
+    def open_block(self, tag):
+        top = self._top()
+        if top == 'li' and tag == 'p':
+            # <li><p>...</p></li>: o parágrafo é parte do item
+            return
+        if top == 'p' and tag in CLOSES_P:
+            self.close_block('p')
+        if tag == 'li' and self._top() == 'li' and self.blocks[-1][2] == self.list_depth:
+            # <li> anterior sem fechamento, no mesmo nível
+            self.close_block('li')
+        buffer = []
+        # Reserva a posição agora para manter a ordem de documento
+        self.parts.append(buffer)
+        self.blocks.append((tag, buffer, self.list_depth))
+
+    def close_block(self, tag):
+        for i in range(len(self.blocks) - 1, -1, -1):
+            if self.blocks[i][0] == tag:
+                for open_tag, buffer, _ in self.blocks[i:]:
+                    self._finish(open_tag, buffer)
+                del self.blocks[i:]
+                return
+
+    def _finish(self, tag, buffer):
+        line = "".join(buffer).strip()
+        buffer.clear()
+        buffer.append(f"{BLOCK_PREFIX[tag]}{line}\n" if tag == 'li' else f"{BLOCK_PREFIX[tag]}{line}\n\n")
+
+    def open_list(self):
+        if self._top() == 'p':
+            self.close_block('p')
+        self.list_depth += 1
+
+    def close_list(self):
+        if not self.list_depth:
+            return
+        while self._top() == 'li' and self.blocks[-1][2] == self.list_depth:
+            self.close_block('li')
+        self.list_depth -= 1
+        if self.list_depth == 0:
+            self.parts.append("\n")
+
+    def data(self, data):
+        if self.blocks:
+            self.blocks[-1][1].append(data)
+        stripped = data.strip()
+        if stripped:
+            self.text.append(stripped)
+            self.words += len(stripped.split())
+
+    def result(self):
+        while self.blocks:
+            self.close_block(self.blocks[-1][0])
+        markdown = "".join("".join(p) if isinstance(p, list) else p for p in self.parts)
+        return {"markdown": markdown, "text": " ".join(self.text), "word_count": self.words}
+
+
+class _ArticleDone(Exception):
+    """Primeiro <article> terminou: o resto da página não importa."""
+
+
+class ArticleExtractor(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.junk_depth = 0
+        self.article = self.main = None
+        self.article_depth = self.main_depth = 0
+        self.main_done = False
+        self.body = _Scope()          # vale para o documento todo até ver <body>
+        self.body_started = self.body_closed = False
+
+    def _active(self):
+        scopes = [] if self.body_closed else [self.body]
+        if self.main_depth:
+            scopes.append(self.main)
+        if self.article_depth:
+            scopes.append(self.article)
+        return scopes
+
+    def handle_starttag(self, tag, attrs):
+        if tag in JUNK_TAGS:
+            self.junk_depth += 1
+            return
+        if self.junk_depth:
+            return
+
+        if tag == 'body' and not self.body_started:
+            # Texto antes do <body> (ex.: <title>) não faz parte do corpo
+            self.body = _Scope()
+            self.body_started = True
+        elif tag == 'article':
+            if self.article is None:
+                self.article = _Scope()
+            self.article_depth += 1
+        elif tag == 'main' and not self.main_done:
+            if self.main is None:
+                self.main = _Scope()
+            self.main_depth += 1
+
+        for scope in self._active():
+            if tag in BLOCK_PREFIX:
+                scope.open_block(tag)
+            elif tag in LIST_TAGS:
+                scope.open_list()
+            elif tag in CLOSES_P and scope._top() == 'p':
+                scope.close_block('p')
+
+    def handle_endtag(self, tag):
+        if tag in JUNK_TAGS:
+            if self.junk_depth:
+                self.junk_depth -= 1
+            return
+        if self.junk_depth:
+            return
+
+        for scope in self._active():
+            if tag in BLOCK_PREFIX:
+                scope.close_block(tag)
+            elif tag in LIST_TAGS:
+                scope.close_list()
+
+        if tag == 'article' and self.article_depth:
+            self.article_depth -= 1
+            if not self.article_depth:
+                raise _ArticleDone()
+        elif tag == 'main' and self.main_depth:
+            self.main_depth -= 1
+            self.main_done = not self.main_depth
+        elif tag == 'body':
+            self.body_closed = True
+
+    def handle_data(self, data):
+        if self.junk_depth:
+            return
+        for scope in self._active():
+            scope.data(data)
+
+    def result(self):
+        scope = self.article or self.main or self.body
+        return scope.result()
+
+
+def extract_article(html):
+    """Extrai {'markdown', 'text', 'word_count'} de um HTML já decodificado."""
+    parser = ArticleExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except _ArticleDone:
+        pass
+    return parser.result()
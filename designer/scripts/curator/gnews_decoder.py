@@ -0,0 +1,85 @@
+"""
+Decodificação local dos links `news.google.com/rss/articles/<token>`.
+
+O token é um protobuf serializado em base64 url-safe. No formato clássico
+(`CBMi...`, `CAIi...`) a URL do publisher vem em claro dentro de um campo
+length-delimited, então dá para recuperá-la sem nenhuma requisição. O formato
+novo (payload começando com `AU_yqL`) só é resolvível pelo Google; nesse caso
+retornamos None e o chamador cai no fallback de rede.
+"""
+
+import base64
+import binascii
+import re
+from urllib.parse import urlparse
+
+TOKEN_RE = re.compile(r"/(?:rss/)?(?:articles|read)/([A-Za-z0-9_-]+)")
+
+# Tipos de campo do protobuf (wire types)
+WIRE_VARINT, WIRE_FIXED64, WIRE_LEN, WIRE_FIXED32 = 0, 1, 2, 5
+
+
+def _read_varint(data, pos):
+    result = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("varint truncado")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+        if shift > 63:
+            raise ValueError("varint longo demais")
+
+
+def _length_delimited_fields(data):
+    """Percorre os campos de primeiro nível e devolve os valores length-delimited."""
+    pos = 0
+    while pos < len(data):
+        key, pos = _read_varint(data, pos)
+        wire_type = key & 0x07
+        if wire_type == WIRE_VARINT:
+            _, pos = _read_varint(data, pos)
+        elif wire_type == WIRE_FIXED64:
+            pos += 8
+        elif wire_type == WIRE_FIXED32:
+            pos += 4
+        elif wire_type == WIRE_LEN:
+            length, pos = _read_varint(data, pos)
+            if pos + length > len(data):
+                raise ValueError("campo truncado")
+            yield data[pos:pos + length]
+            pos += length
+        else:
+            raise ValueError(f"wire type não suportado: {wire_type}")
+
+
+def decode_token(token):
+    """Recupera a URL do publisher a partir do token, ou None se não for possível."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (binascii.Error, ValueError):
+        return None
+
+    try:
+        for value in _length_delimited_fields(raw):
+            if value.startswith((b"http://", b"https://")):
+                url = value.decode("utf-8")
+                if urlparse(url).netloc:
+                    return url
+    except (ValueError, UnicodeDecodeError):
+        # Inclui o formato novo (AU_yqL...), que não carrega a URL em claro
+        return None
+    return None
+
+
+def decode_google_news_url(url):
+    """Decodifica um link de artigo do Google News sem acessar a rede."""
+    if "news.google.com" not in url:
+        return None
+    match = TOKEN_RE.search(urlparse(url).path)
+    if not match:
+        return None
+    return decode_token(match.group(1))
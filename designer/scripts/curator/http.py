@@ -0,0 +1,225 @@
+"""
+Camada HTTP compartilhada: sessão `requests` com pool de conexões keep-alive
+por host e cache de GET condicional (ETag / Last-Modified).
+
+Uso típico:
+
+    from curator import http
+    http.configure(pool_connections=32, pool_maxsize=8, cache_path=".cache/http.sqlite3")
+    resp = http.get(url, headers=headers, timeout=15, conditional=True)
+
+Com `conditional=True`, uma resposta já vista envia If-None-Match /
+If-Modified-Since; se o servidor responder 304, devolvemos o corpo guardado
+(com `resp.from_cache = True`) sem baixar o artigo de novo. Com `max_bytes`,
+o corpo é lido em streaming e cortado no limite. Toda resposta traz
+`resp.truncated`, verdadeiro só quando sobrou corpo depois do limite;
+corpos cortados não vão para o cache.
+
+O cache guarda corpos inteiros, então além do número de entradas ele tem um
+orçamento em bytes (`cache_max_bytes`): passando dele, saem as respostas
+menos usadas.
+
+Os scripts de pesquisa em prompts/ambientedeteste/scripts reutilizam esta
+mesma camada quando `requests` está instalado.
+"""
+
+import json
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from curator.sqlite_store import SqliteStore
+
+# Cabeçalhos da resposta que precisamos para reconstruí-la a partir do cache
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class HttpCache(SqliteStore):
+    """Respostas 200 com validadores, indexadas por URL, limitadas em entradas e em bytes."""
+
+    table = "http_responses"
+    schema = """
+    CREATE TABLE IF NOT EXISTS http_responses (
+        url TEXT PRIMARY KEY,
+        etag TEXT,
+        last_modified TEXT,
+        headers TEXT NOT NULL,
+        body BLOB NOT NULL,
+        expires_at REAL NOT NULL,
+        last_used REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_http_responses_last_used ON http_responses(last_used);
+    """
+
+    def __init__(self, path, ttl_seconds=7 * 86400, max_entries=5_000, max_bytes=256 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._written = 0
+        super().__init__(path, max_entries)
+
+    def get(self, url):
+        """Retorna (etag, last_modified, headers, body) ou None."""
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT etag, last_modified, headers, body, expires_at FROM http_responses WHERE url = ?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, headers, body, expires_at = row
+        with conn:
+            if expires_at < now:
+                self._delete(conn, url)
+                return None
+            self._touch(conn, url, now)
+        return etag, last_modified, json.loads(headers), body
+
+    def put(self, url, resp):
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        body = resp.content
+        if len(body) > self.max_bytes:
+            return
+        headers = {k: resp.headers[k] for k in STORED_HEADERS if k in resp.headers}
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO http_responses "
+                "(url, etag, last_modified, headers, body, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, json.dumps(headers), body,
+                 now + self.ttl_seconds, now),
+            )
+        self._written += len(body)
+        # Artigos grandes estouram o orçamento bem antes de 100 escritas
+        if self._written * 10 >= self.max_bytes:
+            self._written = 0
+            self.evict()
+        else:
+            self._after_put()
+
+    def evict(self):
+        """Poda por TTL e contagem, depois as menos usadas até caber em `max_bytes`."""
+        super().evict()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "DELETE FROM http_responses WHERE url IN ("
+                "SELECT url FROM ("
+                "SELECT url, SUM(length(body)) OVER (ORDER BY last_used DESC, url) AS total "
+                "FROM http_responses) WHERE total > ?)",
+                (self.max_bytes,),
+            )
+
+
+_lock = threading.Lock()
+_session = None
+_cache = None
+_pool_connections = 32
+_pool_maxsize = 8
+
+
+def configure(pool_connections=32, pool_maxsize=8, cache_path=None, cache_max_entries=5_000,
+              cache_max_bytes=256 * 1024 * 1024):
+    """
+    Ajusta o pool e o cache. `pool_connections` é quantos hosts mantêm pool
+    aberto; `pool_maxsize` é quantas conexões cada host pode reutilizar.
+    """
+    global _session, _cache, _pool_connections, _pool_maxsize
+    with _lock:
+        _pool_connections = pool_connections
+        _pool_maxsize = pool_maxsize
+        _cache = HttpCache(cache_path, max_entries=cache_max_entries, max_bytes=cache_max_bytes) if cache_path else None
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_session():
+    """Sessão compartilhada (thread-safe para GET/POST simples)."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=_pool_connections, pool_maxsize=_pool_maxsize)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def _from_cache(resp, cached):
+    _, _, headers, body = cached
+    cached_resp = requests.Response()
+    cached_resp.status_code = 200
+    cached_resp.url = resp.url
+    cached_resp.headers = CaseInsensitiveDict(headers)
+    cached_resp._content = body
+    cached_resp.encoding = requests.utils.get_encoding_from_headers(cached_resp.headers)
+    cached_resp.request = resp.request
+    cached_resp.from_cache = True
+    cached_resp.truncated = False
+    return cached_resp
+
+
+def _read_capped(resp, max_bytes):
+    chunks = []
+    size = 0
+    truncated = False
+    for chunk in resp.iter_content(chunk_size=64 * 1024):
+        if size + len(chunk) > max_bytes:
+            # Sobrou corpo depois do limite (um corpo de exatamente max_bytes não é cortado)
+            chunks.append(chunk[:max_bytes - size])
+            truncated = True
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+    resp._content = b"".join(chunks)
+    resp._content_consumed = True
+    resp.truncated = truncated
+    # Libera a conexão de volta ao pool (ou a descarta, se ficou corpo pendente)
+    resp.close()
+
+
+def get(url, headers=None, conditional=False, max_bytes=None, **kwargs):
+    """GET pela sessão compartilhada, opcionalmente condicional e limitado em bytes."""
+    session = get_session()
+    cached = _cache.get(url) if (conditional and _cache) else None
+
+    headers = dict(headers or {})
+    if cached:
+        etag, last_modified, _, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    if max_bytes:
+        kwargs["stream"] = True
+    resp = session.get(url, headers=headers, **kwargs)
+    if cached and resp.status_code == 304:
+        resp.close()
+        return _from_cache(resp, cached)
+
+    if max_bytes:
+        _read_capped(resp, max_bytes)
+    else:
+        resp.truncated = False
+    resp.from_cache = False
+    # Um corpo cortado não pode responder a um 304 futuro
+    if conditional and _cache and resp.status_code == 200 and not resp.truncated:
+        _cache.put(url, resp)
+    return resp
+
+
+def post(url, **kwargs):
+    """POST pela sessão compartilhada (sem cache)."""
+    return get_session().post(url, **kwargs)
@@ -0,0 +1,95 @@
+"""
+Protocolo de claim/lease para o news_curator_worker.
+
+Cada worker reserva um lote de alertas via RPC `claim_pending_alerts`
+(migração 20260202010000_alert_processing_leases.sql): o lote passa para
+`processing` com `leased_by` e `lease_expires_at`. Leases vencidos voltam a ser
+elegíveis, então um worker que morreu no meio do lote não trava os alertas.
+Um lease vencido conta como uma tentativa que falhou (migração
+20260202070000_count_expired_lease_attempts.sql): o alerta volta com
+`extraction_attempts` + 1 e, ao chegar em `max_attempts`, vai para `error`
+em vez de derrubar os workers para sempre.
+Num encerramento limpo (Ctrl+C, SIGTERM) o worker devolve com `release` o que
+não chegou a processar, sem esperar o lease vencer.
+
+Como tudo passa pelo PostgREST, dá para apontar SUPABASE_URL para um
+PostgREST local (sobre um Postgres com as migrações aplicadas) e rodar
+vários workers contra ele.
+
+A ordem do claim vem da migração 20260202050000_extraction_priority_queue.sql:
+alertas recentes (até `fresh_hours`) por prioridade (fonte, tamanho do
+cluster, idade) e uma faixa de backfill para os antigos, limitada a
+`backfill_share` do lote.
+"""
+
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# Campos que encerram o lease ao gravar o estado final do alerta
+LEASE_CLEARED = {'leased_by': None, 'lease_expires_at': None}
+
+
+def default_worker_id():
+    """Identificador único do processo: host, pid e um sufixo aleatório."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def published_at(alert):
+    """Data de publicação do alerta (`email_date`, senão `created_at`) em UTC."""
+    value = alert.get('email_date') or alert.get('created_at')
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def is_fresh(alert, fresh_hours, now=None):
+    dt = published_at(alert)
+    now = now or datetime.now(timezone.utc)
+    return dt is not None and dt >= now - timedelta(hours=fresh_hours)
+
+
+def queue_order(alert, fresh_hours, now):
+    """Chave de ordenação: recentes do mais novo ao mais velho, depois backfill do mais velho."""
+    dt = published_at(alert)
+    if dt is None:
+        return (2, 0.0)
+    age = (now - dt).total_seconds()
+    if is_fresh(alert, fresh_hours, now):
+        return (0, age)
+    return (1, -age)
+
+
+def claim_batch(client, worker_id, batch_size, lease_seconds, fresh_hours=48, backfill_share=0.2,
+                max_attempts=5):
+    """
+    Reserva atomicamente até `batch_size` alertas e retorna as linhas,
+    recentes primeiro (mais novos na frente), depois os de backfill.
+    """
+    response = client.rpc('claim_pending_alerts', {
+        'p_worker_id': worker_id,
+        'p_batch_size': batch_size,
+        'p_lease_seconds': lease_seconds,
+        'p_fresh_hours': fresh_hours,
+        'p_backfill_share': backfill_share,
+        'p_max_attempts': max_attempts,
+    }).execute()
+    alerts = response.data or []
+    # O UPDATE ... RETURNING não preserva a ordem da fila
+    now = datetime.now(timezone.utc)
+    alerts.sort(key=lambda alert: queue_order(alert, fresh_hours, now))
+    return alerts
+
+
+def release(client, alert_id, worker_id):
+    """Devolve um alerta reservado para a fila (`pending`)."""
+    client.rpc('release_alert_lease', {
+        'p_alert_id': alert_id,
+        'p_worker_id': worker_id,
+    }).execute()
+
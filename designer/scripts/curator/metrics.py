@@ -0,0 +1,158 @@
+"""
+Métricas de latência e vazão do worker, no formato texto do Prometheus.
+
+Cada etapa (resolve, download, parse, db_write e o alerta inteiro) alimenta
+um histograma `curator_stage_duration_seconds` rotulado por etapa, domínio do
+publisher e resultado. A exposição é opcional:
+
+- `serve(port)`: endpoint HTTP local em /metrics (thread daemon);
+- `write_periodically(path, interval)`: snapshot atômico em arquivo, no
+  formato do textfile collector do node_exporter.
+
+Sem dependências além da stdlib.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Acima disso os domínios novos entram como "other", para a cardinalidade não explodir
+MAX_DOMAINS = 200
+
+_lock = threading.Lock()
+_histograms = {}    # (stage, domain, outcome) -> [bucket counts..., sum, count]
+_domains = set()
+_started_at = time.time()
+
+
+def _domain_label(domain):
+    domain = domain or ""
+    if domain in _domains or not domain:
+        return domain
+    if len(_domains) >= MAX_DOMAINS:
+        return "other"
+    _domains.add(domain)
+    return domain
+
+
+def observe(stage, seconds, domain="", outcome="ok"):
+    """Registra uma observação de latência (e conta um evento)."""
+    with _lock:
+        key = (stage, _domain_label(domain), outcome)
+        values = _histograms.get(key)
+        if values is None:
+            values = _histograms[key] = [0] * len(BUCKETS) + [0.0, 0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                values[i] += 1
+        values[-2] += seconds
+        values[-1] += 1
+
+
+def observe_alert(domain, extraction, seconds):
+    """Latência do alerta inteiro, rotulada pelo domínio e pelo tipo de erro."""
+    outcome = "ok" if extraction.get("success") else extraction.get("error_kind", "other")
+    observe("alert", seconds, domain, outcome)
+
+
+class _Timer:
+    __slots__ = ("outcome",)
+
+    def __init__(self):
+        self.outcome = "ok"
+
+
+@contextmanager
+def timer(stage, domain=""):
+    """
+    Mede o bloco. O resultado padrão é "ok" (ou "error" se o bloco levantar);
+    o chamador pode trocá-lo via `t.outcome = ...`.
+    """
+    t = _Timer()
+    start = time.perf_counter()
+    try:
+        yield t
+    except Exception:
+        t.outcome = "error"
+        raise
+    finally:
+        observe(stage, time.perf_counter() - start, domain, t.outcome)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render():
+    """Texto no formato de exposição do Prometheus."""
+    lines = [
+        "# HELP curator_stage_duration_seconds Latency of each worker stage.",
+        "# TYPE curator_stage_duration_seconds histogram",
+    ]
+    with _lock:
+        items = sorted((key, list(values)) for key, values in _histograms.items())
+    for (stage, domain, outcome), values in items:
+        labels = f'stage="{_escape(stage)}",domain="{_escape(domain)}",outcome="{_escape(outcome)}"'
+        for bound, count in zip(BUCKETS, values):
+            lines.append(f'curator_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'curator_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {values[-1]}')
+        lines.append(f"curator_stage_duration_seconds_sum{{{labels}}} {values[-2]:.6f}")
+        lines.append(f"curator_stage_duration_seconds_count{{{labels}}} {values[-1]}")
+
+    lines += [
+        "# HELP curator_uptime_seconds Seconds since the worker started.",
+        "# TYPE curator_uptime_seconds gauge",
+        f"curator_uptime_seconds {time.time() - _started_at:.0f}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port, host="127.0.0.1"):
+    """Sobe o endpoint /metrics numa thread daemon e retorna o servidor."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    return server
+
+
+def write_file(path):
+    """Grava o snapshot atual de forma atômica (escreve num .tmp e renomeia)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp_path, path)
+
+
+def write_periodically(path, interval=15.0):
+    """Regrava o arquivo de métricas a cada `interval` segundos (thread daemon)."""
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                write_file(path)
+            except OSError as e:
+                print(f"⚠️ Erro ao gravar métricas em {path}: {e}")
+
+    threading.Thread(target=loop, daemon=True, name="metrics-file").start()
@@ -0,0 +1,163 @@
+"""
+Parsing de HTML e geração de markdown fora da thread do worker.
+
+O parsing em Python puro segura a GIL, então mais threads não ajudam: aqui ele
+roda em um pool de processos do tamanho da máquina. O backend é selecionável:
+
+- "stream": extrator de passada única de curator.extractor (padrão, sem deps)
+- "html.parser": BeautifulSoup com o parser da stdlib
+- "lxml": BeautifulSoup com lxml (pip install lxml)
+- "selectolax": parser lexbor, bem mais rápido (pip install selectolax)
+
+Os backends de árvore (html.parser, lxml, selectolax) produzem o mesmo
+`markdown`/`word_count` para HTML bem formado; em HTML quebrado cada parser
+pode reconstruir a árvore de um jeito diferente. O "stream" não repete itens
+de listas aninhadas. Em todos, o corpo é decodificado pelo charset do
+cabeçalho (ou do <meta>), sem adivinhação estatística.
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from curator import extractor
+
+JUNK_TAGS = ['script', 'style', 'nav', 'footer', 'iframe', 'noscript']
+BLOCK_TAGS = {'h1', 'h2', 'p', 'ul', 'ol'}
+
+
+def available_backends():
+    """Backends instalados neste ambiente."""
+    backends = ["stream", "html.parser"]
+    try:
+        import lxml  # noqa: F401
+        backends.append("lxml")
+    except ImportError:
+        pass
+    try:
+        import selectolax  # noqa: F401
+        backends.append("selectolax")
+    except ImportError:
+        pass
+    return backends
+
+
+def _markdown_line(name, text, items):
+    if name == 'h1':
+        return f"# {text.strip()}\n\n"
+    if name == 'h2':
+        return f"## {text.strip()}\n\n"
+    if name == 'p':
+        return f"{text.strip()}\n\n"
+    return "".join(f"- {li.strip()}\n" for li in items) + "\n"
+
+
+def _parse_bs4(content, parser):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, parser)
+
+    # Remove junk
+    for tag in soup(JUNK_TAGS):
+        tag.decompose()
+
+    # Get content
+    article = soup.find('article') or soup.find('main') or soup.body
+    if not article:
+        return "", ""
+
+    # Build simple markdown
+    parts = []
+    for elem in article.find_all(list(BLOCK_TAGS)):
+        items = [li.get_text() for li in elem.find_all('li')] if elem.name in ('ul', 'ol') else ()
+        parts.append(_markdown_line(elem.name, elem.get_text(), items))
+
+    return "".join(parts), article.get_text(separator=' ', strip=True)
+
+
+def _parse_selectolax(content):
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(content)
+    for node in tree.css(", ".join(JUNK_TAGS)):
+        node.decompose()
+
+    article = tree.css_first('article') or tree.css_first('main') or tree.body
+    if not article:
+        return "", ""
+
+    # traverse() percorre em ordem de documento, como o find_all do bs4
+    parts = []
+    for elem in article.traverse():
+        if elem is article or elem.tag not in BLOCK_TAGS:
+            continue
+        items = ()
+        if elem.tag in ('ul', 'ol'):
+            items = [li.text(deep=True) for li in elem.traverse() if li.tag == 'li' and li is not elem]
+        parts.append(_markdown_line(elem.tag, elem.text(deep=True), items))
+
+    return "".join(parts), article.text(deep=True, separator=' ', strip=True)
+
+
+def parse_article(content, backend="stream", content_type=None):
+    """Converte o HTML (bytes) em {'markdown', 'text', 'word_count'}."""
+    html = extractor.decode(content, content_type)
+    if backend == "stream":
+        return extractor.extract_article(html)
+    if backend == "selectolax":
+        markdown, text = _parse_selectolax(html)
+    else:
+        markdown, text = _parse_bs4(html, backend)
+    return {"markdown": markdown, "text": text, "word_count": len(text.split())}
+
+
+_lock = threading.Lock()
+_pool = None
+_workers = 0
+_backend = "stream"
+
+
+def configure(workers=None, backend="stream"):
+    """
+    `workers=None` usa um processo por núcleo; `workers=0` faz o parsing na
+    própria thread (útil para depurar).
+
+    Chame antes de abrir threads: o pool nasce aqui, e com fork os processos
+    são criados na hora, copiando um processo que ainda tem uma thread só.
+    """
+    global _pool, _workers, _backend
+    if backend not in available_backends():
+        raise ValueError(f"Backend de parsing indisponível: {backend} (instalados: {available_backends()})")
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+        _workers = (os.cpu_count() or 1) if workers is None else workers
+        _backend = backend
+        # Com spawn os filhos reimportam o __main__ e passam por aqui: só o processo principal abre o pool
+        if _workers > 0 and multiprocessing.parent_process() is None:
+            _pool = ProcessPoolExecutor(max_workers=_workers)
+            # Com fork o executor cria todos os processos no primeiro submit
+            _pool.submit(int).result()
+
+
+def shutdown():
+    """Encerra o pool (registrado no atexit)."""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown)
+
+
+def parse(content, content_type=None):
+    """Faz o parsing no pool de processos (ou inline, se desativado ou sem configure)."""
+    pool = _pool
+    if pool is None:
+        return parse_article(content, _backend, content_type)
+    return pool.submit(parse_article, content, _backend, content_type).result()
@@ -0,0 +1,47 @@
+"""
+Classificação de erros e política de retry das extrações.
+
+Cada falha ganha um tipo (timeout, http_4xx, http_5xx, consent, network,
+other) e um atraso exponencial até a próxima tentativa, gravado em
+`alerts.next_attempt_at`. Depois de `max_attempts` falhas, ou de um erro
+permanente (404, 410, 451), o alerta vai para o estado terminal `error` e
+para de ocupar a capacidade do worker.
+"""
+
+import random
+
+import requests
+
+PERMANENT_STATUS = {404, 410, 451}
+
+
+def classify_error(exc):
+    """Tipo do erro e status HTTP (se houver) de uma exceção de extração."""
+    if isinstance(exc, requests.Timeout):
+        return 'timeout', None
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+        return ('http_4xx' if status < 500 else 'http_5xx'), status
+    if isinstance(exc, requests.ConnectionError):
+        return 'network', None
+    return 'other', None
+
+
+class RetryPolicy:
+
+    def __init__(self, max_attempts=5, base_delay=300, max_delay=86400, factor=2.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.factor = factor
+
+    def retry_in(self, attempts, status=None):
+        """
+        Segundos até a próxima tentativa, dado o total de tentativas já feitas
+        (incluindo a atual), ou None se o alerta deve ir para `error`.
+        """
+        if status in PERMANENT_STATUS or attempts >= self.max_attempts:
+            return None
+        delay = min(self.max_delay, self.base_delay * self.factor ** (attempts - 1))
+        # Jitter para workers diferentes não baterem no mesmo host ao mesmo tempo
+        return int(delay * random.uniform(0.8, 1.2))
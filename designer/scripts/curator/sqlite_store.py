@@ -0,0 +1,68 @@
+"""
+Base dos caches em SQLite do worker.
+
+Um arquivo pode ser aberto por vários processos ao mesmo tempo (modo WAL) e
+cada thread usa a própria conexão. As tabelas seguem a mesma convenção:
+chave primária `url`, `expires_at` e `last_used`, o que permite expirar e
+podar por LRU de forma genérica.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+
+class SqliteStore:
+    """Cache persistente com TTL e limite de tamanho por LRU."""
+
+    table = None
+    schema = None
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._puts = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(self.schema)
+
+    def _conn(self):
+        # sqlite3 não compartilha conexões entre threads: uma por thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _touch(self, conn, url, now):
+        conn.execute(f"UPDATE {self.table} SET last_used = ? WHERE url = ?", (now, url))
+
+    def _delete(self, conn, url):
+        conn.execute(f"DELETE FROM {self.table} WHERE url = ?", (url,))
+
+    def _after_put(self):
+        self._puts += 1
+        # Poda amortizada: não vale um COUNT(*) a cada escrita
+        if self._puts % 100 == 0:
+            self.evict()
+
+    def evict(self):
+        """Remove entradas vencidas e, acima do limite, as menos usadas."""
+        conn = self._conn()
+        with conn:
+            conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (time.time(),))
+            (count,) = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    f"DELETE FROM {self.table} WHERE url IN ("
+                    f"SELECT url FROM {self.table} ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
@@ -0,0 +1,134 @@
+"""
+Normalização de texto e tokenização compartilhadas.
+
+Um único tokenizer para a clusterização (clustering/simulate_logic.py) e
+para os scripts de análise em prompts/ambientedeteste/scripts, para que
+todos vejam os mesmos tokens:
+
+- regex pré-compiladas;
+- stopwords PT/EN/ES unificadas, comparadas sem acento ("não" e "nao"
+  caem na mesma entrada);
+- acentos removidos: NFKD sem as marcas combinantes, como o antigo
+  `normalize_text` para o alfabeto latino, mas sem apagar letras de outros
+  alfabetos (cirílico, grego, CJK);
+- cache LRU para títulos/descrições repetidos (textos longos, como o
+  conteúdo extraído, não entram no cache);
+- `tokenize_many` para tokenizar uma lista inteira numa chamada;
+- `tokenize_with_surface` para quem conta pelo token sem acento mas
+  exibe a palavra como foi escrita.
+
+Só stdlib.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+# Sufixo do veículo nos títulos do Google News ("... - Folha", "... | G1")
+_SOURCE_DASH_RE = re.compile(r' - [^-]+$')
+_SOURCE_PIPE_RE = re.compile(r' \| [^|]+$')
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+
+CACHE_SIZE = 100_000
+# Acima disso o texto é tokenizado sem passar pelo cache
+CACHE_MAX_CHARS = 2_000
+
+_PT = """
+a o as os um uma uns umas de do da dos das em no na nos nas por pelo pela pelos
+pelas para com sem e ou se como mas que foi foram e sao ser estar ter haver sobre
+entre ate apos durante nao ao aos isso esse essa este esta mais muito ja tambem
+"""
+_EN = """
+the of and in to for on with at by from up about into over after or is it its as
+be has have had are was were an this that these those will can could would should
+"""
+_ES = """
+el la los las un una del en con por que se lo al es su sus
+"""
+# Nomes de veículos que sobram nos títulos
+_SOURCES = """
+times union journal blooberg bloomberg reuters cnn
+"""
+
+
+# Dakuten/handakuten: marcas combinantes, mas mudam a palavra ("ガイド" não é "カイト")
+_KEPT_MARKS = frozenset('\u3099\u309a')
+
+
+def fold(text):
+    """Minúsculas sem acentos: NFKD sem as marcas combinantes (categoria Mn), recomposto em NFC."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(c for c in decomposed if c in _KEPT_MARKS or unicodedata.category(c) != 'Mn')
+    return unicodedata.normalize('NFC', stripped).lower()
+
+
+STOPWORDS = frozenset(fold(w) for w in (_PT + _EN + _ES + _SOURCES).split())
+
+
+def strip_source(title):
+    """Remove o sufixo " - Veículo" / " | Veículo" de um título."""
+    title = _SOURCE_DASH_RE.sub('', title)
+    return _SOURCE_PIPE_RE.sub('', title)
+
+
+def _tokenize(text, min_length, strip_source_suffix, stopwords):
+    if strip_source_suffix:
+        text = strip_source(text)
+    text = fold(_NON_WORD_RE.sub(' ', text.lower()))
+    return tuple(
+        t for t in text.split()
+        if len(t) >= min_length and t not in STOPWORDS and t not in stopwords
+    )
+
+
+_tokenize_cached = lru_cache(maxsize=CACHE_SIZE)(_tokenize)
+
+
+def tokenize(text, min_length=3, strip_source_suffix=False, extra_stopwords=frozenset()):
+    """
+    Tokens de `text` (tupla): sem pontuação, sem acentos, sem stopwords e
+    com pelo menos `min_length` caracteres. `extra_stopwords` (já sem
+    acento) soma às stopwords comuns; passe um frozenset para usar o cache.
+    """
+    if not text:
+        return ()
+    if not isinstance(extra_stopwords, frozenset):
+        extra_stopwords = frozenset(extra_stopwords)
+    if len(text) > CACHE_MAX_CHARS:
+        return _tokenize(text, min_length, strip_source_suffix, extra_stopwords)
+    return _tokenize_cached(text, min_length, strip_source_suffix, extra_stopwords)
+
+
+def tokenize_with_surface(text, min_length=3, strip_source_suffix=False, extra_stopwords=frozenset()):
+    """
+    Pares (token, forma original) com os mesmos filtros de `tokenize`; a
+    forma é a palavra em minúsculas, ainda com acentos. Sem cache.
+    """
+    if not text:
+        return []
+    if strip_source_suffix:
+        text = strip_source(text)
+    pairs = []
+    for word in _NON_WORD_RE.sub(' ', text.lower()).split():
+        token = fold(word)
+        if len(token) >= min_length and token not in STOPWORDS and token not in extra_stopwords:
+            pairs.append((token, word))
+    return pairs
+
+
+def tokenize_many(texts, **kwargs):
+    """`tokenize` para uma lista; textos repetidos são tokenizados uma vez."""
+    seen = {}
+    result = []
+    for text in texts:
+        tokens = seen.get(text)
+        if tokens is None:
+            tokens = seen[text] = tokenize(text, **kwargs)
+        result.append(tokens)
+    return result
+
+
+def cache_info():
+    return _tokenize_cached.cache_info()
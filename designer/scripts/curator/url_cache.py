@@ -0,0 +1,66 @@
+"""
+Cache persistente (SQLite) de URLs do Google News já resolvidas.
+
+Um único arquivo é compartilhado por todos os processos do worker (modo WAL),
+com TTL, limite de tamanho por LRU e cache negativo: quando o Google responde
+com a página de consentimento, guardamos a falha por um TTL menor para não
+repetir a requisição de 10 s a cada ciclo.
+"""
+
+import time
+
+from curator.sqlite_store import SqliteStore
+
+
+class ResolvedUrlCache(SqliteStore):
+    """Mapa persistente URL original -> URL resolvida."""
+
+    table = "resolved_urls"
+    schema = """
+    CREATE TABLE IF NOT EXISTS resolved_urls (
+        url TEXT PRIMARY KEY,
+        resolved_url TEXT,          -- NULL = resolução falhou (cache negativo)
+        expires_at REAL NOT NULL,
+        last_used REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_resolved_urls_last_used ON resolved_urls(last_used);
+    """
+
+    def __init__(self, path, ttl_seconds=30 * 86400, negative_ttl_seconds=6 * 3600,
+                 max_entries=100_000):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        super().__init__(path, max_entries)
+
+    def get(self, url):
+        """
+        Retorna a URL resolvida, a própria `url` se houver uma falha em cache,
+        ou None se não houver entrada válida.
+        """
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT resolved_url, expires_at FROM resolved_urls WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        resolved_url, expires_at = row
+        with conn:
+            if expires_at < now:
+                self._delete(conn, url)
+                return None
+            self._touch(conn, url, now)
+        return resolved_url or url
+
+    def put(self, url, resolved_url):
+        """Grava uma resolução; `resolved_url=None` registra uma falha."""
+        now = time.time()
+        ttl = self.ttl_seconds if resolved_url else self.negative_ttl_seconds
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO resolved_urls (url, resolved_url, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (url, resolved_url, now + ttl, now),
+            )
+        self._after_put()
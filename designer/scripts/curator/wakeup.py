@@ -0,0 +1,170 @@
+"""
+Acordar o worker por eventos em vez do loop fixo de 5 minutos.
+
+Fontes de wake-up (todas opcionais, combináveis):
+
+- `listen_postgres(dsn, channel, event)`: LISTEN/NOTIFY no Postgres; a
+  migração 20260202040000_notify_new_alerts.sql faz `pg_notify` a cada alerta
+  novo em `pending`. Precisa de psycopg (v3) ou psycopg2 e de uma conexão
+  direta/session pooler (o pooler em modo transação não entrega NOTIFY).
+- `listen_udp(port, event)`: qualquer datagrama em 127.0.0.1:<port> acorda o
+  worker. Serve de stand-in local e deixa scripts de ingestão avisarem o
+  worker com `notify_udp(port)`.
+
+Sem notificação, o `AdaptivePoller` faz polling: o intervalo cresce enquanto
+não há trabalho e volta ao mínimo quando aparece.
+
+A conexão LISTEN pode morrer sem erro (TCP meio aberto atrás de um NAT ou
+pooler): `PostgresListener.reconnect()` derruba o socket para a thread
+reconectar, e o worker chama isso quando um ciclo falha por rede.
+"""
+
+import os
+import re
+import select
+import socket
+import threading
+import time
+
+CHANNEL_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class AdaptivePoller:
+    """Intervalo de polling que cresce quando ocioso e encolhe sob carga."""
+
+    def __init__(self, min_interval=2.0, max_interval=300.0, factor=2.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.interval = min_interval
+
+    def next_delay(self, found_work):
+        if found_work:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * self.factor)
+        return self.interval
+
+
+def _listen_psycopg3(dsn, channel, event, on_connect):
+    import psycopg
+
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        on_connect(conn)
+        conn.execute(f"LISTEN {channel}")
+        for _ in conn.notifies():
+            event.set()
+
+
+def _listen_psycopg2(dsn, channel, event, on_connect):
+    import psycopg2
+    import psycopg2.extensions
+
+    conn = psycopg2.connect(dsn)
+    try:
+        on_connect(conn)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {channel}")
+        while True:
+            if select.select([conn], [], [], 60) == ([], [], []):
+                continue
+            conn.poll()
+            if conn.notifies:
+                conn.notifies.clear()
+                event.set()
+    finally:
+        conn.close()
+
+
+class PostgresListener:
+    """Thread daemon de LISTEN que reconecta quando a conexão cai."""
+
+    def __init__(self, listen, dsn, channel, event, log=print):
+        self._listen = listen
+        self.dsn = dsn
+        self.channel = channel
+        self.event = event
+        self.log = log
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def start(self):
+        threading.Thread(target=self._loop, daemon=True, name="pg-listen").start()
+        return self
+
+    def _connected(self, conn):
+        with self._lock:
+            self._conn = conn
+
+    def reconnect(self):
+        """Derruba a conexão atual; a thread reconecta com o backoff de sempre."""
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            # shutdown no socket acorda a espera bloqueada do driver, que então levanta
+            with socket.socket(fileno=os.dup(conn.fileno())) as sock:
+                sock.shutdown(socket.SHUT_RDWR)
+        except Exception as e:
+            self.log(f"⚠️ Não foi possível derrubar a conexão LISTEN: {e}")
+
+    def _loop(self):
+        delay = 1
+        while True:
+            try:
+                self.log(f"👂 Escutando NOTIFY em '{self.channel}'")
+                try:
+                    self._listen(self.dsn, self.channel, self.event, self._connected)
+                finally:
+                    self._connected(None)
+                delay = 1
+            except Exception as e:
+                self.log(f"⚠️ Conexão LISTEN caiu ({e}); reconectando em {delay}s")
+                # Pode ter perdido notificações: força um ciclo
+                self.event.set()
+                time.sleep(delay)
+                delay = min(delay * 2, 60)
+
+
+def listen_postgres(dsn, channel, event, log=print):
+    """
+    Escuta `channel` numa thread daemon e seta `event` a cada NOTIFY.
+    Retorna o `PostgresListener`, ou None se nenhum driver Postgres estiver
+    instalado.
+    """
+    if not CHANNEL_RE.match(channel):
+        raise ValueError(f"Nome de canal inválido: {channel}")
+    try:
+        import psycopg  # noqa: F401
+        listen = _listen_psycopg3
+    except ImportError:
+        try:
+            import psycopg2  # noqa: F401
+            listen = _listen_psycopg2
+        except ImportError:
+            log("⚠️ psycopg/psycopg2 não instalado; LISTEN/NOTIFY desativado.")
+            return None
+
+    return PostgresListener(listen, dsn, channel, event, log).start()
+
+
+def listen_udp(port, event, host="127.0.0.1"):
+    """Seta `event` a cada datagrama recebido em host:port (thread daemon)."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((host, port))
+
+    def loop():
+        while True:
+            sock.recv(1024)
+            event.set()
+
+    threading.Thread(target=loop, daemon=True, name="udp-wake").start()
+    return sock
+
+
+def notify_udp(port, host="127.0.0.1"):
+    """Acorda um worker local que esteja escutando com `listen_udp`."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.sendto(b"wake", (host, port))
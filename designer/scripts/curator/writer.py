@@ -0,0 +1,160 @@
+"""
+Gravação em lote dos resultados de extração.
+
+Em vez de um upsert em `extracted_content` e um update em `alerts` por alerta
+(2N round trips), o worker acumula os resultados e grava o lote inteiro com
+uma chamada à RPC `complete_alert_extractions` (migração
+20260202020000_bulk_extraction_writeback.sql). O flush acontece quando o
+buffer atinge `max_rows`, quando o item mais antigo passa de `max_delay`
+segundos, ou no fim de cada ciclo.
+
+Sucessos gravam também `canonical_url` (migração
+20260202080000_alert_canonical_url.sql), a chave com que outros lotes
+encontram a extração pronta.
+
+Falhas levam o tipo do erro e o atraso da próxima tentativa calculado pela
+`RetryPolicy` (ou None, que manda o alerta para `error`).
+
+A RPC devolve ok/erro por linha. Uma linha cujo lease já não é deste worker
+(venceu e outro worker retomou o alerta) não é gravada e volta como
+`lease_lost`: o resultado é descartado e não conta como concluído.
+
+Se a chamada inteira falhar (rede, RPC ausente), o lote é regravado linha a
+linha, cada uma com o próprio tratamento de erro.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from curator import metrics
+from curator.dedup import canonical_url
+from curator.leases import LEASE_CLEARED
+from curator.retry import RetryPolicy
+
+# error_message da RPC para linhas cujo lease foi perdido
+LEASE_LOST = 'lease_lost'
+
+
+class ResultWriter:
+
+    def __init__(self, client, worker_id, max_rows=50, max_delay=2.0, retry_policy=None, log=print):
+        self.client = client
+        self.worker_id = worker_id
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.max_rows = max(1, max_rows)
+        self.max_delay = max_delay
+        self.log = log
+        self._lock = threading.Lock()
+        self._items = []
+        self._oldest = None
+        self.lease_lost = 0
+
+    def add(self, alert, clean_url, extraction):
+        """Enfileira o resultado de um alerta (pode disparar um flush) e o retorna."""
+        item = {
+            'alert_id': alert['id'],
+            'success': bool(extraction['success']),
+            'clean_url': clean_url,
+            'canonical_url': canonical_url(clean_url),
+        }
+        if extraction['success']:
+            item['markdown'] = extraction['markdown']
+            item['word_count'] = extraction['word_count']
+        else:
+            # A linha vem do claim: se foi retomada de um lease vencido, a tentativa perdida já está contada
+            attempts = (alert.get('extraction_attempts') or 0) + 1
+            item['attempts'] = attempts
+            item['error_kind'] = extraction.get('error_kind', 'other')
+            item['error'] = extraction.get('error')
+            item['retry_in_seconds'] = self.retry_policy.retry_in(attempts, extraction.get('status'))
+
+        with self._lock:
+            if not self._items:
+                self._oldest = time.monotonic()
+            self._items.append(item)
+            due = (len(self._items) >= self.max_rows
+                   or time.monotonic() - self._oldest >= self.max_delay)
+            batch = self._take() if due else None
+        if batch:
+            self._write(batch)
+        return item
+
+    def flush(self):
+        """Grava o que estiver no buffer."""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._write(batch)
+
+    def _take(self):
+        batch, self._items = self._items, []
+        self._oldest = None
+        return batch
+
+    def _write(self, batch):
+        try:
+            with metrics.timer('db_write'):
+                response = self.client.rpc('complete_alert_extractions', {
+                    'p_worker_id': self.worker_id,
+                    'p_items': batch,
+                }).execute()
+        except Exception as e:
+            self.log(f"⚠️ Gravação em lote falhou ({e}); gravando {len(batch)} linhas individualmente.")
+            for item in batch:
+                self._write_row(item)
+            return
+
+        for row in response.data or []:
+            if row.get('ok'):
+                continue
+            if row.get('error_message') == LEASE_LOST:
+                self._lost(row.get('item_alert_id'))
+            else:
+                self.log(f"❌ Falha ao gravar alerta {row.get('item_alert_id')}: {row.get('error_message')}")
+
+    def _lost(self, alert_id):
+        with self._lock:
+            self.lease_lost += 1
+        metrics.observe('db_write', 0.0, outcome=LEASE_LOST)
+        self.log(f"⚠️ Lease do alerta {alert_id} perdido (outro worker o retomou); resultado descartado.")
+
+    def _write_row(self, item):
+        try:
+            if item['success']:
+                # Primeiro o update guardado pelo lease; sem lease, o conteúdo não é gravado
+                response = self.client.table('alerts').update({
+                    'status': 'extracted',
+                    'clean_url': item['clean_url'],
+                    'canonical_url': item['canonical_url'],
+                    **LEASE_CLEARED
+                }).eq('id', item['alert_id']).eq('leased_by', self.worker_id).execute()
+                if not response.data:
+                    self._lost(item['alert_id'])
+                    return
+
+                self.client.table('extracted_content').upsert({
+                    'alert_id': item['alert_id'],
+                    'markdown_content': item['markdown'],
+                    'cleaned_content': item['markdown'], # Simple dup for now
+                    'word_count': item['word_count'],
+                    'extraction_status': 'completed',
+                    'extracted_at': 'now()'
+                }, on_conflict='alert_id').execute()
+            else:
+                retry_in = item['retry_in_seconds']
+                next_attempt_at = None
+                if retry_in is not None:
+                    next_attempt_at = (datetime.now(timezone.utc) + timedelta(seconds=retry_in)).isoformat()
+                response = self.client.table('alerts').update({
+                    'status': 'pending' if retry_in is not None else 'error',
+                    'extraction_attempts': item['attempts'],
+                    'next_attempt_at': next_attempt_at,
+                    'last_error_kind': item['error_kind'],
+                    'last_error': (item['error'] or '')[:1000],
+                    **LEASE_CLEARED
+                }).eq('id', item['alert_id']).eq('leased_by', self.worker_id).execute()
+                if not response.data:
+                    self._lost(item['alert_id'])
+        except Exception as e:
+            self.log(f"❌ Falha ao gravar alerta {item['alert_id']}: {e}")
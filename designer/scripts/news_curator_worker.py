@@ -1,154 +1,406 @@
 import os
+import signal
+import sys
+import threading
 import time
 import schedule
-import requests
-from bs4 import BeautifulSoup
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from urllib.parse import urlparse, parse_qs, unquote
 
+from curator import http, metrics, parsing
+from curator.dedup import SingleFlightMemo, canonical_url, find_existing_extractions
+from curator.engine import host_of, host_slot, run_concurrent
+from curator.gnews_decoder import decode_google_news_url
+from curator.leases import claim_batch, default_worker_id, release
+from curator.retry import RetryPolicy, classify_error
+from curator.url_cache import ResolvedUrlCache
+from curator.wakeup import AdaptivePoller, listen_postgres, listen_udp
+from curator.writer import ResultWriter
+
 # Load environment variables
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
+# Concorrência: 1 mantém o loop sequencial; >1 ativa o motor asyncio
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "1"))
+WORKER_PER_HOST_LIMIT = int(os.getenv("WORKER_PER_HOST_LIMIT", "2"))
+WORKER_BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", "5"))
+
+# Lease: cada processo reserva seu lote; o lease deve cobrir a duração do lote
+WORKER_ID = os.getenv("WORKER_ID") or default_worker_id()
+WORKER_LEASE_SECONDS = int(os.getenv("WORKER_LEASE_SECONDS", "300"))
+
+# Fila com prioridade: alertas mais velhos que isso vão para a faixa de backfill,
+# que fica com no máximo PRIORITY_BACKFILL_SHARE de cada lote
+PRIORITY_FRESH_HOURS = int(os.getenv("PRIORITY_FRESH_HOURS", "48"))
+PRIORITY_BACKFILL_SHARE = float(os.getenv("PRIORITY_BACKFILL_SHARE", "0.2"))
+
+# Gravação em lote no Supabase: flush por tamanho ou por tempo
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "50"))
+WRITE_FLUSH_SECONDS = float(os.getenv("WRITE_FLUSH_SECONDS", "2"))
+
+# Retry com backoff exponencial; depois de N falhas o alerta vai para 'error'
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "5"))
+RETRY_BASE_DELAY_SECONDS = int(os.getenv("RETRY_BASE_DELAY_SECONDS", "300"))
+RETRY_MAX_DELAY_SECONDS = int(os.getenv("RETRY_MAX_DELAY_SECONDS", "86400"))
+
+# Extração única por URL canônica; a consulta ao banco (uma por lote) cobre outros lotes/processos
+DEDUP_MEMO_MAX_ENTRIES = int(os.getenv("DEDUP_MEMO_MAX_ENTRIES", "5000"))
+DEDUP_DB_LOOKUP = os.getenv("DEDUP_DB_LOOKUP", "1") == "1"
+
+# Métricas por etapa: endpoint Prometheus local e/ou arquivo de snapshot (vazio desativa)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+METRICS_FILE_INTERVAL = float(os.getenv("METRICS_FILE_INTERVAL", "15"))
+
+# Cache de resoluções do Google News, compartilhado entre processos (vazio desativa)
+RESOLVE_CACHE_PATH = os.getenv(
+    "RESOLVE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "resolved_urls.sqlite3"),
+)
+RESOLVE_CACHE_TTL_HOURS = float(os.getenv("RESOLVE_CACHE_TTL_HOURS", "720"))
+RESOLVE_CACHE_MAX_ENTRIES = int(os.getenv("RESOLVE_CACHE_MAX_ENTRIES", "100000"))
+
+# Pool HTTP keep-alive e cache de GET condicional (ETag/Last-Modified; vazio desativa)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "32"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", str(max(WORKER_PER_HOST_LIMIT, 4))))
+HTTP_CACHE_PATH = os.getenv(
+    "HTTP_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "http_cache.sqlite3"),
+)
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "5000"))
+HTTP_CACHE_MAX_MB = int(os.getenv("HTTP_CACHE_MAX_MB", "256"))
+
+# Parsing em pool de processos; backend: stream, html.parser, lxml ou selectolax
+PARSER_BACKEND = os.getenv("PARSER_BACKEND", "stream")
+PARSE_WORKERS = int(os.environ["PARSE_WORKERS"]) if os.getenv("PARSE_WORKERS") else None
+# Páginas maiores que isso são cortadas no download
+EXTRACT_MAX_BYTES = int(os.getenv("EXTRACT_MAX_BYTES", str(2 * 1024 * 1024)))
+
+# Modo do loop: "events" (NOTIFY/UDP + polling adaptativo) ou "schedule" (fixo a cada 5 min)
+WORKER_MODE = os.getenv("WORKER_MODE", "events")
+# Conexão Postgres direta para LISTEN/NOTIFY (vazio desativa)
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+WAKE_CHANNEL = os.getenv("WAKE_CHANNEL", "new_alert")
+# Porta UDP local para acordar o worker (0 desativa)
+WAKE_UDP_PORT = int(os.getenv("WAKE_UDP_PORT", "0"))
+POLL_MIN_SECONDS = float(os.getenv("POLL_MIN_SECONDS", "2"))
+POLL_MAX_SECONDS = float(os.getenv("POLL_MAX_SECONDS", "300"))
+
 if not SUPABASE_URL or not SUPABASE_KEY:
     print("❌ Erro: SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY são obrigatórios no .env")
     exit(1)
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-def resolve_google_news_url(url):
+resolve_cache = ResolvedUrlCache(
+    RESOLVE_CACHE_PATH,
+    ttl_seconds=RESOLVE_CACHE_TTL_HOURS * 3600,
+    max_entries=RESOLVE_CACHE_MAX_ENTRIES,
+) if RESOLVE_CACHE_PATH else None
+
+http.configure(
+    pool_connections=HTTP_POOL_CONNECTIONS,
+    pool_maxsize=HTTP_POOL_MAXSIZE,
+    cache_path=HTTP_CACHE_PATH or None,
+    cache_max_entries=HTTP_CACHE_MAX_ENTRIES,
+    cache_max_bytes=HTTP_CACHE_MAX_MB * 1024 * 1024,
+)
+
+parsing.configure(workers=PARSE_WORKERS, backend=PARSER_BACKEND)
+
+extraction_memo = SingleFlightMemo(max_entries=DEDUP_MEMO_MAX_ENTRIES)
+
+writer = ResultWriter(
+    supabase,
+    WORKER_ID,
+    max_rows=WRITE_BATCH_SIZE,
+    max_delay=WRITE_FLUSH_SECONDS,
+    retry_policy=RetryPolicy(
+        max_attempts=RETRY_MAX_ATTEMPTS,
+        base_delay=RETRY_BASE_DELAY_SECONDS,
+        max_delay=RETRY_MAX_DELAY_SECONDS,
+    ),
+)
+
+def resolve_google_news_url(url, log=print):
     """Resolve Google News URLs robustly."""
-    if "news.google.com" not in url and "google.com/url" not in url:
-        return url
+    start = time.perf_counter()
+    resolved, strategy = _resolve_google_news_url(url, log)
+    metrics.observe('resolve', time.perf_counter() - start, host_of(url), strategy)
+    return resolved
+
+def _resolve_google_news_url(url, log):
+    """Returns (resolved_url, strategy used)."""
+    resolved = _resolve_offline(url)
+    if resolved:
+        return resolved
+
+    log(f"Resolvendo URL: {url}")
 
-    print(f"Resolvendo URL: {url}")
+    # Strategy 3: Network Request (only when decoding fails)
+    try:
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+        }
+        # Only this request counts against the news.google.com host limit
+        with host_slot(url):
+            resp = http.get(url, headers=headers, allow_redirects=True, timeout=10)
+        final_url = resp.url
+        # Consent page: cache the failure too (shorter TTL) so we don't retry every cycle
+        resolved = final_url if "consent.google.com" not in final_url else None
+        if resolve_cache:
+            resolve_cache.put(url, resolved)
+        if resolved:
+            return resolved, 'network'
+        return url, 'consent'
+    except Exception as e:
+        log(f"⚠️ Erro ao resolver URL: {e}")
     
+    return url, 'error'
+
+def _resolve_offline(url):
+    """(resolved_url, strategy) when no request is needed, else None."""
+    if "news.google.com" not in url and "google.com/url" not in url:
+        return url, 'passthrough'
+
     # Strategy 1: URL Param
     try:
         parsed = urlparse(url)
         params = parse_qs(parsed.query)
         if 'url' in params:
-            return unquote(params['url'][0])
+            return unquote(params['url'][0]), 'param'
     except Exception:
         pass
 
-    # Strategy 2: Network Request
+    # Strategy 2: Decode the article token locally (no HTTP round trip)
+    decoded = decode_google_news_url(url)
+    if decoded:
+        return decoded, 'decoded'
+
+    cached = resolve_cache.get(url) if resolve_cache else None
+    if cached is not None:
+        return cached, 'cache'
+    return None
+
+def extract_content(url, log=print):
+    """Extracts the article once per canonical URL and reuses it for every alert sharing it."""
+    extraction, reused = extraction_memo.get_or_compute(
+        canonical_url(url),
+        lambda: _extract_or_reuse(url, log),
+        keep=lambda result: result['success'],
+    )
+    if reused:
+        log("♻️ Conteúdo reaproveitado de outro alerta com a mesma URL.")
+        metrics.observe('reuse', 0.0, host_of(url), 'memo')
+    return extraction
+
+# Extrações já gravadas para as URLs do lote atual: canonical_url -> extração
+_known_extractions = {}
+
+def prefetch_existing_extractions(alerts):
+    """One query per batch for the alerts whose URL resolves without a request."""
+    global _known_extractions
+    keys = []
+    for alert in alerts:
+        resolved = _resolve_offline(alert.get('url') or '')
+        if resolved:
+            keys.append(canonical_url(resolved[0]))
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
-        resp = requests.get(url, headers=headers, allow_redirects=True, timeout=10)
-        final_url = resp.url
-        if "consent.google.com" not in final_url:
-             return final_url
+        _known_extractions = find_existing_extractions(supabase, keys)
     except Exception as e:
-        print(f"⚠️ Erro ao resolver URL: {e}")
-    
-    return url
+        print(f"⚠️ Erro ao buscar extrações existentes: {e}")
+        _known_extractions = {}
+
+def _extract_or_reuse(url, log):
+    existing = _known_extractions.get(canonical_url(url))
+    if existing:
+        log("♻️ Conteúdo já extraído para esta URL; reaproveitando.")
+        metrics.observe('reuse', 0.0, host_of(url), 'db')
+        return existing
+    return download_and_parse(url, log)
 
-def extract_content(url):
-    """Extracts title and content from URL using BeautifulSoup."""
+def download_and_parse(url, log=print):
+    """Downloads the URL and extracts its content as markdown."""
+    domain = host_of(url)
     try:
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
         }
-        resp = requests.get(url, headers=headers, timeout=15)
-        resp.raise_for_status()
+        # Conditional GET (an unchanged article costs a 304), streamed up to a byte cap;
+        # the publisher's host slot is held for the download only, not the parse
+        with host_slot(url), metrics.timer('download', domain) as t:
+            resp = http.get(url, headers=headers, timeout=15, conditional=True, max_bytes=EXTRACT_MAX_BYTES)
+            resp.raise_for_status()
+            if resp.from_cache:
+                t.outcome = 'not_modified'
+        if "consent.google.com" in resp.url:
+            log("❌ Caiu na página de consentimento do Google.")
+            return {"success": False, "error": f"consent page: {resp.url}", "error_kind": "consent", "status": None}
         
-        soup = BeautifulSoup(resp.content, 'html.parser')
-        
-        # Remove junk
-        for tag in soup(['script', 'style', 'nav', 'footer', 'iframe', 'noscript']):
-            tag.decompose()
-            
-        # Get content
-        article = soup.find('article') or soup.find('main') or soup.body
-        
-        text_content = ""
-        markdown_content = ""
-        
-        if article:
-            # Build simple markdown
-            for elem in article.find_all(['h1', 'h2', 'p', 'ul', 'ol']):
-                if elem.name == 'h1':
-                    markdown_content += f"# {elem.get_text().strip()}\n\n"
-                elif elem.name == 'h2':
-                    markdown_content += f"## {elem.get_text().strip()}\n\n"
-                elif elem.name == 'p':
-                    markdown_content += f"{elem.get_text().strip()}\n\n"
-                elif elem.name in ['ul', 'ol']:
-                    for li in elem.find_all('li'):
-                        markdown_content += f"- {li.get_text().strip()}\n"
-                    markdown_content += "\n"
-                    
-            text_content = article.get_text(separator=' ', strip=True)
-            
-        word_count = len(text_content.split())
+        # Parse + markdown run in the process pool (CPU-bound, holds the GIL)
+        with metrics.timer('parse', domain):
+            parsed = parsing.parse(resp.content, resp.headers.get('Content-Type'))
         return {
-            "markdown": markdown_content,
-            "word_count": word_count,
+            "markdown": parsed["markdown"],
+            "word_count": parsed["word_count"],
             "success": True
         }
         
     except Exception as e:
-        print(f"❌ Erro na extração: {e}")
-        return {"success": False, "error": str(e)}
+        log(f"❌ Erro na extração: {e}")
+        error_kind, status = classify_error(e)
+        return {"success": False, "error": str(e), "error_kind": error_kind, "status": status}
+
+def save_extraction(alert, clean_url, extraction, log=print):
+    """Queues the extraction result for one alert (written back in bulk)."""
+    item = writer.add(alert, clean_url, extraction)
+    if extraction['success']:
+        log("✅ Conteúdo extraído com sucesso.")
+    elif item['retry_in_seconds'] is None:
+        log(f"❌ Falha na extração ({item['error_kind']}). Tentativa {item['attempts']}: alerta marcado como 'error'.")
+    else:
+        log(f"❌ Falha na extração ({item['error_kind']}). Tentativa {item['attempts']}: "
+            f"nova tentativa em {item['retry_in_seconds'] // 60} min.")
+
+def process_alert(alert, log=print):
+    """Resolves, extracts and saves a single alert."""
+    log(f"👉 Processando: {alert.get('title', 'Sem título')}")
+    start = time.perf_counter()
+    
+    original_url = alert.get('url')
+    clean_url = resolve_google_news_url(original_url, log)
+    
+    # Extract
+    extraction = extract_content(clean_url, log)
+    save_extraction(alert, clean_url, extraction, log)
+    metrics.observe_alert(host_of(clean_url), extraction, time.perf_counter() - start)
+    return extraction['success']
 
 def process_pending_alerts():
-    """Fetches 'pending' alerts and extracts content."""
+    """Claims a batch of 'pending' alerts and extracts content. Returns the batch size."""
     print("🔍 Buscando alertas pendentes...")
     
-    response = supabase.table('alerts').select("*").eq('status', 'pending').limit(5).execute()
-    alerts = response.data
+    alerts = claim_batch(
+        supabase, WORKER_ID, WORKER_BATCH_SIZE, WORKER_LEASE_SECONDS,
+        fresh_hours=PRIORITY_FRESH_HOURS,
+        backfill_share=PRIORITY_BACKFILL_SHARE,
+        max_attempts=RETRY_MAX_ATTEMPTS,
+    )
     
     if not alerts:
         print("✅ Nenhum alerta pendente.")
-        return
+        return 0
 
-    for alert in alerts:
-        print(f"👉 Processando: {alert.get('title', 'Sem título')}")
-        
-        original_url = alert.get('url')
-        clean_url = resolve_google_news_url(original_url)
-        
-        # Extract
-        extraction = extract_content(clean_url)
-        
-        if extraction['success']:
-            # Save extracted content
-            supabase.table('extracted_content').upsert({
-                'alert_id': alert['id'],
-                'markdown_content': extraction['markdown'],
-                'cleaned_content': extraction['markdown'], # Simple dup for now
-                'word_count': extraction['word_count'],
-                'extraction_status': 'completed',
-                'extracted_at': 'now()'
-            }, on_conflict='alert_id').execute()
-            
-            # Update alert
-            supabase.table('alerts').update({
-                'status': 'extracted',
-                'clean_url': clean_url
-            }).eq('id', alert['id']).execute()
-            
-            print("✅ Conteúdo extraído com sucesso.")
+    if DEDUP_DB_LOOKUP:
+        prefetch_existing_extractions(alerts)
+
+    finished = set()
+
+    def save(alert, clean_url, extraction, log=print):
+        save_extraction(alert, clean_url, extraction, log)
+        finished.add(alert['id'])
+
+    try:
+        if WORKER_CONCURRENCY > 1:
+            run_concurrent(
+                alerts,
+                resolve_google_news_url,
+                extract_content,
+                save,
+                concurrency=WORKER_CONCURRENCY,
+                per_host=WORKER_PER_HOST_LIMIT,
+            )
         else:
-            print("❌ Falha na extração.")
-            # Optional: Mark as error or retry later
-            # supabase.table('alerts').update({'status': 'error'}).eq('id', alert['id']).execute()
+            for alert in alerts:
+                process_alert(alert)
+                finished.add(alert['id'])
+    except BaseException:
+        # Encerramento (Ctrl+C, SIGTERM) ou erro no meio do lote: grava o que
+        # terminou e devolve o resto sem esperar o lease vencer
+        writer.flush()
+        release_unfinished([alert for alert in alerts if alert['id'] not in finished])
+        raise
+
+    writer.flush()
+    return len(alerts)
+
+def release_unfinished(alerts):
+    """Gives claimed alerts back to the queue (no attempt is counted)."""
+    if alerts:
+        print(f"🛑 Devolvendo {len(alerts)} alertas à fila.")
+    for alert in alerts:
+        try:
+            release(supabase, alert['id'], WORKER_ID)
+        except Exception as e:
+            print(f"⚠️ Falha ao devolver alerta {alert['id']}: {e}")
+
+def start_metrics():
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+        print(f"📈 Métricas em http://127.0.0.1:{METRICS_PORT}/metrics")
+    if METRICS_FILE:
+        metrics.write_periodically(METRICS_FILE, METRICS_FILE_INTERVAL)
+        print(f"📈 Métricas gravadas em {METRICS_FILE} a cada {METRICS_FILE_INTERVAL:.0f}s")
 
 def run_scheduler():
+    start_metrics()
     schedule.every(5).minutes.do(process_pending_alerts)
     
-    print("🚀 Worker iniciado. Rodando a cada 5 minutos.")
+    print(f"🚀 Worker {WORKER_ID} iniciado. Rodando a cada 5 minutos.")
     process_pending_alerts() # Run once immediately
     
     while True:
         schedule.run_pending()
         time.sleep(1)
 
+def run_event_loop():
+    """
+    Drains the queue while claims come back full, then sleeps until a NOTIFY,
+    a local UDP ping or the adaptive poll interval, whichever comes first.
+    """
+    start_metrics()
+    wake = threading.Event()
+    sources = []
+    listener = listen_postgres(DATABASE_URL, WAKE_CHANNEL, wake) if DATABASE_URL else None
+    if listener:
+        sources.append(f"NOTIFY {WAKE_CHANNEL}")
+    if WAKE_UDP_PORT:
+        listen_udp(WAKE_UDP_PORT, wake)
+        sources.append(f"UDP {WAKE_UDP_PORT}")
+    poller = AdaptivePoller(POLL_MIN_SECONDS, POLL_MAX_SECONDS)
+
+    print(f"🚀 Worker {WORKER_ID} iniciado. Wake-up: {', '.join(sources) or 'só polling'}; "
+          f"polling entre {POLL_MIN_SECONDS:.0f}s e {POLL_MAX_SECONDS:.0f}s.")
+
+    while True:
+        wake.clear()
+        try:
+            claimed = process_pending_alerts()
+        except Exception as e:
+            # Erro transitório (PostgREST, rede): o lote já foi devolvido; espera com backoff
+            # e reabre o LISTEN, que pode ter caído junto sem avisar
+            delay = poller.next_delay(False)
+            print(f"❌ Erro no ciclo: {e}. Nova tentativa em {delay:.0f}s.")
+            if listener:
+                listener.reconnect()
+            time.sleep(delay)
+            continue
+        if claimed >= WORKER_BATCH_SIZE:
+            # Lote cheio: provavelmente há mais, segue drenando sem dormir
+            poller.next_delay(True)
+            continue
+        delay = poller.next_delay(claimed > 0)
+        if wake.wait(delay):
+            print("🔔 Novo alerta notificado.")
+
 if __name__ == "__main__":
-    run_scheduler()
+    # SIGTERM (docker stop, systemd) encerra como Ctrl+C, devolvendo o lote em andamento
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    if WORKER_MODE == "schedule":
+        run_scheduler()
+    else:
+        run_event_loop()
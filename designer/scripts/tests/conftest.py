@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The worker and its tests import the curator package from designer/scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
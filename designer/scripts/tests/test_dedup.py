@@ -0,0 +1,82 @@
+import threading
+from concurrent.futures import Future
+
+from curator import dedup
+from curator.dedup import SingleFlightMemo, canonical_url
+
+KEEP = lambda result: result["success"]
+OWN = {"success": True, "markdown": "own"}
+
+
+def _leader_and_waiter(monkeypatch, leader_result):
+    """A waiter joins key "k" while the leader computes `leader_result`."""
+    waiting = threading.Event()
+
+    class SignallingFuture(Future):
+        def result(self, timeout=None):
+            waiting.set()
+            return super().result(timeout)
+
+    monkeypatch.setattr(dedup, "Future", SignallingFuture)
+    memo = SingleFlightMemo()
+    started = threading.Event()
+    calls, outcome = [], {}
+
+    def leader_compute():
+        calls.append("leader")
+        started.set()
+        assert waiting.wait(5)
+        if isinstance(leader_result, Exception):
+            raise leader_result
+        return leader_result
+
+    def waiter_compute():
+        calls.append("waiter")
+        return OWN
+
+    def leader():
+        try:
+            outcome["leader"] = memo.get_or_compute("k", leader_compute, keep=KEEP)
+        except RuntimeError as e:
+            outcome["leader"] = e
+
+    def waiter():
+        outcome["waiter"] = memo.get_or_compute("k", waiter_compute, keep=KEEP)
+
+    threads = [threading.Thread(target=leader), threading.Thread(target=waiter)]
+    threads[0].start()
+    assert started.wait(5)
+    threads[1].start()
+    for thread in threads:
+        thread.join(5)
+    return outcome, calls
+
+
+def test_waiter_reuses_successful_leader(monkeypatch):
+    outcome, calls = _leader_and_waiter(monkeypatch, {"success": True, "markdown": "x"})
+    assert calls == ["leader"]
+    assert outcome["waiter"] == ({"success": True, "markdown": "x"}, True)
+
+
+def test_waiter_computes_itself_after_failed_leader(monkeypatch):
+    outcome, calls = _leader_and_waiter(monkeypatch, {"success": False, "error": "timeout"})
+    assert calls == ["leader", "waiter"]
+    assert outcome["waiter"] == (OWN, False)
+
+
+def test_waiter_computes_itself_after_leader_raised(monkeypatch):
+    outcome, calls = _leader_and_waiter(monkeypatch, RuntimeError("boom"))
+    assert isinstance(outcome["leader"], RuntimeError)
+    assert calls == ["leader", "waiter"]
+    assert outcome["waiter"] == (OWN, False)
+
+
+def test_failed_result_is_not_memoized():
+    memo = SingleFlightMemo()
+    assert memo.get_or_compute("k", lambda: {"success": False}, keep=KEEP) == ({"success": False}, False)
+    assert memo.get_or_compute("k", lambda: OWN, keep=KEEP) == (OWN, False)
+    assert memo.get_or_compute("k", lambda: {"success": False}, keep=KEEP) == (OWN, True)
+
+
+def test_canonical_url_drops_tracking():
+    assert canonical_url("http://www.Example.com/a/?utm_source=x&id=2&fbclid=y#top") == "https://example.com/a?id=2"
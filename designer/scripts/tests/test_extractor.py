@@ -0,0 +1,103 @@
+import pytest
+
+from curator import extractor, parsing
+
+# Casos em que o extrator de passada única reproduz o BeautifulSoup antigo
+SAME_AS_BS4 = {
+    "article": (
+        "<html><head><title>T</title></head><body><nav><p>menu</p></nav>"
+        "<main><p>main text</p></main>"
+        "<article><h1>Título</h1><p>Primeiro <b>parágrafo</b>.</p><script>var x=1;</script>"
+        "<h2>Sub</h2><ul><li>um</li><li>dois</li></ul><p>fim</p></article>"
+        "<footer><p>rodapé</p></footer></body></html>"
+    ),
+    "main": "<html><body><div><p>fora</p></div><main><h1>Main</h1><p>Texto do main</p></main><p>depois</p></body></html>",
+    "body": (
+        "<html><head><title>Título da aba</title></head><body><h2>Corpo</h2><p>Só body.</p>"
+        "<ol><li>a</li><li>b</ol><p>x</p></body></html>"
+    ),
+    "junk-in-scope": (
+        "<body><article><p>antes</p><nav><p>nav</p><nav><p>nav2</p></nav><p>nav3</p></nav>"
+        "<noscript><p>ns</p></noscript><p>depois</p></article></body>"
+    ),
+    "nested-article": (
+        "<body><article><p>externo</p><article><p>interno</p></article><p>externo 2</p></article>"
+        "<article><p>segundo</p></article></body>"
+    ),
+    "article-in-main": "<body><main><p>m1</p><article><p>a1</p></article><p>m2</p></main></body>",
+}
+
+
+@pytest.mark.parametrize("name", SAME_AS_BS4)
+def test_stream_matches_bs4(name):
+    pytest.importorskip("bs4")
+    content = SAME_AS_BS4[name].encode()
+    assert parsing.parse_article(content, "stream") == parsing.parse_article(content, "html.parser")
+
+
+def test_article_scope():
+    result = extractor.extract_article(SAME_AS_BS4["article"])
+    assert result["markdown"] == "# Título\n\nPrimeiro parágrafo.\n\n## Sub\n\n- um\n- dois\n\nfim\n\n"
+    # Como no get_text(separator=' ') antigo, cada nó de texto vira um fragmento
+    assert result["text"] == "Título Primeiro parágrafo . Sub um dois fim"
+    assert result["word_count"] == 8
+
+
+def test_main_scope_without_article():
+    assert extractor.extract_article(SAME_AS_BS4["main"])["markdown"] == "# Main\n\nTexto do main\n\n"
+
+
+def test_body_scope_skips_head():
+    result = extractor.extract_article(SAME_AS_BS4["body"])
+    assert result["markdown"] == "## Corpo\n\nSó body.\n\n- a\n- b\n\nx\n\n"
+    assert "aba" not in result["text"]
+
+
+def test_nested_junk_is_skipped():
+    assert extractor.extract_article(SAME_AS_BS4["junk-in-scope"])["text"] == "antes depois"
+
+
+def test_first_article_wins_with_nested_articles():
+    result = extractor.extract_article(SAME_AS_BS4["nested-article"])
+    assert result["markdown"] == "externo\n\ninterno\n\nexterno 2\n\n"
+
+
+# Onde o BeautifulSoup duplicava texto, o extrator emite cada bloco uma vez
+@pytest.mark.parametrize("html, markdown", [
+    ("<body><article><ul><li>um<ul><li>dois</li></ul></li><li>três</li></ul></article></body>",
+     "- um\n- dois\n- três\n\n"),
+    ("<body><article><ul><li><p>item p</p></li></ul></article></body>", "- item p\n\n"),
+    ("<body><main><p>Texto do main<p>sem fechar</main></body>", "Texto do main\n\nsem fechar\n\n"),
+    # Sem <body>, o escopo é o documento todo (o BeautifulSoup devolvia vazio)
+    ("<p>Fragmento</p><p>sem body</p>", "Fragmento\n\nsem body\n\n"),
+])
+def test_blocks_are_not_duplicated(html, markdown):
+    assert extractor.extract_article(html)["markdown"] == markdown
+
+
+LATIN1_PAGE = "<html><head><meta charset=\"iso-8859-1\"></head><body><p>Eleições</p></body></html>"
+
+
+def test_charset_from_header_wins_over_meta():
+    content = LATIN1_PAGE.replace("iso-8859-1", "utf-8").encode("iso-8859-1")
+    assert extractor.detect_charset('text/html; charset="ISO-8859-1"', content) == "ISO-8859-1"
+    assert "Eleições" in extractor.decode(content, "text/html; charset=ISO-8859-1")
+
+
+def test_charset_from_meta():
+    content = LATIN1_PAGE.encode("iso-8859-1")
+    assert extractor.detect_charset("text/html", content) == "iso-8859-1"
+    assert extractor.extract_article(extractor.decode(content, "text/html"))["text"] == "Eleições"
+
+
+def test_charset_falls_back_to_utf8():
+    content = "<body><p>Eleições</p></body>".encode()
+    assert extractor.detect_charset(None, content) == "utf-8"
+    assert extractor.decode(content) == "<body><p>Eleições</p></body>"
+    # Charset desconhecido também cai no utf-8
+    assert extractor.decode(content, "text/html; charset=x-unknown") == "<body><p>Eleições</p></body>"
+
+
+def test_meta_beyond_sniff_window_is_ignored():
+    content = b" " * extractor.SNIFF_BYTES + b'<meta charset="iso-8859-1">'
+    assert extractor.detect_charset(None, content) == "utf-8"
@@ -0,0 +1,39 @@
+import pytest
+
+from curator.gnews_decoder import decode_google_news_url, decode_token
+
+# Formato clássico: campo 1 (varint), campo 4 com a URL, campo 26 com o AMP vazio
+TOKEN = "CBMiLmh0dHBzOi8vd3d3LmJiYy5jb20vbmV3cy93b3JsZC1ldXJvcGUtNjg2MTAxNjfSAQA"
+URL = "https://www.bbc.com/news/world-europe-68610167"
+
+
+def test_known_token():
+    assert decode_token(TOKEN) == URL
+
+
+@pytest.mark.parametrize("path", ["rss/articles", "articles", "read"])
+def test_google_news_url(path):
+    assert decode_google_news_url(f"https://news.google.com/{path}/{TOKEN}?oc=5&hl=pt-BR") == URL
+
+
+def test_other_hosts_are_not_decoded():
+    assert decode_google_news_url(f"https://example.com/rss/articles/{TOKEN}") is None
+
+
+@pytest.mark.parametrize("token", [
+    "",
+    "C",                  # comprimento impossível em base64
+    "CBMi",               # campo sem comprimento
+    "CBMiK2h0dHBz",       # URL cortada no meio
+    "CBMiLmh0dHBzOi8v",   # comprimento maior que o payload
+    "AU_yqLNfoo",         # formato novo, só o Google resolve
+])
+def test_malformed_or_short_token_returns_none(token):
+    assert decode_token(token) is None
+
+
+def test_first_field_not_http():
+    # Único campo length-delimited não é http(s)
+    assert decode_token("CBMiDmZ0cDovL2hvc3QvYS5i") is None
+    # Campo não-http seguido da URL: fica com a URL
+    assert decode_token("CBMiBWZ0cDp4Ki5odHRwczovL3d3dy5iYmMuY29tL25ld3Mvd29ybGQtZXVyb3BlLTY4NjEwMTY3") == URL
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+
+from curator import leases
+
+
+class FakeClient:
+    """Devolve `rows` na ordem dada, como o UPDATE ... RETURNING."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        return self
+
+    def execute(self):
+        return type("Response", (), {"data": list(self.rows)})()
+
+
+def ago(hours):
+    return (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+
+
+def test_claim_batch_orders_fresh_then_backfill():
+    rows = [
+        {'id': 'old-10d', 'email_date': ago(240)},
+        {'id': 'fresh-5h', 'email_date': ago(5)},
+        {'id': 'no-date', 'email_date': None, 'created_at': None},
+        {'id': 'old-90d', 'email_date': ago(90 * 24)},
+        {'id': 'fresh-1h', 'email_date': None, 'created_at': ago(1).replace('+00:00', 'Z')},
+        {'id': 'fresh-30h', 'email_date': ago(30)},
+    ]
+    client = FakeClient(rows)
+    claimed = leases.claim_batch(client, 'w1', batch_size=6, lease_seconds=60, fresh_hours=48)
+    # Recentes do mais novo ao mais velho, backfill do mais velho, sem data no fim
+    assert [a['id'] for a in claimed] == ['fresh-1h', 'fresh-5h', 'fresh-30h', 'old-90d', 'old-10d', 'no-date']
+
+
+def test_claim_batch_passes_parameters():
+    client = FakeClient([])
+    assert leases.claim_batch(client, 'w1', 10, 120, fresh_hours=24, backfill_share=0.5, max_attempts=3) == []
+    assert client.calls == [('claim_pending_alerts', {
+        'p_worker_id': 'w1',
+        'p_batch_size': 10,
+        'p_lease_seconds': 120,
+        'p_fresh_hours': 24,
+        'p_backfill_share': 0.5,
+        'p_max_attempts': 3,
+    })]
+
+
+def test_naive_and_invalid_dates():
+    assert leases.published_at({'email_date': '2026-02-02T10:00:00'}) == datetime(2026, 2, 2, 10, tzinfo=timezone.utc)
+    assert leases.published_at({'email_date': 'ontem'}) is None
+    assert not leases.is_fresh({'email_date': 'ontem'}, 48)
@@ -0,0 +1,54 @@
+import pytest
+import requests
+
+from curator.retry import PERMANENT_STATUS, RetryPolicy, classify_error
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (requests.Timeout(), ('timeout', None)),
+    (requests.ConnectTimeout(), ('timeout', None)),
+    (requests.ConnectionError(), ('network', None)),
+    (http_error(403), ('http_4xx', 403)),
+    (http_error(404), ('http_4xx', 404)),
+    (http_error(500), ('http_5xx', 500)),
+    (http_error(503), ('http_5xx', 503)),
+    (requests.HTTPError(), ('other', None)),
+    (ValueError("parse"), ('other', None)),
+])
+def test_classify_error(exc, expected):
+    assert classify_error(exc) == expected
+
+
+def test_backoff_grows_within_jitter_bounds():
+    policy = RetryPolicy(max_attempts=10, base_delay=300, max_delay=86400)
+    for attempts in range(1, 10):
+        delay = min(86400, 300 * 2 ** (attempts - 1))
+        for _ in range(50):
+            assert int(delay * 0.8) <= policy.retry_in(attempts) <= int(delay * 1.2)
+
+
+def test_backoff_is_capped():
+    policy = RetryPolicy(max_attempts=100, base_delay=300, max_delay=3600)
+    assert all(policy.retry_in(50) <= 3600 * 1.2 for _ in range(50))
+
+
+def test_gives_up_after_max_attempts():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.retry_in(2) is not None
+    assert policy.retry_in(3) is None
+    assert policy.retry_in(4) is None
+
+
+@pytest.mark.parametrize("status", sorted(PERMANENT_STATUS))
+def test_permanent_status_is_not_retried(status):
+    assert RetryPolicy().retry_in(1, status) is None
+
+
+def test_transient_status_is_retried():
+    assert RetryPolicy().retry_in(1, 503) is not None
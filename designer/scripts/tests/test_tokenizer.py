@@ -0,0 +1,23 @@
+from curator import tokenizer
+
+
+def test_fold_strips_accents():
+    assert tokenizer.fold("Eleições: AÇÃO do Governo") == "eleicoes: acao do governo"
+
+
+def test_fold_keeps_other_alphabets():
+    assert tokenizer.fold("Выборы в России") == "выборы в россии"
+    assert tokenizer.fold("Εκλογές") == "εκλογες"
+    assert tokenizer.fold("人工知能") == "人工知能"
+    assert tokenizer.fold("ガイド") == "ガイド"
+
+
+def test_non_latin_titles_keep_their_tokens():
+    assert tokenizer.tokenize("Выборы президента России - ТАСС", strip_source_suffix=True) == (
+        "выборы", "президента", "россии",
+    )
+    assert tokenizer.tokenize("人工知能の規制法案 - 日経") == ("人工知能の規制法案",)
+
+
+def test_surface_form_keeps_accents():
+    assert tokenizer.tokenize_with_surface("Inteligência não") == [("inteligencia", "inteligência")]
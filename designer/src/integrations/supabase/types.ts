@@ -260,6 +260,8 @@ export type Database = {
       | "needs_review"
       | "archived"
       | "duplicate"
+      | "processing"
+      | "error"
       content_destination: "linkedin" | "thesis" | "debate" | "archive"
       source_type: "gmail_alert" | "rss" | "google_news"
     }
@@ -0,0 +1,70 @@
+-- Migration: 20260202010000_alert_processing_leases.sql
+-- Description: Lease-based claiming so several news_curator_worker processes can drain the alerts queue.
+
+-- 0. Update alert_status enum
+ALTER TYPE public.alert_status ADD VALUE IF NOT EXISTS 'processing';
+
+-- 1. Lease columns
+ALTER TABLE public.alerts ADD COLUMN IF NOT EXISTS leased_by TEXT;
+ALTER TABLE public.alerts ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ;
+
+-- Covers both "pending" scans and the search for expired leases
+CREATE INDEX IF NOT EXISTS idx_alerts_status_lease
+ON public.alerts(status, lease_expires_at);
+
+-- 2. Claim a batch atomically
+-- Moves up to p_batch_size alerts that are 'pending' (or 'processing' with an
+-- expired lease) to 'processing', stamping the worker id and lease expiry.
+-- FOR UPDATE SKIP LOCKED lets concurrent workers claim disjoint batches
+-- without blocking each other.
+CREATE OR REPLACE FUNCTION public.claim_pending_alerts(
+    p_worker_id TEXT,
+    p_batch_size INT DEFAULT 5,
+    p_lease_seconds INT DEFAULT 300
+)
+RETURNS SETOF public.alerts AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE public.alerts a
+    SET status = 'processing',
+        leased_by = p_worker_id,
+        lease_expires_at = now() + (p_lease_seconds || ' seconds')::INTERVAL
+    WHERE a.id IN (
+        SELECT id
+        FROM public.alerts
+        WHERE status = 'pending'
+           OR (status = 'processing' AND lease_expires_at < now())
+        ORDER BY created_at
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING a.*;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public, pg_temp;
+
+-- Workers call these with the service role key; the anon key must not reach them through PostgREST
+REVOKE EXECUTE ON FUNCTION public.claim_pending_alerts(TEXT, INT, INT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.claim_pending_alerts(TEXT, INT, INT) TO service_role;
+
+-- 3. Give a claimed alert back to the queue (e.g. after a failed extraction)
+-- Only the current lease holder can release it.
+CREATE OR REPLACE FUNCTION public.release_alert_lease(
+    p_alert_id UUID,
+    p_worker_id TEXT
+)
+RETURNS VOID AS $$
+BEGIN
+    UPDATE public.alerts
+    SET status = 'pending',
+        leased_by = NULL,
+        lease_expires_at = NULL
+    WHERE id = p_alert_id
+    AND status = 'processing'
+    AND leased_by = p_worker_id;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public, pg_temp;
+
+REVOKE EXECUTE ON FUNCTION public.release_alert_lease(UUID, TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.release_alert_lease(UUID, TEXT) TO service_role;
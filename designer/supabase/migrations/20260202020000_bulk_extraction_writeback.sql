@@ -0,0 +1,85 @@
+-- Migration: 20260202020000_bulk_extraction_writeback.sql
+-- Description: Write back a whole batch of worker extraction results in one round trip.
+
+-- p_items: array of { alert_id, success, clean_url, markdown, word_count }
+-- Successful items upsert extracted_content and move the alert to 'extracted';
+-- failed items give the lease back ('pending'). Each row runs in its own
+-- sub-transaction, so one bad row doesn't roll back the others, and the
+-- result reports ok/error per row. A row whose lease this worker no longer
+-- holds is left untouched and reported as error 'lease_lost'.
+CREATE OR REPLACE FUNCTION public.complete_alert_extractions(
+    p_worker_id TEXT,
+    p_items JSONB
+)
+RETURNS TABLE (
+    item_alert_id UUID,
+    ok BOOLEAN,
+    error_message TEXT
+) AS $$
+DECLARE
+    item JSONB;
+    v_alert_id UUID;
+    v_held BOOLEAN;
+BEGIN
+    FOR item IN SELECT * FROM jsonb_array_elements(p_items)
+    LOOP
+        v_alert_id := NULL;
+        BEGIN
+            v_alert_id := (item->>'alert_id')::UUID;
+
+            IF (item->>'success')::BOOLEAN THEN
+                -- Only the lease holder moves the alert forward, and only then
+                -- is the content written: a worker whose lease expired must not
+                -- overwrite the result of the worker that reclaimed the alert
+                UPDATE public.alerts
+                SET status = 'extracted',
+                    clean_url = item->>'clean_url',
+                    leased_by = NULL,
+                    lease_expires_at = NULL
+                WHERE id = v_alert_id
+                AND leased_by = p_worker_id;
+                v_held := FOUND;
+
+                IF v_held THEN
+                    INSERT INTO public.extracted_content (
+                        alert_id, markdown_content, cleaned_content, word_count,
+                        extraction_status, extracted_at
+                    )
+                    VALUES (
+                        v_alert_id, item->>'markdown', item->>'markdown', (item->>'word_count')::INT,
+                        'completed', now()
+                    )
+                    ON CONFLICT (alert_id) DO UPDATE
+                    SET markdown_content = EXCLUDED.markdown_content,
+                        cleaned_content = EXCLUDED.cleaned_content,
+                        word_count = EXCLUDED.word_count,
+                        extraction_status = EXCLUDED.extraction_status,
+                        extracted_at = EXCLUDED.extracted_at;
+                END IF;
+            ELSE
+                UPDATE public.alerts
+                SET status = 'pending',
+                    leased_by = NULL,
+                    lease_expires_at = NULL
+                WHERE id = v_alert_id
+                AND status = 'processing'
+                AND leased_by = p_worker_id;
+                v_held := FOUND;
+            END IF;
+
+            item_alert_id := v_alert_id;
+            ok := v_held;
+            error_message := CASE WHEN v_held THEN NULL ELSE 'lease_lost' END;
+        EXCEPTION WHEN OTHERS THEN
+            item_alert_id := v_alert_id;
+            ok := FALSE;
+            error_message := SQLERRM;
+        END;
+        RETURN NEXT;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public, pg_temp;
+
+REVOKE EXECUTE ON FUNCTION public.complete_alert_extractions(TEXT, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.complete_alert_extractions(TEXT, JSONB) TO service_role;
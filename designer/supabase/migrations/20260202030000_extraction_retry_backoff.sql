@@ -0,0 +1,136 @@
+-- Migration: 20260202030000_extraction_retry_backoff.sql
+-- Description: Attempt counters, exponential backoff and a terminal 'error' state for worker extractions.
+
+-- 0. Update alert_status enum
+ALTER TYPE public.alert_status ADD VALUE IF NOT EXISTS 'error';
+
+-- 1. Retry bookkeeping
+ALTER TABLE public.alerts ADD COLUMN IF NOT EXISTS extraction_attempts INT NOT NULL DEFAULT 0;
+ALTER TABLE public.alerts ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMPTZ;
+ALTER TABLE public.alerts ADD COLUMN IF NOT EXISTS last_error_kind TEXT; -- timeout, http_4xx, http_5xx, consent, network, other
+ALTER TABLE public.alerts ADD COLUMN IF NOT EXISTS last_error TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_alerts_pending_next_attempt
+ON public.alerts(next_attempt_at)
+WHERE status = 'pending';
+
+-- 2. Claim only alerts whose backoff has elapsed
+CREATE OR REPLACE FUNCTION public.claim_pending_alerts(
+    p_worker_id TEXT,
+    p_batch_size INT DEFAULT 5,
+    p_lease_seconds INT DEFAULT 300
+)
+RETURNS SETOF public.alerts AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE public.alerts a
+    SET status = 'processing',
+        leased_by = p_worker_id,
+        lease_expires_at = now() + (p_lease_seconds || ' seconds')::INTERVAL
+    WHERE a.id IN (
+        SELECT id
+        FROM public.alerts
+        WHERE (status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= now()))
+           OR (status = 'processing' AND lease_expires_at < now())
+        ORDER BY created_at
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING a.*;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public, pg_temp;
+
+REVOKE EXECUTE ON FUNCTION public.claim_pending_alerts(TEXT, INT, INT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.claim_pending_alerts(TEXT, INT, INT) TO service_role;
+
+-- 3. Bulk write-back, now recording failures
+-- Failed items carry { error_kind, error, retry_in_seconds }. The worker decides
+-- the backoff; retry_in_seconds = null means the alert is dead-lettered ('error').
+CREATE OR REPLACE FUNCTION public.complete_alert_extractions(
+    p_worker_id TEXT,
+    p_items JSONB
+)
+RETURNS TABLE (
+    item_alert_id UUID,
+    ok BOOLEAN,
+    error_message TEXT
+) AS $$
+DECLARE
+    item JSONB;
+    v_alert_id UUID;
+    v_held BOOLEAN;
+    v_retry_in INT;
+BEGIN
+    FOR item IN SELECT * FROM jsonb_array_elements(p_items)
+    LOOP
+        v_alert_id := NULL;
+        BEGIN
+            v_alert_id := (item->>'alert_id')::UUID;
+
+            IF (item->>'success')::BOOLEAN THEN
+                -- Only the lease holder moves the alert forward, and only then
+                -- is the content written: a worker whose lease expired must not
+                -- overwrite the result of the worker that reclaimed the alert
+                UPDATE public.alerts
+                SET status = 'extracted',
+                    clean_url = item->>'clean_url',
+                    next_attempt_at = NULL,
+                    last_error_kind = NULL,
+                    last_error = NULL,
+                    leased_by = NULL,
+                    lease_expires_at = NULL
+                WHERE id = v_alert_id
+                AND leased_by = p_worker_id;
+                v_held := FOUND;
+
+                IF v_held THEN
+                    INSERT INTO public.extracted_content (
+                        alert_id, markdown_content, cleaned_content, word_count,
+                        extraction_status, extracted_at
+                    )
+                    VALUES (
+                        v_alert_id, item->>'markdown', item->>'markdown', (item->>'word_count')::INT,
+                        'completed', now()
+                    )
+                    ON CONFLICT (alert_id) DO UPDATE
+                    SET markdown_content = EXCLUDED.markdown_content,
+                        cleaned_content = EXCLUDED.cleaned_content,
+                        word_count = EXCLUDED.word_count,
+                        extraction_status = EXCLUDED.extraction_status,
+                        extracted_at = EXCLUDED.extracted_at;
+                END IF;
+            ELSE
+                v_retry_in := (item->>'retry_in_seconds')::INT;
+
+                UPDATE public.alerts
+                SET status = CASE WHEN v_retry_in IS NULL THEN 'error'::alert_status ELSE 'pending'::alert_status END,
+                    extraction_attempts = extraction_attempts + 1,
+                    next_attempt_at = CASE WHEN v_retry_in IS NULL THEN NULL
+                                           ELSE now() + (v_retry_in || ' seconds')::INTERVAL END,
+                    last_error_kind = item->>'error_kind',
+                    last_error = left(item->>'error', 1000),
+                    leased_by = NULL,
+                    lease_expires_at = NULL
+                WHERE id = v_alert_id
+                AND status = 'processing'
+                AND leased_by = p_worker_id;
+                v_held := FOUND;
+            END IF;
+
+            item_alert_id := v_alert_id;
+            ok := v_held;
+            error_message := CASE WHEN v_held THEN NULL ELSE 'lease_lost' END;
+        EXCEPTION WHEN OTHERS THEN
+            item_alert_id := v_alert_id;
+            ok := FALSE;
+            error_message := SQLERRM;
+        END;
+        RETURN NEXT;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public, pg_temp;
+
+REVOKE EXECUTE ON FUNCTION public.complete_alert_extractions(TEXT, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.complete_alert_extractions(TEXT, JSONB) TO service_role;
@@ -0,0 +1,23 @@
+-- Migration: 20260202040000_notify_new_alerts.sql
+-- Description: NOTIFY the curator worker when a new alert is ready for extraction.
+
+-- 1. Trigger Function
+-- Payload is the alert id; the worker only uses it as a wake-up signal and
+-- claims work through claim_pending_alerts as usual.
+CREATE OR REPLACE FUNCTION public.notify_new_alert()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.status = 'pending' THEN
+        PERFORM pg_notify('new_alert', NEW.id::TEXT);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 2. Create Trigger
+DROP TRIGGER IF EXISTS on_alert_insert_notify_worker ON public.alerts;
+
+CREATE TRIGGER on_alert_insert_notify_worker
+    AFTER INSERT ON public.alerts
+    FOR EACH ROW
+    EXECUTE FUNCTION public.notify_new_alert();
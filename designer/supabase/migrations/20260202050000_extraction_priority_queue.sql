@@ -0,0 +1,141 @@
+-- Migration: 20260202050000_extraction_priority_queue.sql
+-- Description: Priority ordering and a stale backfill lane for claim_pending_alerts.
+
+-- 1. Per-source weights (missing sources count as 1.0)
+CREATE TABLE IF NOT EXISTS public.alert_source_priorities (
+    source_type TEXT PRIMARY KEY,
+    weight REAL NOT NULL DEFAULT 1.0
+);
+
+ALTER TABLE public.alert_source_priorities ENABLE ROW LEVEL SECURITY;
+
+INSERT INTO public.alert_source_priorities (source_type, weight) VALUES
+    ('gmail_alert', 1.0),
+    ('google_news', 1.0),
+    ('rss', 0.8)
+ON CONFLICT (source_type) DO NOTHING;
+
+-- 2. Indexes for the two lanes and the cluster size lookup
+CREATE INDEX IF NOT EXISTS idx_alerts_pending_published_at
+ON public.alerts ((COALESCE(email_date, created_at)) DESC)
+WHERE status = 'pending';
+
+CREATE INDEX IF NOT EXISTS idx_alerts_duplicate_group_id
+ON public.alerts(duplicate_group_id)
+WHERE duplicate_group_id IS NOT NULL;
+
+-- 3. Priority of a single alert
+-- source weight * (1 + ln(cluster size)), decayed by age the same way the
+-- clustering decays similarity: 1 / (1 + hours / half_life).
+CREATE OR REPLACE FUNCTION public.alert_extraction_priority(
+    p_source_type TEXT,
+    p_published_at TIMESTAMPTZ,
+    p_group_id UUID,
+    p_half_life_hours REAL DEFAULT 6
+)
+RETURNS REAL AS $$
+DECLARE
+    v_weight REAL;
+    v_cluster_size INT := 1;
+    v_age_hours REAL;
+BEGIN
+    SELECT weight INTO v_weight
+    FROM public.alert_source_priorities
+    WHERE source_type = p_source_type;
+
+    IF p_group_id IS NOT NULL THEN
+        SELECT GREATEST(COUNT(*), 1) INTO v_cluster_size
+        FROM public.alerts
+        WHERE duplicate_group_id = p_group_id;
+    END IF;
+
+    v_age_hours := GREATEST(EXTRACT(EPOCH FROM (now() - p_published_at)) / 3600, 0);
+
+    RETURN COALESCE(v_weight, 1.0)
+         * (1 + ln(v_cluster_size))
+         / (1 + v_age_hours / p_half_life_hours);
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- 4. Claim with two lanes
+-- Fresh lane: published within p_fresh_hours, highest priority first.
+-- Backfill lane: older alerts, oldest first, capped at p_backfill_share of the
+-- batch so a big import drains without starving new items. Either lane
+-- tops up the batch when the other one runs dry.
+DROP FUNCTION IF EXISTS public.claim_pending_alerts(TEXT, INT, INT);
+
+CREATE OR REPLACE FUNCTION public.claim_pending_alerts(
+    p_worker_id TEXT,
+    p_batch_size INT DEFAULT 5,
+    p_lease_seconds INT DEFAULT 300,
+    p_fresh_hours INT DEFAULT 48,
+    p_backfill_share REAL DEFAULT 0.2
+)
+RETURNS SETOF public.alerts AS $$
+DECLARE
+    v_cutoff TIMESTAMPTZ := now() - (p_fresh_hours || ' hours')::INTERVAL;
+    v_backfill_slots INT;
+    v_ids UUID[] := '{}';
+    v_more UUID[];
+BEGIN
+    v_backfill_slots := LEAST(p_batch_size, CEIL(p_batch_size * GREATEST(p_backfill_share, 0))::INT);
+
+    -- Fresh lane
+    SELECT COALESCE(array_agg(id), '{}') INTO v_ids
+    FROM (
+        SELECT id
+        FROM public.alerts
+        WHERE ((status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= now()))
+               OR (status = 'processing' AND lease_expires_at < now()))
+          AND COALESCE(email_date, created_at) >= v_cutoff
+        ORDER BY public.alert_extraction_priority(source_type::TEXT, COALESCE(email_date, created_at), duplicate_group_id) DESC,
+                 COALESCE(email_date, created_at) DESC
+        LIMIT p_batch_size - v_backfill_slots
+        FOR UPDATE SKIP LOCKED
+    ) fresh;
+
+    -- Backfill lane (also fills whatever the fresh lane left)
+    SELECT COALESCE(array_agg(id), '{}') INTO v_more
+    FROM (
+        SELECT id
+        FROM public.alerts
+        WHERE ((status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= now()))
+               OR (status = 'processing' AND lease_expires_at < now()))
+          AND COALESCE(email_date, created_at) < v_cutoff
+        ORDER BY COALESCE(email_date, created_at)
+        LIMIT p_batch_size - cardinality(v_ids)
+        FOR UPDATE SKIP LOCKED
+    ) backfill;
+    v_ids := v_ids || v_more;
+
+    -- Backfill ran dry: give its slots back to fresh alerts
+    IF cardinality(v_ids) < p_batch_size THEN
+        SELECT COALESCE(array_agg(id), '{}') INTO v_more
+        FROM (
+            SELECT id
+            FROM public.alerts
+            WHERE ((status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= now()))
+                   OR (status = 'processing' AND lease_expires_at < now()))
+              AND COALESCE(email_date, created_at) >= v_cutoff
+              AND id <> ALL(v_ids)
+            ORDER BY public.alert_extraction_priority(source_type::TEXT, COALESCE(email_date, created_at), duplicate_group_id) DESC,
+                     COALESCE(email_date, created_at) DESC
+            LIMIT p_batch_size - cardinality(v_ids)
+            FOR UPDATE SKIP LOCKED
+        ) topup;
+        v_ids := v_ids || v_more;
+    END IF;
+
+    RETURN QUERY
+    UPDATE public.alerts a
+    SET status = 'processing',
+        leased_by = p_worker_id,
+        lease_expires_at = now() + (p_lease_seconds || ' seconds')::INTERVAL
+    WHERE a.id = ANY(v_ids)
+    RETURNING a.*;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public, pg_temp;
+
+REVOKE EXECUTE ON FUNCTION public.claim_pending_alerts(TEXT, INT, INT, INT, REAL) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.claim_pending_alerts(TEXT, INT, INT, INT, REAL) TO service_role;
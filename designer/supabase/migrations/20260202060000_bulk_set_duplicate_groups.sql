@@ -0,0 +1,30 @@
+-- Migration: 20260202060000_bulk_set_duplicate_groups.sql
+-- Description: Bulk write-back of duplicate_group_id / is_duplicate for offline re-clustering.
+
+-- 1. Index for the streamed export (chronological replay)
+CREATE INDEX IF NOT EXISTS idx_alerts_created_at_id
+ON public.alerts(created_at, id);
+
+-- 2. Bulk update
+-- p_items: [{ "alert_id": uuid, "group_id": uuid | null, "is_duplicate": bool }, ...]
+-- One UPDATE per batch instead of one trigger replay per alert.
+CREATE OR REPLACE FUNCTION public.set_alert_duplicate_groups(p_items JSONB)
+RETURNS INT AS $$
+DECLARE
+    v_updated INT;
+BEGIN
+    UPDATE public.alerts a
+    SET duplicate_group_id = (item->>'group_id')::UUID,
+        is_duplicate = COALESCE((item->>'is_duplicate')::BOOLEAN, false)
+    FROM jsonb_array_elements(p_items) AS item
+    WHERE a.id = (item->>'alert_id')::UUID;
+
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    RETURN v_updated;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public, pg_temp;
+
+-- Only the offline re-clustering tool (service role key) may rewrite groups
+REVOKE EXECUTE ON FUNCTION public.set_alert_duplicate_groups(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.set_alert_duplicate_groups(JSONB) TO service_role;
@@ -0,0 +1,107 @@
+-- Migration: 20260202070000_count_expired_lease_attempts.sql
+-- Description: An expired 'processing' lease counts as a failed attempt, so alerts that crash or hang the worker end up in 'error'.
+
+-- 1. Claim, charging an attempt for every expired lease
+-- A lease only expires when the worker died or hung on the alert, so it
+-- counts like any other failure: reclaimed rows come back with
+-- extraction_attempts + 1, and rows whose lost attempt reaches
+-- p_max_attempts (the worker's RETRY_MAX_ATTEMPTS) go to 'error' instead.
+DROP FUNCTION IF EXISTS public.claim_pending_alerts(TEXT, INT, INT, INT, REAL);
+
+CREATE OR REPLACE FUNCTION public.claim_pending_alerts(
+    p_worker_id TEXT,
+    p_batch_size INT DEFAULT 5,
+    p_lease_seconds INT DEFAULT 300,
+    p_fresh_hours INT DEFAULT 48,
+    p_backfill_share REAL DEFAULT 0.2,
+    p_max_attempts INT DEFAULT 5
+)
+RETURNS SETOF public.alerts AS $$
+DECLARE
+    v_cutoff TIMESTAMPTZ := now() - (p_fresh_hours || ' hours')::INTERVAL;
+    v_backfill_slots INT;
+    v_ids UUID[] := '{}';
+    v_more UUID[];
+BEGIN
+    -- Dead-letter the expired leases that used up their attempts
+    UPDATE public.alerts a
+    SET status = 'error',
+        extraction_attempts = a.extraction_attempts + 1,
+        next_attempt_at = NULL,
+        last_error_kind = 'lease_expired',
+        last_error = 'lease expired (held by ' || COALESCE(a.leased_by, '?') || ')',
+        leased_by = NULL,
+        lease_expires_at = NULL
+    WHERE a.id IN (
+        SELECT id
+        FROM public.alerts
+        WHERE status = 'processing'
+          AND lease_expires_at < now()
+          AND extraction_attempts + 1 >= p_max_attempts
+        FOR UPDATE SKIP LOCKED
+    );
+
+    v_backfill_slots := LEAST(p_batch_size, CEIL(p_batch_size * GREATEST(p_backfill_share, 0))::INT);
+
+    -- Fresh lane
+    SELECT COALESCE(array_agg(id), '{}') INTO v_ids
+    FROM (
+        SELECT id
+        FROM public.alerts
+        WHERE ((status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= now()))
+               OR (status = 'processing' AND lease_expires_at < now()))
+          AND COALESCE(email_date, created_at) >= v_cutoff
+        ORDER BY public.alert_extraction_priority(source_type::TEXT, COALESCE(email_date, created_at), duplicate_group_id) DESC,
+                 COALESCE(email_date, created_at) DESC
+        LIMIT p_batch_size - v_backfill_slots
+        FOR UPDATE SKIP LOCKED
+    ) fresh;
+
+    -- Backfill lane (also fills whatever the fresh lane left)
+    SELECT COALESCE(array_agg(id), '{}') INTO v_more
+    FROM (
+        SELECT id
+        FROM public.alerts
+        WHERE ((status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= now()))
+               OR (status = 'processing' AND lease_expires_at < now()))
+          AND COALESCE(email_date, created_at) < v_cutoff
+        ORDER BY COALESCE(email_date, created_at)
+        LIMIT p_batch_size - cardinality(v_ids)
+        FOR UPDATE SKIP LOCKED
+    ) backfill;
+    v_ids := v_ids || v_more;
+
+    -- Backfill ran dry: give its slots back to fresh alerts
+    IF cardinality(v_ids) < p_batch_size THEN
+        SELECT COALESCE(array_agg(id), '{}') INTO v_more
+        FROM (
+            SELECT id
+            FROM public.alerts
+            WHERE ((status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= now()))
+                   OR (status = 'processing' AND lease_expires_at < now()))
+              AND COALESCE(email_date, created_at) >= v_cutoff
+              AND id <> ALL(v_ids)
+            ORDER BY public.alert_extraction_priority(source_type::TEXT, COALESCE(email_date, created_at), duplicate_group_id) DESC,
+                     COALESCE(email_date, created_at) DESC
+            LIMIT p_batch_size - cardinality(v_ids)
+            FOR UPDATE SKIP LOCKED
+        ) topup;
+        v_ids := v_ids || v_more;
+    END IF;
+
+    -- status on the right-hand side is the value before the update:
+    -- 'processing' here means the row was reclaimed from an expired lease
+    RETURN QUERY
+    UPDATE public.alerts a
+    SET status = 'processing',
+        extraction_attempts = a.extraction_attempts + CASE WHEN a.status = 'processing' THEN 1 ELSE 0 END,
+        leased_by = p_worker_id,
+        lease_expires_at = now() + (p_lease_seconds || ' seconds')::INTERVAL
+    WHERE a.id = ANY(v_ids)
+    RETURNING a.*;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public, pg_temp;
+
+REVOKE EXECUTE ON FUNCTION public.claim_pending_alerts(TEXT, INT, INT, INT, REAL, INT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.claim_pending_alerts(TEXT, INT, INT, INT, REAL, INT) TO service_role;
@@ -0,0 +1,112 @@
+-- Migration: 20260202080000_alert_canonical_url.sql
+-- Description: Canonical URL column for reusing extractions across batches, and drop the unique index on clean_url.
+
+-- 1. Canonical URL (curator.dedup.canonical_url: no www, tracking params or trailing slash)
+-- clean_url keeps the resolved URL as shown in the UI; canonical_url is only
+-- a lookup key. Filled by the worker on successful extractions, so older rows
+-- stay NULL and are simply not reused.
+ALTER TABLE public.alerts ADD COLUMN IF NOT EXISTS canonical_url TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_alerts_canonical_url
+ON public.alerts(canonical_url)
+WHERE canonical_url IS NOT NULL;
+
+-- 2. Several alerts may resolve to the same article
+-- 20260201010500 dropped alerts_clean_url_key so duplicates can be stored and
+-- clustered, but the unique index from 20260123 / 20260125 was left behind:
+-- the write-back of the second alert sharing a URL failed on it.
+DROP INDEX IF EXISTS public.idx_alerts_clean_url_unique;
+
+CREATE INDEX IF NOT EXISTS idx_alerts_clean_url
+ON public.alerts(clean_url)
+WHERE clean_url IS NOT NULL;
+
+-- 3. Bulk write-back, now storing canonical_url
+CREATE OR REPLACE FUNCTION public.complete_alert_extractions(
+    p_worker_id TEXT,
+    p_items JSONB
+)
+RETURNS TABLE (
+    item_alert_id UUID,
+    ok BOOLEAN,
+    error_message TEXT
+) AS $$
+DECLARE
+    item JSONB;
+    v_alert_id UUID;
+    v_held BOOLEAN;
+    v_retry_in INT;
+BEGIN
+    FOR item IN SELECT * FROM jsonb_array_elements(p_items)
+    LOOP
+        v_alert_id := NULL;
+        BEGIN
+            v_alert_id := (item->>'alert_id')::UUID;
+
+            IF (item->>'success')::BOOLEAN THEN
+                -- Only the lease holder moves the alert forward, and only then
+                -- is the content written: a worker whose lease expired must not
+                -- overwrite the result of the worker that reclaimed the alert
+                UPDATE public.alerts
+                SET status = 'extracted',
+                    clean_url = item->>'clean_url',
+                    canonical_url = item->>'canonical_url',
+                    next_attempt_at = NULL,
+                    last_error_kind = NULL,
+                    last_error = NULL,
+                    leased_by = NULL,
+                    lease_expires_at = NULL
+                WHERE id = v_alert_id
+                AND leased_by = p_worker_id;
+                v_held := FOUND;
+
+                IF v_held THEN
+                    INSERT INTO public.extracted_content (
+                        alert_id, markdown_content, cleaned_content, word_count,
+                        extraction_status, extracted_at
+                    )
+                    VALUES (
+                        v_alert_id, item->>'markdown', item->>'markdown', (item->>'word_count')::INT,
+                        'completed', now()
+                    )
+                    ON CONFLICT (alert_id) DO UPDATE
+                    SET markdown_content = EXCLUDED.markdown_content,
+                        cleaned_content = EXCLUDED.cleaned_content,
+                        word_count = EXCLUDED.word_count,
+                        extraction_status = EXCLUDED.extraction_status,
+                        extracted_at = EXCLUDED.extracted_at;
+                END IF;
+            ELSE
+                v_retry_in := (item->>'retry_in_seconds')::INT;
+
+                UPDATE public.alerts
+                SET status = CASE WHEN v_retry_in IS NULL THEN 'error'::alert_status ELSE 'pending'::alert_status END,
+                    extraction_attempts = extraction_attempts + 1,
+                    next_attempt_at = CASE WHEN v_retry_in IS NULL THEN NULL
+                                           ELSE now() + (v_retry_in || ' seconds')::INTERVAL END,
+                    last_error_kind = item->>'error_kind',
+                    last_error = left(item->>'error', 1000),
+                    leased_by = NULL,
+                    lease_expires_at = NULL
+                WHERE id = v_alert_id
+                AND status = 'processing'
+                AND leased_by = p_worker_id;
+                v_held := FOUND;
+            END IF;
+
+            item_alert_id := v_alert_id;
+            ok := v_held;
+            error_message := CASE WHEN v_held THEN NULL ELSE 'lease_lost' END;
+        EXCEPTION WHEN OTHERS THEN
+            item_alert_id := v_alert_id;
+            ok := FALSE;
+            error_message := SQLERRM;
+        END;
+        RETURN NEXT;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public, pg_temp;
+
+REVOKE EXECUTE ON FUNCTION public.complete_alert_extractions(TEXT, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.complete_alert_extractions(TEXT, JSONB) TO service_role;
@@ -0,0 +1,144 @@
+-- Migration: 20260202090000_inline_claim_priority.sql
+-- Description: Compute cluster sizes once per claim instead of a COUNT(*) per candidate row.
+
+-- 1. Index for the eligibility filter of both lanes
+CREATE INDEX IF NOT EXISTS idx_alerts_status_next_attempt_created
+ON public.alerts(status, next_attempt_at, created_at);
+
+-- 2. Claim with the priority as an inline expression
+-- alert_extraction_priority() ran a correlated COUNT(*) over the cluster of
+-- every candidate while sorting. The sizes now come from one grouped
+-- subquery, restricted to the clusters of the eligible fresh alerts, that is
+-- joined to the candidates. The priority is unchanged:
+-- source weight * (1 + ln(cluster size)) / (1 + age hours / 6).
+-- FOR UPDATE OF a locks only the claimed alerts, not the joined rows.
+CREATE OR REPLACE FUNCTION public.claim_pending_alerts(
+    p_worker_id TEXT,
+    p_batch_size INT DEFAULT 5,
+    p_lease_seconds INT DEFAULT 300,
+    p_fresh_hours INT DEFAULT 48,
+    p_backfill_share REAL DEFAULT 0.2,
+    p_max_attempts INT DEFAULT 5
+)
+RETURNS SETOF public.alerts AS $$
+DECLARE
+    v_cutoff TIMESTAMPTZ := now() - (p_fresh_hours || ' hours')::INTERVAL;
+    v_backfill_slots INT;
+    v_ids UUID[] := '{}';
+    v_more UUID[];
+BEGIN
+    -- Dead-letter the expired leases that used up their attempts
+    UPDATE public.alerts a
+    SET status = 'error',
+        extraction_attempts = a.extraction_attempts + 1,
+        next_attempt_at = NULL,
+        last_error_kind = 'lease_expired',
+        last_error = 'lease expired (held by ' || COALESCE(a.leased_by, '?') || ')',
+        leased_by = NULL,
+        lease_expires_at = NULL
+    WHERE a.id IN (
+        SELECT id
+        FROM public.alerts
+        WHERE status = 'processing'
+          AND lease_expires_at < now()
+          AND extraction_attempts + 1 >= p_max_attempts
+        FOR UPDATE SKIP LOCKED
+    );
+
+    v_backfill_slots := LEAST(p_batch_size, CEIL(p_batch_size * GREATEST(p_backfill_share, 0))::INT);
+
+    -- Fresh lane
+    SELECT COALESCE(array_agg(id), '{}') INTO v_ids
+    FROM (
+        SELECT a.id
+        FROM public.alerts a
+        LEFT JOIN public.alert_source_priorities w ON w.source_type = a.source_type::TEXT
+        LEFT JOIN (
+            SELECT duplicate_group_id, COUNT(*) AS cluster_size
+            FROM public.alerts
+            WHERE duplicate_group_id IN (
+                SELECT duplicate_group_id
+                FROM public.alerts
+                WHERE ((status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= now()))
+                       OR (status = 'processing' AND lease_expires_at < now()))
+                  AND COALESCE(email_date, created_at) >= v_cutoff
+            )
+            GROUP BY duplicate_group_id
+        ) c ON c.duplicate_group_id = a.duplicate_group_id
+        WHERE ((a.status = 'pending' AND (a.next_attempt_at IS NULL OR a.next_attempt_at <= now()))
+               OR (a.status = 'processing' AND a.lease_expires_at < now()))
+          AND COALESCE(a.email_date, a.created_at) >= v_cutoff
+        ORDER BY COALESCE(w.weight, 1.0)
+                 * (1 + ln(COALESCE(c.cluster_size, 1)))
+                 / (1 + GREATEST(EXTRACT(EPOCH FROM (now() - COALESCE(a.email_date, a.created_at))) / 3600, 0) / 6) DESC,
+                 COALESCE(a.email_date, a.created_at) DESC
+        LIMIT p_batch_size - v_backfill_slots
+        FOR UPDATE OF a SKIP LOCKED
+    ) fresh;
+
+    -- Backfill lane (also fills whatever the fresh lane left)
+    SELECT COALESCE(array_agg(id), '{}') INTO v_more
+    FROM (
+        SELECT id
+        FROM public.alerts
+        WHERE ((status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= now()))
+               OR (status = 'processing' AND lease_expires_at < now()))
+          AND COALESCE(email_date, created_at) < v_cutoff
+        ORDER BY COALESCE(email_date, created_at)
+        LIMIT p_batch_size - cardinality(v_ids)
+        FOR UPDATE SKIP LOCKED
+    ) backfill;
+    v_ids := v_ids || v_more;
+
+    -- Backfill ran dry: give its slots back to fresh alerts
+    IF cardinality(v_ids) < p_batch_size THEN
+        SELECT COALESCE(array_agg(id), '{}') INTO v_more
+        FROM (
+            SELECT a.id
+            FROM public.alerts a
+            LEFT JOIN public.alert_source_priorities w ON w.source_type = a.source_type::TEXT
+            LEFT JOIN (
+                SELECT duplicate_group_id, COUNT(*) AS cluster_size
+                FROM public.alerts
+                WHERE duplicate_group_id IN (
+                    SELECT duplicate_group_id
+                    FROM public.alerts
+                    WHERE ((status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= now()))
+                           OR (status = 'processing' AND lease_expires_at < now()))
+                      AND COALESCE(email_date, created_at) >= v_cutoff
+                )
+                GROUP BY duplicate_group_id
+            ) c ON c.duplicate_group_id = a.duplicate_group_id
+            WHERE ((a.status = 'pending' AND (a.next_attempt_at IS NULL OR a.next_attempt_at <= now()))
+                   OR (a.status = 'processing' AND a.lease_expires_at < now()))
+              AND COALESCE(a.email_date, a.created_at) >= v_cutoff
+              AND a.id <> ALL(v_ids)
+            ORDER BY COALESCE(w.weight, 1.0)
+                     * (1 + ln(COALESCE(c.cluster_size, 1)))
+                     / (1 + GREATEST(EXTRACT(EPOCH FROM (now() - COALESCE(a.email_date, a.created_at))) / 3600, 0) / 6) DESC,
+                     COALESCE(a.email_date, a.created_at) DESC
+            LIMIT p_batch_size - cardinality(v_ids)
+            FOR UPDATE OF a SKIP LOCKED
+        ) topup;
+        v_ids := v_ids || v_more;
+    END IF;
+
+    -- status on the right-hand side is the value before the update:
+    -- 'processing' here means the row was reclaimed from an expired lease
+    RETURN QUERY
+    UPDATE public.alerts a
+    SET status = 'processing',
+        extraction_attempts = a.extraction_attempts + CASE WHEN a.status = 'processing' THEN 1 ELSE 0 END,
+        leased_by = p_worker_id,
+        lease_expires_at = now() + (p_lease_seconds || ' seconds')::INTERVAL
+    WHERE a.id = ANY(v_ids)
+    RETURNING a.*;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public, pg_temp;
+
+REVOKE EXECUTE ON FUNCTION public.claim_pending_alerts(TEXT, INT, INT, INT, REAL, INT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.claim_pending_alerts(TEXT, INT, INT, INT, REAL, INT) TO service_role;
+
+-- 3. The per-row function is no longer used
+DROP FUNCTION IF EXISTS public.alert_extraction_priority(TEXT, TIMESTAMPTZ, UUID, REAL);
@@ -14,11 +14,15 @@ Uso:
 """
 
 import os
+import sys
 import json
 import argparse
-from collections import Counter
+from collections import Counter, defaultdict
 from datetime import datetime
-import re
+
+# Tokenizer compartilhado com a clusterização (designer/scripts/curator/tokenizer.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "designer", "scripts"))
+from curator import tokenizer
 
 # Opcional: bibliotecas avançadas
 try:
@@ -42,16 +46,11 @@ TEMA = "palantir"
 OUTPUT_DIR = os.path.dirname(__file__) + "/../output"
 DADOS_DIR = os.path.dirname(__file__) + "/../dados"
 
-# Stop words multi-idioma
-STOP_WORDS = {
-    "the", "and", "or", "is", "in", "to", "of", "for", "on", "with", "at", "by",
-    "a", "an", "it", "its", "as", "be", "has", "have", "had", "are", "was", "were",
-    "o", "a", "e", "de", "da", "do", "em", "um", "uma", "para", "com", "não", "que",
-    "el", "la", "los", "las", "un", "una", "del", "en", "con", "por", "que", "se",
-    "this", "that", "these", "those", "will", "can", "could", "would", "should",
+# Stop words do tema, além das PT/EN/ES comuns do tokenizer
+STOP_WORDS = frozenset({
     "palantir", "stock", "stocks", "company", "companies", "says", "said", "new",
     "more", "than", "year", "years", "just", "now", "also", "like", "get", "make",
-}
+})
 
 def conectar_supabase():
     """Conecta ao Supabase"""
@@ -110,25 +109,25 @@ def buscar_conteudo_extraido(supabase):
     return resultado
 
 def extrair_palavras(texto):
-    """Extrai palavras limpas do texto"""
-    if not texto:
-        return []
-    
-    texto = texto.lower()
-    texto = re.sub(r'[^a-záéíóúâêîôûãõàèìòùç\s]', ' ', texto)
-    palavras = texto.split()
-    
-    return [p for p in palavras if p not in STOP_WORDS and len(p) > 3]
+    """Extrai pares (palavra sem acento, palavra como escrita) do texto"""
+    pares = tokenizer.tokenize_with_surface(texto, min_length=4, extra_stopwords=STOP_WORDS)
+    # Só palavras: números não entram na nuvem
+    return [(p, forma) for p, forma in pares if p.isalpha()]
 
 def analisar_frequencia(conteudos):
-    """Analisa frequência de palavras"""
-    todas_palavras = []
+    """
+    Analisa frequência de palavras. Conta sem acento ("inteligência" e
+    "inteligencia" somam juntas) e exibe a grafia mais frequente.
+    """
+    contagem = Counter()
+    formas = defaultdict(Counter)
     
     for item in conteudos:
-        palavras = extrair_palavras(item.get("content", ""))
-        todas_palavras.extend(palavras)
+        for palavra, forma in extrair_palavras(item.get("content", "")):
+            contagem[palavra] += 1
+            formas[palavra][forma] += 1
     
-    return Counter(todas_palavras)
+    return Counter({formas[p].most_common(1)[0][0]: n for p, n in contagem.items()})
 
 def gerar_timeline(conteudos):
     """Gera dados para linha do tempo"""
@@ -1,9 +1,13 @@
 import os
+import sys
 import json
 import urllib.request
 import urllib.parse
 from urllib.error import HTTPError
-import unicodedata
+
+# Normalização de texto compartilhada (designer/scripts/curator/tokenizer.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "designer", "scripts"))
+from curator import tokenizer
 
 # Configuration (from fetch_data.py)
 # Configuration
@@ -34,9 +38,7 @@ def fetch_data(table, query_params):
         return []
 
 def normalize_text(text):
-    if not text:
-        return ""
-    return unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII').lower()
+    return tokenizer.fold(text)
 
 def main():
     # DEBUG: Fetch latest 5 alerts to check if DB has data
@@ -96,7 +98,7 @@ def main():
         
         # Boundary checks for IA/AI if not strict substring
         if not has_ai:
-            words = combined.split()
+            words = tokenizer.tokenize(combined, min_length=2)
             if "ia" in words or "ai" in words:
                 has_ai = True
         
@@ -10,13 +10,13 @@ Uso:
 """
 
 import os
+import sys
 import json
 import argparse
 import time
 import urllib.parse
 import urllib.request
 from datetime import datetime
-import unicodedata
 
 # Tentar importar supabase, mas ter fallback REST se não tiver
 try:
@@ -25,6 +25,17 @@ try:
 except ImportError:
     SUPABASE_INSTALLED = False
 
+# Camada HTTP compartilhada com o worker (designer/scripts/curator): sessão com
+# pool keep-alive. Se `requests` não estiver instalado, seguimos com urllib.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "designer", "scripts"))
+try:
+    from curator import http
+    HTTP_LAYER_AVAILABLE = True
+except ImportError:
+    HTTP_LAYER_AVAILABLE = False
+# Normalização de texto compartilhada com a clusterização (só stdlib)
+from curator import tokenizer
+
 # Configuração (tenta pegar do env, senão usa defaults conhecidos)
 SUPABASE_URL = os.environ.get("SUPABASE_URL", "https://peoyosdnthdpnhejivqo.supabase.co")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY", os.environ.get("SUPABASE_KEY", ""))
@@ -41,8 +52,7 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(DADOS_DIR, exist_ok=True)
 
 def normalize_text(text):
-    if not text: return ""
-    return unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII').lower()
+    return tokenizer.fold(text)
 
 def build_query_filter(terms):
     """Constrói filtro SQL ILIKE OR para os termos"""
@@ -117,9 +127,14 @@ def fetch_alerts(terms, limit=100):
         url = f"{SUPABASE_URL}/rest/v1/alerts?{q}"
         
         try:
-            req = urllib.request.Request(url, headers=headers)
-            with urllib.request.urlopen(req) as resp:
-                data = json.loads(resp.read())
+            if HTTP_LAYER_AVAILABLE:
+                resp = http.get(url, headers=headers, timeout=30)
+                resp.raise_for_status()
+                data = resp.json()
+            else:
+                req = urllib.request.Request(url, headers=headers)
+                with urllib.request.urlopen(req) as resp:
+                    data = json.loads(resp.read())
         except Exception as e:
             print(f"❌ Erro na requisição REST: {e}")
             return []
@@ -170,17 +185,25 @@ def extract_content_for_alerts(alerts):
         # Chamar Edge Function
         try:
             req_data = json.dumps({"alert_id": alert['id']}).encode('utf-8')
-            req = urllib.request.Request(
-                f"{SUPABASE_URL}/functions/v1/extract-content",
-                data=req_data,
-                headers={
-                    "Authorization": f"Bearer {SUPABASE_KEY}",
-                    "Content-Type": "application/json"
-                },
-                method="POST"
-            )
-            with urllib.request.urlopen(req) as resp:
-                print(f"   Status: {resp.getcode()}")
+            req_headers = {
+                "Authorization": f"Bearer {SUPABASE_KEY}",
+                "Content-Type": "application/json"
+            }
+            if HTTP_LAYER_AVAILABLE:
+                # Reaproveita a mesma conexão TLS entre as chamadas do loop
+                resp = http.post(f"{SUPABASE_URL}/functions/v1/extract-content",
+                                 data=req_data, headers=req_headers, timeout=60)
+                resp.raise_for_status()
+                print(f"   Status: {resp.status_code}")
+            else:
+                req = urllib.request.Request(
+                    f"{SUPABASE_URL}/functions/v1/extract-content",
+                    data=req_data,
+                    headers=req_headers,
+                    method="POST"
+                )
+                with urllib.request.urlopen(req) as resp:
+                    print(f"   Status: {resp.getcode()}")
         except Exception as e:
             print(f"   ❌ Erro ao invocar extract: {e}")
             # Não parar tudo por um erro